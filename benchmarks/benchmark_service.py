@@ -0,0 +1,282 @@
+import argparse
+import logging
+import math
+import os
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from json import dump, load
+from types import SimpleNamespace
+from urllib.parse import quote
+
+import requests
+import uvicorn
+
+import main as words_counter_service
+from benchmarks.corpus_generator import FILE_TYPES, create_vocabulary, generate_corpus, iter_lines, parse_size
+from benchmarks.local_http_server import LocalHttpServer
+from service.ingest_context import IngestContext
+
+REPO_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_FLUSH_NUM_OF_WORDS = [1000, 100000]
+
+
+def get_percentile(values: list, percentile: float) -> float:
+    # the nearest rank percentile
+    sorted_values = sorted(values)
+    return sorted_values[max(math.ceil(percentile / 100 * len(sorted_values)), 1) - 1]
+
+
+def get_free_port() -> int:
+    with socket.socket() as free_socket:
+        free_socket.bind(("127.0.0.1", 0))
+        return free_socket.getsockname()[1]
+
+
+def get_git_commit() -> str or None:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_DIRECTORY, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def create_benchmark_config(config_path: str, backend: str, work_directory: str, size_bytes: int) -> dict:
+    with open(config_path, "r") as config_file:
+        config = load(config_file)
+    config["database_helper"].update({"backend": backend,
+                                      "sqlite_path": os.path.join(work_directory, "words_counter.db")})
+    # every repeat is counted again, no ingest is answered from the cached counts of a previous repeat
+    config["ingest_cache"]["enabled"] = False
+    # the html markup is added to the text size of the corpus file
+    config["words_counter_helper"]["url_max_body_size"] = max(config["words_counter_helper"]["url_max_body_size"],
+                                                              2 * size_bytes)
+    return config
+
+
+class ServiceBenchmark:
+    # runs the service (with its real endpoints) on a local port, and measures its hot paths
+
+    def __init__(self, args, work_directory: str):
+        self.args = args
+        self.work_directory = work_directory
+        self.size_bytes = parse_size(args.size)
+        self.metrics = {}
+        self.words_counter = None
+        self.server = None
+        self.server_thread = None
+        self.base_url = None
+        self.http_session = requests.Session()
+
+    def add_metric(self, name: str, value: float, unit: str, higher_is_better: bool):
+        self.metrics[name] = {"value": value, "unit": unit, "higher_is_better": higher_is_better}
+        print(f"{name}: {value:,.6g} {unit}")
+
+    def start(self):
+        # the service reads config.json from its working directory
+        logger = logging.getLogger("words_counter_benchmark")
+        logger.addHandler(logging.NullHandler())
+        logger.propagate = False
+        self.words_counter = words_counter_service.WordsCounter(SimpleNamespace(logger=logger))
+        # the endpoints use the global words counter of the service module
+        words_counter_service.words_counter = self.words_counter
+        self.words_counter.words_counter_helper.setup_system()
+        port = get_free_port()
+        self.server = uvicorn.Server(uvicorn.Config(words_counter_service.app, host="127.0.0.1", port=port,
+                                                    log_level="warning"))
+        self.server_thread = threading.Thread(target=self.server.run, name="words-counter-service")
+        self.server_thread.start()
+        while not self.server.started:
+            if not self.server_thread.is_alive():
+                raise RuntimeError("the service failed to start")
+            time.sleep(0.01)
+        self.base_url = f"http://127.0.0.1:{port}"
+
+    def stop(self):
+        self.http_session.close()
+        if self.server:
+            self.server.should_exit = True
+            self.server_thread.join()
+
+    def post(self, path: str, json: dict) -> float:
+        # returns the latency of the request
+        start_time = time.perf_counter()
+        response = self.http_session.post(f"{self.base_url}{path}", json=json)
+        latency = time.perf_counter() - start_time
+        # a batch ingest reports its failed inputs in a successful response
+        if response.status_code != 200 or "failed_inputs" in response.text and response.json()["failed_inputs"]:
+            raise RuntimeError(f"{path} failed with status code {response.status_code}: {response.text}")
+        return latency
+
+    def benchmark_tokenizer(self):
+        # tokens/sec of update_words_counter_mapping, the counting of a simple string input
+        lines = list(iter_lines(parse_size(self.args.tokenizer_size), self.args.seed))
+        text = "\n".join(" ".join(line) for line in lines)
+        num_of_tokens = sum(map(len, lines))
+        best_time = float("inf")
+        for _ in range(self.args.repeats):
+            context = IngestContext()
+            start_time = time.perf_counter()
+            self.words_counter.words_counter_helper.update_words_counter_mapping(text, context)
+            best_time = min(best_time, time.perf_counter() - start_time)
+        self.add_metric("tokenizer.tokens_per_second", num_of_tokens / best_time, "tokens/s", True)
+
+    def benchmark_ingest(self, corpus: dict, http_server: LocalHttpServer):
+        # the end to end latency of each input type: the request, reading, counting and recording the counts in db
+        string_input = " ".join(" ".join(line) for line in iter_lines(min(self.size_bytes, 1048576), self.args.seed))
+        requests_by_input_type = {"string": ("/word_counter", {"received_input": string_input}, len(string_input))}
+        for file_type, file_path in corpus.items():
+            if file_type == "html":
+                url = f"{http_server.base_url}/{os.path.basename(file_path)}"
+                requests_by_input_type["url"] = ("/word_counter", {"received_input": url}, os.path.getsize(file_path))
+            else:
+                # the file path pattern of /word_counter expects a drive letter, a batch ingest takes any absolute
+                # path (the work directory may be a relative one)
+                requests_by_input_type[file_type] = ("/batch_ingest", {"files": os.path.abspath(file_path)},
+                                                     os.path.getsize(file_path))
+
+        for input_type, (path, json, input_size) in requests_by_input_type.items():
+            latencies = [self.post(path, json) for _ in range(self.args.repeats)]
+            median_latency = statistics.median(latencies)
+            self.add_metric(f"ingest.{input_type}.latency_seconds", median_latency, "s", False)
+            self.add_metric(f"ingest.{input_type}.bytes_per_second", input_size / median_latency, "bytes/s", True)
+
+    def benchmark_db_flush(self):
+        # the time of recording the counts of an ingest in db, the first repeat inserts the words and the next ones
+        # update them
+        words_counter_helper = self.words_counter.words_counter_helper
+        for num_of_words in DB_FLUSH_NUM_OF_WORDS:
+            counter = Counter({f"flush{num_of_words}word{i}": i % 10 + 1 for i in range(num_of_words)})
+            flush_times = []
+            for _ in range(self.args.repeats):
+                context = IngestContext()
+                context.merge_counter(counter)
+                start_time = time.perf_counter()
+                words_counter_helper.update_database(context)
+                flush_times.append(time.perf_counter() - start_time)
+            self.add_metric(f"db_flush.{num_of_words}_words.seconds", statistics.median(flush_times), "s", False)
+
+    def benchmark_word_statistics(self):
+        # the latency of /word_statistics/{word} under concurrent requests, each client has its own connection
+        vocabulary = create_vocabulary(random.Random(self.args.seed))
+        concurrency = self.args.concurrency
+        num_of_requests_per_client = max(self.args.statistics_requests // concurrency, 1)
+
+        def send_requests(client_id: int) -> list:
+            random_generator = random.Random(f"{self.args.seed}-{client_id}")
+            latencies = []
+            with requests.Session() as session:
+                for _ in range(num_of_requests_per_client):
+                    word = quote(random_generator.choice(vocabulary), safe="")
+                    start_time = time.perf_counter()
+                    response = session.get(f"{self.base_url}/word_statistics/{word}")
+                    latencies.append(time.perf_counter() - start_time)
+                    response.raise_for_status()
+            return latencies
+
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            latencies = [latency for client_latencies in executor.map(send_requests, range(concurrency))
+                         for latency in client_latencies]
+        elapsed_time = time.perf_counter() - start_time
+        self.add_metric("word_statistics.p50_latency_seconds", get_percentile(latencies, 50), "s", False)
+        self.add_metric("word_statistics.p99_latency_seconds", get_percentile(latencies, 99), "s", False)
+        self.add_metric("word_statistics.requests_per_second", len(latencies) / elapsed_time, "requests/s", True)
+
+    def run(self) -> dict:
+        file_types = self.args.file_types.split(",")
+        corpus = generate_corpus(os.path.join(self.work_directory, "corpus"), self.size_bytes, file_types,
+                                 self.args.seed)
+        http_server = LocalHttpServer(os.path.join(self.work_directory, "corpus"))
+        http_server.start()
+        try:
+            self.start()
+            self.benchmark_tokenizer()
+            self.benchmark_ingest(corpus, http_server)
+            self.benchmark_db_flush()
+            self.benchmark_word_statistics()
+        finally:
+            self.stop()
+            http_server.stop()
+        return self.metrics
+
+
+def find_regressions(metrics: dict, baseline_metrics: dict, max_regression: float) -> list:
+    # the metrics that are worse than their baseline by more than max_regression (eg: 0.2 is 20%)
+    regressions = []
+    for name, metric in metrics.items():
+        baseline_metric = baseline_metrics.get(name)
+        if not baseline_metric or not baseline_metric["value"]:
+            continue
+        change = metric["value"] / baseline_metric["value"] - 1
+        if (change < -max_regression) if metric["higher_is_better"] else (change > max_regression):
+            regressions.append({"metric": name, "value": metric["value"], "baseline": baseline_metric["value"],
+                                "change": change})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmarks the ingest and lookup hot paths of the service")
+    parser.add_argument("--backend", choices=["memory", "sqlite"], default="memory")
+    parser.add_argument("--config", default=os.path.join(REPO_DIRECTORY, "config.json"),
+                        help="the service configurations, the storage backend is replaced by --backend")
+    parser.add_argument("--size", default="1MB", help="the text size of each corpus file (eg: 1MB, 10GB)")
+    parser.add_argument("--file-types", default=",".join(FILE_TYPES))
+    parser.add_argument("--tokenizer-size", default="10MB")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--statistics-requests", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--work-directory", help="keeps the generated corpus between runs (default: a temp directory)")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="the results of a previous run, the run fails on a regression")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args()
+
+    output_path, config_path = os.path.abspath(args.output), os.path.abspath(args.config)
+    baseline_path = os.path.abspath(args.baseline) if args.baseline else None
+    original_directory = os.getcwd()
+    with tempfile.TemporaryDirectory() as temp_directory:
+        work_directory = os.path.abspath(args.work_directory or temp_directory)
+        os.makedirs(work_directory, exist_ok=True)
+        config = create_benchmark_config(config_path, args.backend, work_directory, parse_size(args.size))
+        # the db file of a previous run is not reused, every run starts with an empty db
+        for file_name in ["words_counter.db", "words_counter.db-wal", "words_counter.db-shm"]:
+            if os.path.exists(os.path.join(work_directory, file_name)):
+                os.remove(os.path.join(work_directory, file_name))
+        with open(os.path.join(work_directory, "config.json"), "w") as config_file:
+            dump(config, config_file, indent=2)
+        os.chdir(work_directory)
+        try:
+            metrics = ServiceBenchmark(args, work_directory).run()
+        finally:
+            os.chdir(original_directory)
+
+    results = {"environment": {"python_version": platform.python_version(), "platform": platform.platform(),
+                               "cpu_count": os.cpu_count(), "git_commit": get_git_commit()},
+               "parameters": {key: value for key, value in vars(args).items()
+                              if key not in ["output", "baseline", "work_directory"]},
+               "metrics": metrics}
+    if baseline_path:
+        with open(baseline_path, "r") as baseline_file:
+            results["regressions"] = find_regressions(metrics, load(baseline_file)["metrics"], args.max_regression)
+    with open(output_path, "w") as output_file:
+        dump(results, output_file, indent=2)
+    print(f"the results were written to {output_path}")
+
+    for regression in results.get("regressions", []):
+        print(f"regression: {regression['metric']} is {regression['value']:,.6g}, "
+              f"the baseline is {regression['baseline']:,.6g} ({regression['change']:+.1%})")
+    if results.get("regressions"):
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
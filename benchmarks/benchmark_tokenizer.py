@@ -0,0 +1,55 @@
+import argparse
+import random
+import re
+import time
+
+from service.words_tokenizer import count_words
+
+SAMPLE_WORDS = ["what", "What!", "what,", "well-known", "1234", "don't", "HELLO", "world.", "-,-", "tést", "a3b"]
+
+
+def generate_text(num_of_words: int) -> str:
+    random.seed(0)
+    return " ".join(random.choice(SAMPLE_WORDS) for _ in range(num_of_words))
+
+
+def legacy_count_words(text: str) -> dict:
+    # the per word implementation that was used by update_words_counter_mapping
+    words_counter_mapping = {}
+    for word in text.split():
+        if not bool(re.search(r'[a-zA-Z]', word)):
+            continue
+        word = re.sub(r'[^a-zA-Z,-]', '', word).lower()
+        if word in words_counter_mapping:
+            words_counter_mapping[word] += 1
+        else:
+            words_counter_mapping[word] = 1
+    return words_counter_mapping
+
+
+def measure(function, text: str, num_of_tokens: int, repeats: int) -> float:
+    best_time = float("inf")
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        function(text)
+        best_time = min(best_time, time.perf_counter() - start_time)
+    return num_of_tokens / best_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="tokens/sec of the words tokenizer")
+    parser.add_argument("--num-of-words", type=int, default=1000000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    text = generate_text(args.num_of_words)
+    assert legacy_count_words(text) == count_words(text)
+    legacy_rate = measure(legacy_count_words, text, args.num_of_words, args.repeats)
+    single_pass_rate = measure(count_words, text, args.num_of_words, args.repeats)
+    print(f"legacy per word loop: {legacy_rate:,.0f} tokens/sec")
+    print(f"single pass tokenizer: {single_pass_rate:,.0f} tokens/sec")
+    print(f"speedup: {single_pass_rate / legacy_rate:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
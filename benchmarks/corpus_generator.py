@@ -0,0 +1,151 @@
+import argparse
+import csv
+import io
+import itertools
+import os
+import random
+import string
+import zipfile
+from json import dumps
+from xml.sax.saxutils import escape
+
+FILE_TYPES = ["txt", "csv", "json", "docx", "html"]
+VOCABULARY_SIZE = 50000
+WORDS_PER_LINE = 12
+LINES_PER_WRITE = 1000
+SIZE_UNITS = {"kb": 1024, "mb": 1024 ** 2, "gb": 1024 ** 3}
+DOCX_CONTENT_TYPES_XML = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/word/document.xml"
+ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/></Types>"""
+DOCX_DOCUMENT_START = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>
+"""
+DOCX_DOCUMENT_END = "<w:sectPr/></w:body></w:document>"
+
+
+def parse_size(size: str) -> int:
+    # eg: 1048576, 512KB, 1MB, 10GB
+    size = size.strip().lower()
+    for unit, unit_size in SIZE_UNITS.items():
+        if size.endswith(unit):
+            return int(float(size[:-len(unit)]) * unit_size)
+    return int(size)
+
+
+def create_vocabulary(random_generator: random.Random, vocabulary_size: int = VOCABULARY_SIZE) -> list:
+    # mostly lower case words, with some of the forms the tokenizer cleans up (capitals, punctuation, digits, dashes)
+    vocabulary = []
+    for _ in range(vocabulary_size):
+        word = "".join(random_generator.choices(string.ascii_lowercase, k=random_generator.randint(2, 10)))
+        form = random_generator.random()
+        if form < 0.1:
+            word = word.capitalize()
+        elif form < 0.15:
+            word = f"{word}{random_generator.choice('.!?,')}"
+        elif form < 0.17:
+            word = f"{word}-{vocabulary[-1] if vocabulary else word}"
+        elif form < 0.18:
+            word = f"{word}{random_generator.randint(0, 9)}"
+        vocabulary.append(word)
+    return vocabulary
+
+
+def iter_lines(size_bytes: int, seed: int):
+    # yields lines of words until about size_bytes characters were yielded. the words frequencies follow zipf's law,
+    # like the words of a natural language text, and the same seed always yields the same lines
+    random_generator = random.Random(seed)
+    vocabulary = create_vocabulary(random_generator)
+    cum_weights = list(itertools.accumulate(1 / rank for rank in range(1, len(vocabulary) + 1)))
+    num_of_bytes = 0
+    while num_of_bytes < size_bytes:
+        words = random_generator.choices(vocabulary, cum_weights=cum_weights, k=WORDS_PER_LINE * LINES_PER_WRITE)
+        for i in range(0, len(words), WORDS_PER_LINE):
+            line = words[i:i + WORDS_PER_LINE]
+            num_of_bytes += sum(map(len, line)) + len(line)
+            yield line
+            if num_of_bytes >= size_bytes:
+                return
+
+
+def write_txt_file(file, size_bytes: int, seed: int):
+    for line in iter_lines(size_bytes, seed):
+        file.write(" ".join(line) + "\n")
+
+
+def write_csv_file(file, size_bytes: int, seed: int):
+    writer = csv.writer(file)
+    for line in iter_lines(size_bytes, seed):
+        writer.writerow(line)
+
+
+def write_json_file(file, size_bytes: int, seed: int):
+    file.write("[")
+    for i, line in enumerate(iter_lines(size_bytes, seed)):
+        file.write(f"{',' if i else ''}\n{dumps({'id': i, 'text': ' '.join(line)})}")
+    file.write("\n]\n")
+
+
+def write_html_file(file, size_bytes: int, seed: int):
+    file.write("<!DOCTYPE html>\n<html><head><title>words corpus</title></head><body>\n")
+    for i, line in enumerate(iter_lines(size_bytes, seed)):
+        if i % 10 == 0:
+            # tags and attributes in the middle of the text, they are not counted
+            file.write(f'<p><a href="/page/{i}">{escape(line[0])}</a> {escape(" ".join(line[1:]))}</p>\n')
+        else:
+            file.write(f"<p>{escape(' '.join(line))}</p>\n")
+    file.write("</body></html>\n")
+
+
+def write_docx_file(file_path: str, size_bytes: int, seed: int):
+    # a minimal document with a paragraph per line, the document xml is written while it is generated
+    with zipfile.ZipFile(file_path, "w", zipfile.ZIP_DEFLATED) as docx_file:
+        docx_file.writestr("[Content_Types].xml", DOCX_CONTENT_TYPES_XML)
+        with docx_file.open("word/document.xml", "w", force_zip64=True) as document_xml:
+            with io.TextIOWrapper(document_xml, encoding="utf-8") as file:
+                file.write(DOCX_DOCUMENT_START)
+                for line in iter_lines(size_bytes, seed):
+                    file.write(f'<w:p><w:r><w:t xml:space="preserve">{escape(" ".join(line))}</w:t></w:r></w:p>\n')
+                file.write(DOCX_DOCUMENT_END)
+
+
+TEXT_FILES_WRITERS = {"txt": write_txt_file, "csv": write_csv_file, "json": write_json_file, "html": write_html_file}
+
+
+def generate_corpus_file(directory: str, file_type: str, size_bytes: int, seed: int) -> str:
+    file_path = os.path.join(directory, f"corpus_{size_bytes}_{seed}.{file_type}")
+    if os.path.isfile(file_path):
+        # the same size and seed always generate the same file, it is generated once
+        return file_path
+    temp_file_path = f"{file_path}.tmp"
+    if file_type == "docx":
+        write_docx_file(temp_file_path, size_bytes, seed)
+    else:
+        with open(temp_file_path, "w", encoding="utf-8", newline="") as file:
+            TEXT_FILES_WRITERS[file_type](file, size_bytes, seed)
+    os.replace(temp_file_path, file_path)
+    return file_path
+
+
+def generate_corpus(directory: str, size_bytes: int, file_types: list, seed: int) -> dict:
+    # returns the path of the generated file of each file type
+    os.makedirs(directory, exist_ok=True)
+    return {file_type: generate_corpus_file(directory, file_type, size_bytes, seed) for file_type in file_types}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="generates a synthetic words corpus file of each file type")
+    parser.add_argument("--directory", default="corpus")
+    parser.add_argument("--size", default="1MB", help="the text size of each file (eg: 1MB, 10GB)")
+    parser.add_argument("--file-types", default=",".join(FILE_TYPES))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    corpus = generate_corpus(args.directory, parse_size(args.size), args.file_types.split(","), args.seed)
+    for file_type, file_path in corpus.items():
+        print(f"{file_type}: {file_path} ({os.path.getsize(file_path):,} bytes)")
+
+
+if __name__ == '__main__':
+    main()
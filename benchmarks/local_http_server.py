@@ -0,0 +1,32 @@
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+import threading
+
+
+class CorpusRequestHandler(SimpleHTTPRequestHandler):
+    # keep alive connections, like a real web server, and no request logs in the benchmark output
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LocalHttpServer:
+    # serves the files of a directory on a local port, a stand in for the web servers of the URL ingests
+
+    def __init__(self, directory: str):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), partial(CorpusRequestHandler, directory=directory))
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, name="local-http-server", daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
@@ -1,35 +1,122 @@
 from fastapi import FastAPI, Request, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
+import anyio
 import uvicorn
 
-from json import JSONDecodeError
+from json import JSONDecodeError, dumps, loads
+import queue
 import re
 
 from monitoring.logger import Logger
-from service.database_helper import DatabaseHelper
+from monitoring.metrics import CONTENT_TYPE, POOL_IN_USE, QUEUE_SIZE, REGISTRY
+from service.ingest_context import IngestContext
+from service.ingest_jobs_manager import IngestJobsManager
+from service.upload_words_counter import create_upload_words_counter
 from service.words_counter_helper import WordsCounterHelper
 from type.response_status import ResponseStatus
 
 app = FastAPI()
 
 
+@app.on_event("startup")
+def startup():
+    words_counter.words_counter_helper.start()
+    words_counter.ingest_jobs_manager.start()
+
+
+@app.on_event("shutdown")
+def shutdown():
+    words_counter.ingest_jobs_manager.stop()
+    words_counter.words_counter_helper.stop()
+
+
 @app.post('/word_counter', response_model=ResponseStatus)
 async def word_counter(request: Request) -> ResponseStatus:
     status = await words_counter.set_text_input(request)
     return status
 
 
+@app.post('/upload', response_model=ResponseStatus)
+async def upload(request: Request) -> ResponseStatus:
+    status = await words_counter.upload_text(request)
+    return status
+
+
+@app.post('/batch_ingest')
+async def batch_ingest(request: Request) -> dict:
+    result = await words_counter.ingest_batch(request)
+    return result
+
+
+@app.post('/jobs', status_code=202)
+async def create_ingest_job(request: Request) -> dict:
+    job = await words_counter.create_ingest_job(request)
+    return job
+
+
+@app.get('/jobs/{job_id}')
+def ingest_job(job_id: str) -> dict:
+    job = words_counter.get_ingest_job(job_id)
+    return job
+
+
 @app.get('/word_statistics/{word}', response_model=int)
 def word_statistics(word: str) -> int:
     word_count = words_counter.get_word_statistics(word)
     return word_count
 
 
+@app.post('/word_statistics')
+async def words_statistics(request: Request):
+    words_counts = await words_counter.get_words_statistics(request)
+    return words_counts
+
+
+@app.get('/top_words')
+def top_words(limit: int = 100, offset: int = 0) -> dict:
+    words_page = words_counter.get_top_words(limit, offset)
+    return words_page
+
+
+@app.get('/words_by_prefix/{prefix}')
+def words_by_prefix(prefix: str, limit: int = 100, offset: int = 0) -> dict:
+    words_page = words_counter.get_words_by_prefix(prefix, limit, offset)
+    return words_page
+
+
+@app.get('/metrics', response_class=PlainTextResponse)
+def metrics() -> PlainTextResponse:
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+@app.get('/cache_statistics')
+def cache_statistics() -> dict:
+    statistics = words_counter.get_cache_statistics()
+    return statistics
+
+
 class WordsCounter:
 
     def __init__(self, logger: Logger):
         self.logger = logger.logger
         self.words_counter_helper = WordsCounterHelper(logger.logger)
-        self.database_helper = DatabaseHelper()
+        self.database_helper = self.words_counter_helper.database_helper
+        self.ingest_limiter = None
+        self.ingest_jobs_manager = IngestJobsManager(logger.logger, self.ingest)
+        QUEUE_SIZE.set_function(self.ingest_jobs_manager.jobs_queue.qsize, "ingest_jobs")
+        POOL_IN_USE.set_function(lambda: self.ingest_limiter.borrowed_tokens if self.ingest_limiter else 0,
+                                "ingest_threads")
+
+    def get_ingest_limiter(self) -> anyio.CapacityLimiter:
+        # ingests run in their own worker threads, they never take the threads that serve the statistics requests
+        if self.ingest_limiter is None:
+            max_concurrent_ingests = self.words_counter_helper.config["words_counter_helper"]["max_concurrent_ingests"]
+            self.ingest_limiter = anyio.CapacityLimiter(max_concurrent_ingests)
+        return self.ingest_limiter
+
+    async def run_blocking_stage(self, function, *args):
+        # file reads, URL downloads, counting and db writes are blocking, they must not run on the event loop
+        return await anyio.to_thread.run_sync(function, *args, limiter=self.get_ingest_limiter())
 
     @staticmethod
     async def validate_word_counter_request(request: Request) -> (ResponseStatus, str):
@@ -38,7 +125,9 @@ class WordsCounter:
             return ResponseStatus.Error, 'No Content-Type provided.'
         elif content_type == 'application/json':
             try:
-                json = await request.json()
+                body = await request.body()
+                # parsing a large body takes a while, it is parsed off the event loop
+                json = await anyio.to_thread.run_sync(loads, body)
                 if not type(json) == dict:
                     return ResponseStatus.Error, 'Content-Type not supported.'
                 received_input = json.get("received_input")
@@ -59,7 +148,7 @@ class WordsCounter:
             return ResponseStatus.Error, "A requested word must contains at least one letter"
         return ResponseStatus.Ok, None
 
-    async def set_text_input(self, request: Request) -> ResponseStatus:
+    async def validate_ingest_request(self, request: Request) -> str:
         extra_msg = "endpoint name is: word counter"
         self.logger.info("got a request to count the number of appearances for each word in the input",
                          extra={"extra": extra_msg})
@@ -68,9 +157,12 @@ class WordsCounter:
             extra_msg = f"error is: {result}"
             self.logger.error("the word counter validation was was failed", extra={"extra": extra_msg})
             raise HTTPException(status_code=400, detail=result)
+        return result
 
+    def ingest(self, received_input: str, context: IngestContext) -> ResponseStatus:
+        # counts the words of the input and records them in db, this is a blocking call
         try:
-            self.words_counter_helper.extract_text_from_input(result)
+            self.words_counter_helper.extract_text_from_input(received_input, context)
         except ValueError as ex:
             extra_msg = f"the exception is: {str(ex)}, the exception_type is: {type(ex).__name__}"
             self.logger.critical(f"a value error occurred while trying to extract text from input", extra={"extra": extra_msg})
@@ -87,13 +179,151 @@ class WordsCounter:
             self.logger.critical(f"an unexpected error occurred while trying to extract text from input", extra={"extra": extra_msg})
             raise HTTPException(status_code=500, detail=extra_msg)
 
-        status = self.words_counter_helper.update_database()
+        return self.record_counts(context)
+
+    def record_counts(self, context: IngestContext) -> ResponseStatus:
+        status = self.words_counter_helper.update_database(context)
         if status == ResponseStatus.Error:
             extra_msg = "failed to record any words in db"
             self.logger.error("the word counter validation was was failed", extra={"extra": extra_msg})
             raise HTTPException(status_code=500, detail=extra_msg)
         return status
 
+    async def set_text_input(self, request: Request) -> ResponseStatus:
+        received_input = await self.validate_ingest_request(request)
+        return await self.run_blocking_stage(self.ingest, received_input, IngestContext())
+
+    def reject_upload_body_size(self, body_size: int, max_body_size: int):
+        extra_msg = f"body size is: {body_size}, max body size is: {max_body_size}"
+        self.logger.error("the uploaded body is larger than the max body size", extra={"extra": extra_msg})
+        raise HTTPException(status_code=413, detail="Uploaded content is too large")
+
+    async def upload_text(self, request: Request) -> ResponseStatus:
+        # the body is counted while it is received, chunks are gathered up to upload_chunk_size and counted off the
+        # event loop. only the current chunks and the unfinished word are held in memory, never the whole body
+        extra_msg = "endpoint name is: upload"
+        self.logger.info("got a request to count the words of an uploaded body", extra={"extra": extra_msg})
+        try:
+            upload_words_counter = create_upload_words_counter(request.headers.get('Content-Type'),
+                                                               request.headers.get('Content-Encoding'))
+        except ValueError as ex:
+            extra_msg = f"error is: {str(ex)}"
+            self.logger.error("the upload validation was failed", extra={"extra": extra_msg})
+            raise HTTPException(status_code=400, detail=str(ex))
+
+        chunk_size = self.words_counter_helper.config["words_counter_helper"]["upload_chunk_size"]
+        max_body_size = self.words_counter_helper.config["words_counter_helper"]["upload_max_body_size"]
+        content_length = request.headers.get("Content-Length")
+        if content_length and content_length.isdigit() and int(content_length) > max_body_size:
+            self.reject_upload_body_size(int(content_length), max_body_size)
+
+        context = IngestContext()
+        chunks, chunks_size, body_size = [], 0, 0
+        try:
+            async for chunk in request.stream():
+                body_size += len(chunk)
+                if body_size > max_body_size:
+                    self.reject_upload_body_size(body_size, max_body_size)
+                chunks.append(chunk)
+                chunks_size += len(chunk)
+                if chunks_size >= chunk_size:
+                    await self.run_blocking_stage(upload_words_counter.feed, b"".join(chunks))
+                    context.add_processed_bytes(chunks_size)
+                    chunks, chunks_size = [], 0
+            await self.run_blocking_stage(upload_words_counter.feed, b"".join(chunks))
+            context.add_processed_bytes(chunks_size)
+            upload_counter = await self.run_blocking_stage(upload_words_counter.close)
+        except HTTPException:
+            raise
+        except Exception as ex:
+            # eg: a malformed multipart body
+            extra_msg = f"the exception is: {str(ex)}, the exception_type is: {type(ex).__name__}"
+            self.logger.error("an error occurred while trying to count the uploaded body", extra={"extra": extra_msg})
+            raise HTTPException(status_code=400, detail=extra_msg)
+
+        context.add_counted_words(sum(upload_counter.values()))
+        context.merge_counter(upload_counter)
+        return await self.run_blocking_stage(self.record_counts, context)
+
+    async def validate_batch_ingest_request(self, request: Request) -> (ResponseStatus, dict or str):
+        content_type = request.headers.get('Content-Type')
+        if content_type != 'application/json':
+            return ResponseStatus.Error, 'Content-Type not supported.'
+        try:
+            json = await request.json()
+        except JSONDecodeError:
+            return ResponseStatus.Error, 'Invalid JSON data.'
+        if not type(json) == dict or not (json.get("urls") or json.get("files")):
+            return ResponseStatus.Error, "The request contains unexpected keys"
+        urls, files_pattern = json.get("urls") or [], json.get("files") or ""
+        if type(urls) != list or any(type(url) != str for url in urls):
+            return ResponseStatus.Error, "The urls must to be a list of strings"
+        invalid_urls = [url for url in urls if not re.match(self.words_counter_helper.url_pattern, url)]
+        if invalid_urls:
+            return ResponseStatus.Error, f"The urls must have a URL pattern: {invalid_urls[0]}"
+        if type(files_pattern) != str:
+            return ResponseStatus.Error, "The files must to be a path of a directory or a glob pattern"
+        if files_pattern and not re.match(self.words_counter_helper.files_glob_pattern, files_pattern):
+            return ResponseStatus.Error, f"The files must have an absolute file path pattern: {files_pattern}"
+        return ResponseStatus.Ok, {"urls": urls, "files": files_pattern}
+
+    def reject_batch_size(self, error: str, max_inputs: int):
+        extra_msg = f"{error}, max inputs is: {max_inputs}"
+        self.logger.error("the batch ingest validation was failed", extra={"extra": extra_msg})
+        raise HTTPException(status_code=400, detail=f"A batch must contain between 1 and {max_inputs} inputs")
+
+    async def ingest_batch(self, request: Request) -> dict:
+        # the inputs of the batch are ingested concurrently, and their counts are recorded in db by a single update
+        validation_status, result = await self.validate_batch_ingest_request(request)
+        if validation_status == ResponseStatus.Error:
+            extra_msg = f"error is: {result}"
+            self.logger.error("the batch ingest validation was failed", extra={"extra": extra_msg})
+            raise HTTPException(status_code=400, detail=result)
+
+        urls = result["urls"]
+        max_inputs = self.words_counter_helper.config["batch_ingest"]["max_inputs"]
+        file_paths = []
+        if result["files"] and len(urls) <= max_inputs:
+            try:
+                file_paths = await self.run_blocking_stage(self.words_counter_helper.list_batch_files,
+                                                           result["files"], max_inputs - len(urls))
+            except ValueError as ex:
+                self.reject_batch_size(str(ex), max_inputs)
+        num_of_inputs = len(urls) + len(file_paths)
+        if not num_of_inputs or num_of_inputs > max_inputs:
+            self.reject_batch_size(f"number of inputs is: {num_of_inputs}", max_inputs)
+
+        extra_msg = f"number of urls is: {len(urls)}, number of files is: {len(file_paths)}"
+        self.logger.info("got a request to ingest a batch of inputs", extra={"extra": extra_msg})
+        context = IngestContext()
+        failed_inputs = await self.run_blocking_stage(self.words_counter_helper.ingest_batch, urls, file_paths,
+                                                      context)
+        if len(failed_inputs) == num_of_inputs:
+            status = ResponseStatus.Error
+        else:
+            status = await self.run_blocking_stage(self.record_counts, context)
+            if failed_inputs:
+                status = ResponseStatus.Partial
+        return {"status": status, "inputs": num_of_inputs, "failed_inputs": failed_inputs}
+
+    async def create_ingest_job(self, request: Request) -> dict:
+        received_input = await self.validate_ingest_request(request)
+        try:
+            job = self.ingest_jobs_manager.submit(received_input)
+        except queue.Full:
+            extra_msg = "the ingest jobs queue is full"
+            self.logger.error("failed to create an ingest job", extra={"extra": extra_msg})
+            raise HTTPException(status_code=429, detail="Too many ingest jobs, try again later")
+        extra_msg = f"job id is: {job.job_id}"
+        self.logger.info("an ingest job was created", extra={"extra": extra_msg})
+        return job.to_dict()
+
+    def get_ingest_job(self, job_id: str) -> dict:
+        job = self.ingest_jobs_manager.get_job(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return job.to_dict()
+
     def get_word_statistics(self, word: str):
         validation_status, detail = self.validate_word_statistics_request(word)
         if validation_status == ResponseStatus.Error:
@@ -113,9 +343,131 @@ class WordsCounter:
             raise HTTPException(status_code=500, detail=extra_msg)
         return word_count
 
+    async def validate_words_statistics_request(self, request: Request) -> (ResponseStatus, list or str):
+        content_type = request.headers.get('Content-Type')
+        if content_type != 'application/json':
+            return ResponseStatus.Error, 'Content-Type not supported.'
+        try:
+            json = await request.json()
+        except JSONDecodeError:
+            return ResponseStatus.Error, 'Invalid JSON data.'
+        if not type(json) == dict or not json.get("words"):
+            return ResponseStatus.Error, "The request contains unexpected keys"
+        words = json["words"]
+        if type(words) != list or any(type(word) != str for word in words):
+            return ResponseStatus.Error, "The requested words must to be a list of strings"
+        max_batch_size = self.words_counter_helper.config["words_statistics"]["max_batch_size"]
+        if len(words) > max_batch_size:
+            return ResponseStatus.Error, f"A request may contain up to {max_batch_size} words"
+        return ResponseStatus.Ok, words
+
+    async def get_words_statistics(self, request: Request):
+        validation_status, result = await self.validate_words_statistics_request(request)
+        if validation_status == ResponseStatus.Error:
+            extra_msg = f"error is: {result}"
+            self.logger.error("the words statistics validation was failed", extra={"extra": extra_msg})
+            raise HTTPException(status_code=400, detail=result)
+
+        requested_words_by_cleaned_word, invalid_words = \
+            self.words_counter_helper.prepare_words_for_statistics(result)
+        if invalid_words:
+            extra_msg = f"number of invalid words is: {len(invalid_words)}"
+            self.logger.error("the words statistics validation was failed", extra={"extra": extra_msg})
+            raise HTTPException(status_code=400, detail=f"A requested word must contains at least one letter: "
+                                                        f"{invalid_words[0]}")
+
+        extra_msg = f"number of words is: {len(result)}"
+        self.logger.info("got a request to get words statistics", extra={"extra": extra_msg})
+        cleaned_words = list(requested_words_by_cleaned_word)
+        stream_threshold = self.words_counter_helper.config["words_statistics"]["stream_batch_size_threshold"]
+        if len(cleaned_words) > stream_threshold:
+            # large batches are streamed, each db chunk is sent as soon as it is read
+            return StreamingResponse(self.stream_words_statistics(cleaned_words, requested_words_by_cleaned_word),
+                                     media_type="application/json")
+        try:
+            words_counts = await anyio.to_thread.run_sync(self.collect_words_statistics, cleaned_words)
+        except Exception as ex:
+            extra_msg = f"the exception is: {str(ex)}, the exception_type is: {type(ex).__name__}"
+            self.logger.critical(f"an error occurred while trying to get words counts from database",
+                                 extra={"extra": extra_msg})
+            raise HTTPException(status_code=500, detail=extra_msg)
+        return {requested_word: count for cleaned_word, count in words_counts.items()
+                for requested_word in requested_words_by_cleaned_word[cleaned_word]}
+
+    def collect_words_statistics(self, cleaned_words: list) -> dict:
+        words_counts = {}
+        for chunk_words_counts in self.words_counter_helper.iter_words_counts(cleaned_words):
+            words_counts.update(chunk_words_counts)
+        return words_counts
+
+    def stream_words_statistics(self, cleaned_words: list, requested_words_by_cleaned_word: dict):
+        # a synchronous generator, it is iterated in a worker thread by the streaming response
+        separator = ""
+        yield "{"
+        try:
+            for words_counts in self.words_counter_helper.iter_words_counts(cleaned_words):
+                for cleaned_word, count in words_counts.items():
+                    for requested_word in requested_words_by_cleaned_word[cleaned_word]:
+                        yield f"{separator}{dumps(requested_word)}: {count}"
+                        separator = ", "
+        except Exception as ex:
+            # the response status was already sent, the error can only be logged
+            extra_msg = f"the exception is: {str(ex)}, the exception_type is: {type(ex).__name__}"
+            self.logger.critical(f"an error occurred while trying to stream words counts from database",
+                                 extra={"extra": extra_msg})
+            raise
+        yield "}"
+
+    def validate_page_request(self, limit: int, offset: int) -> (ResponseStatus, str or None):
+        max_page_size = self.words_counter_helper.config["words_statistics"]["max_page_size"]
+        if not 0 < limit <= max_page_size:
+            return ResponseStatus.Error, f"The limit must be between 1 and {max_page_size}"
+        if offset < 0:
+            return ResponseStatus.Error, "The offset must not be negative"
+        return ResponseStatus.Ok, None
+
+    def get_words_page(self, get_words, limit: int, offset: int, *args) -> dict:
+        validation_status, detail = self.validate_page_request(limit, offset)
+        if validation_status == ResponseStatus.Error:
+            extra_msg = f"error is: {detail}"
+            self.logger.error("the words page validation was failed", extra={"extra": extra_msg})
+            raise HTTPException(status_code=400, detail=detail)
+        try:
+            words_counts = get_words(*args, limit, offset)
+        except Exception as ex:
+            extra_msg = f"the exception is: {str(ex)}, the exception_type is: {type(ex).__name__}"
+            self.logger.critical(f"an error occurred while trying to get a words page", extra={"extra": extra_msg})
+            raise HTTPException(status_code=500, detail=extra_msg)
+        return {"limit": limit, "offset": offset, "words": [{"word": word, "count": count}
+                                                            for word, count in words_counts]}
+
+    def get_top_words(self, limit: int, offset: int) -> dict:
+        extra_msg = f"limit is: {limit}, offset is: {offset}"
+        self.logger.info("got a request to get the top words", extra={"extra": extra_msg})
+        return self.get_words_page(self.words_counter_helper.get_top_words, limit, offset)
+
+    def get_words_by_prefix(self, prefix: str, limit: int, offset: int) -> dict:
+        validation_status, detail = self.validate_word_statistics_request(prefix)
+        if validation_status == ResponseStatus.Error:
+            extra_msg = f"error is: {detail}"
+            self.logger.error("the words prefix validation was failed", extra={"extra": extra_msg})
+            raise HTTPException(status_code=400, detail=detail)
+
+        extra_msg = f"prefix is: {prefix}, limit is: {limit}, offset is: {offset}"
+        self.logger.info("got a request to get words by prefix", extra={"extra": extra_msg})
+        cleaned_prefix = self.words_counter_helper.prepare_word_for_statistics(prefix).lower()
+        return self.get_words_page(self.words_counter_helper.get_words_by_prefix, limit, offset, cleaned_prefix)
+
+    def get_cache_statistics(self) -> dict:
+        words_count_cache = self.words_counter_helper.words_count_cache
+        if not words_count_cache:
+            raise HTTPException(status_code=404, detail="Words count cache is disabled")
+        return words_count_cache.get_statistics()
+
 
 if __name__ == '__main__':
     logger = Logger()
     words_counter = WordsCounter(logger)
     words_counter.words_counter_helper.setup_system()
     uvicorn.run(app, host="0.0.0.0", port=8000)
+    logger.stop()
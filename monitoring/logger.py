@@ -1,24 +1,111 @@
+from logging.handlers import QueueHandler, QueueListener
+from json import dumps
 import logging
+import queue
+import random
 
+from configurations.words_counter_configurations import WordsCounterConfigurations
+from monitoring.metrics import DROPPED_LOG_RECORDS
 
-def create_logger():
-    logger = logging.getLogger(__name__)
-    logger.setLevel(logging.INFO)
+JSON_FORMAT = "json"
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - %(message)s - %(extra)s"
+TRUNCATED_SUFFIX = "...[truncated]"
 
-    handler = logging.FileHandler('monitoring/logs/words_counter.log')
-    handler.setLevel(logging.INFO)
 
-    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s - %(extra)s')
-    handler.setFormatter(formatter)
+def truncate_payload(payload, max_length: int):
+    # only the first max_length characters of a long payload are kept, the rest is never copied
+    if isinstance(payload, str) and len(payload) > max_length:
+        return f"{payload[:max_length]}{TRUNCATED_SUFFIX} (length is: {len(payload)})"
+    return payload
 
-    logger.addHandler(handler)
 
-    return logger
+class JsonFormatter(logging.Formatter):
+    # a record per line, with the extra message of the record as its own field
 
+    def format(self, record: logging.LogRecord) -> str:
+        json_record = {"timestamp": self.formatTime(record), "level": record.levelname, "logger": record.name,
+                       "thread": record.threadName, "message": record.getMessage(),
+                       "extra": getattr(record, "extra", None)}
+        if record.exc_info:
+            json_record["exception"] = self.formatException(record.exc_info)
+        return dumps(json_record, default=str)
 
-class Logger:
 
-    def __init__(self):
-        self.logger = create_logger()
+class LevelSamplingFilter(logging.Filter):
+    # keeps a sample of the records of each level (eg: INFO 0.1 keeps about one record of ten), the records are
+    # dropped before they are queued or formatted
+
+    def __init__(self, sampling_rates: dict):
+        super().__init__()
+        self.sampling_rates = {logging.getLevelName(level_name): sampling_rate
+                               for level_name, sampling_rate in sampling_rates.items()}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        sampling_rate = self.sampling_rates.get(record.levelno, 1)
+        return sampling_rate >= 1 or random.random() < sampling_rate
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    # puts the records in a bounded queue, they are formatted and written by the listener thread.
+    # a record is dropped when the queue is full, logging never blocks the caller
+
+    def __init__(self, records_queue: queue.Queue, max_payload_length: int):
+        super().__init__(records_queue)
+        self.max_payload_length = max_payload_length
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # the record is not formatted here, only its payloads are truncated so a large input is not held by the queue
+        record.msg = truncate_payload(record.getMessage(), self.max_payload_length)
+        record.args = None
+        record.extra = truncate_payload(getattr(record, "extra", None), self.max_payload_length)
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DROPPED_LOG_RECORDS.inc()
 
 
+class BlockingStopQueueListener(QueueListener):
+
+    def enqueue_sentinel(self):
+        # the listener must stop even when the queue is full, it waits for the listener thread to free a place
+        self.queue.put(self._sentinel)
+
+
+def create_file_handler(logger_config: dict) -> logging.Handler:
+    handler = logging.FileHandler(logger_config["file_path"])
+    handler.setLevel(logger_config["level"])
+    if logger_config["format"] == JSON_FORMAT:
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+    return handler
+
+
+class Logger(WordsCounterConfigurations):
+    # the service logger. the callers only queue their records, a listener thread formats them and writes them to the
+    # log file, so the disk writes are never on the requests path
+
+    def __init__(self):
+        super().__init__()
+        logger_config = self.config["logger"]
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logger_config["level"])
+        self.logger.propagate = False
+        records_queue = queue.Queue(maxsize=logger_config["queue_size"])
+        queue_handler = NonBlockingQueueHandler(records_queue, logger_config["max_payload_length"])
+        queue_handler.addFilter(LevelSamplingFilter(logger_config["sampling_rates"]))
+        self.logger.addHandler(queue_handler)
+        self.queue_handler = queue_handler
+        self.listener = BlockingStopQueueListener(records_queue, create_file_handler(logger_config),
+                                                  respect_handler_level=True)
+        self.listener.start()
+
+    def stop(self):
+        # the records that are still queued are written before the listener stops
+        self.logger.removeHandler(self.queue_handler)
+        self.listener.stop()
+        for handler in self.listener.handlers:
+            handler.close()
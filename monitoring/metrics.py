@@ -0,0 +1,255 @@
+from contextlib import contextmanager
+import bisect
+import math
+import threading
+import time
+
+# the default histogram buckets (in seconds), from a single chunk to a whole large ingest
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+# the charset (utf-8) is added by the response
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+def format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label_value(str(value))}"' for name, value in labels.items()) + "}"
+
+
+class Metric:
+    # a metric family with its children, a child per label values. the children are created on first use,
+    # and the hot paths keep a reference to their child, so a sample is a single locked update
+    metric_type = None
+
+    def __init__(self, name: str, documentation: str, label_names: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.lock = threading.Lock()
+        self.children = {}
+        self.functions = {}  # label values -> a function that returns the value when the metric is collected
+
+    def create_child(self):
+        raise NotImplementedError
+
+    def labels(self, *label_values):
+        if len(label_values) != len(self.label_names):
+            raise ValueError(f"{self.name} expects the labels: {', '.join(self.label_names)}")
+        label_values = tuple(str(label_value) for label_value in label_values)
+        with self.lock:
+            if label_values not in self.children:
+                self.children[label_values] = self.create_child()
+            return self.children[label_values]
+
+    def set_function(self, function, *label_values):
+        # the value is read when the metric is collected (eg: the size of a queue), it costs nothing on the hot paths
+        with self.lock:
+            self.functions[tuple(str(label_value) for label_value in label_values)] = function
+
+    def collect_samples(self) -> list:
+        # returns (sample name suffix, labels, value) tuples
+        with self.lock:
+            children = list(self.children.items())
+            functions = list(self.functions.items())
+        samples = []
+        for label_values, child in children:
+            for suffix, extra_labels, value in child.get_samples():
+                samples.append((suffix, {**dict(zip(self.label_names, label_values)), **extra_labels}, value))
+        for label_values, function in functions:
+            try:
+                samples.append(("", dict(zip(self.label_names, label_values)), function()))
+            except Exception:
+                # a failing collector must not fail the whole scrape
+                continue
+        return samples
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        for suffix, labels, value in self.collect_samples():
+            lines.append(f"{self.name}{suffix}{format_labels(labels)} {format_value(value)}")
+        return "\n".join(lines)
+
+
+class CounterChild:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        if amount < 0:
+            raise ValueError("a counter can only be increased")
+        with self.lock:
+            self.value += amount
+
+    def get_samples(self) -> list:
+        return [("_total", {}, self.value)]
+
+
+class Counter(Metric):
+    metric_type = "counter"
+
+    def create_child(self) -> CounterChild:
+        return CounterChild()
+
+    def inc(self, amount: float = 1):
+        self.labels().inc(amount)
+
+    def collect_samples(self) -> list:
+        # the samples of the counter functions are totals as well
+        return [(suffix or "_total", labels, value) for suffix, labels, value in super().collect_samples()]
+
+
+class GaugeChild:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.value = 0
+
+    def set(self, value: float):
+        with self.lock:
+            self.value = value
+
+    def inc(self, amount: float = 1):
+        with self.lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.inc(-amount)
+
+    def get_samples(self) -> list:
+        return [("", {}, self.value)]
+
+
+class Gauge(Metric):
+    metric_type = "gauge"
+
+    def create_child(self) -> GaugeChild:
+        return GaugeChild()
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+
+class HistogramChild:
+
+    def __init__(self, buckets: tuple):
+        self.lock = threading.Lock()
+        self.buckets = buckets
+        self.buckets_counts = [0] * (len(buckets) + 1)  # the last one is the +Inf bucket
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        bucket_index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.buckets_counts[bucket_index] += 1
+            self.sum += value
+            self.count += 1
+
+    @contextmanager
+    def time(self):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start_time)
+
+    def get_samples(self) -> list:
+        with self.lock:
+            buckets_counts, histogram_sum, count = list(self.buckets_counts), self.sum, self.count
+        samples = []
+        cumulative_count = 0
+        for upper_bound, bucket_count in zip(self.buckets + (math.inf,), buckets_counts):
+            cumulative_count += bucket_count
+            samples.append(("_bucket", {"le": format_value(float(upper_bound))}, cumulative_count))
+        samples.append(("_sum", {}, histogram_sum))
+        samples.append(("_count", {}, count))
+        return samples
+
+
+class Histogram(Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def create_child(self) -> HistogramChild:
+        return HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+
+class MetricsRegistry:
+    # renders all the registered metrics in the prometheus text exposition format
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = {}
+
+    def register(self, metric: Metric) -> Metric:
+        with self.lock:
+            if metric.name in self.metrics:
+                raise ValueError(f"the metric {metric.name} is already registered")
+            self.metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        with self.lock:
+            metrics = list(self.metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# the stages of an ingest, each one is measured per chunk (or per batch of texts), never per word
+PARSE_STAGE = "parse"
+TOKENIZE_STAGE = "tokenize"
+MERGE_STAGE = "merge"
+DB_FLUSH_STAGE = "db_flush"
+
+STAGE_DURATION_SECONDS = REGISTRY.register(Histogram(
+    "words_counter_stage_duration_seconds", "The duration of the ingest stages, per chunk.", ("stage",)))
+INGEST_DURATION_SECONDS = REGISTRY.register(Histogram(
+    "words_counter_ingest_duration_seconds", "The duration of extracting and counting the words of an input.",
+    ("input_type",)))
+DB_QUERY_DURATION_SECONDS = REGISTRY.register(Histogram(
+    "words_counter_db_query_duration_seconds", "The duration of the storage backend queries.", ("query",)))
+PROCESSED_BYTES = REGISTRY.register(Counter(
+    "words_counter_processed_bytes", "The number of bytes of the ingested inputs that were processed."))
+COUNTED_WORDS = REGISTRY.register(Counter(
+    "words_counter_counted_words", "The number of words that were counted."))
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    "words_counter_cache_requests", "The lookups of the caches.", ("cache", "result")))
+DROPPED_LOG_RECORDS = REGISTRY.register(Counter(
+    "words_counter_dropped_log_records", "The log records that were dropped because the logging queue was full."))
+POOL_IN_USE = REGISTRY.register(Gauge(
+    "words_counter_pool_in_use", "The tasks that were submitted to a workers pool and are not done yet, or the "
+                                 "connections of a connections pool that are in use.", ("pool",)))
+QUEUE_SIZE = REGISTRY.register(Gauge(
+    "words_counter_queue_size", "The number of items that wait in a queue or a buffer.", ("queue",)))
+
+# the children of the stages, the hot paths use them without looking up their labels
+PARSE_DURATION_SECONDS = STAGE_DURATION_SECONDS.labels(PARSE_STAGE)
+TOKENIZE_DURATION_SECONDS = STAGE_DURATION_SECONDS.labels(TOKENIZE_STAGE)
+MERGE_DURATION_SECONDS = STAGE_DURATION_SECONDS.labels(MERGE_STAGE)
+DB_FLUSH_DURATION_SECONDS = STAGE_DURATION_SECONDS.labels(DB_FLUSH_STAGE)
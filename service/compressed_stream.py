@@ -0,0 +1,179 @@
+import bz2
+import gzip
+import lzma
+import os
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # zstandard is needed only for zstd compressed inputs
+    zstandard = None
+
+GZIP_ENCODING = "gzip"
+DEFLATE_ENCODING = "deflate"
+BZIP2_ENCODING = "bzip2"
+XZ_ENCODING = "xz"
+ZSTD_ENCODING = "zstd"
+
+FILE_EXTENSIONS_ENCODINGS = {"gz": GZIP_ENCODING, "bz2": BZIP2_ENCODING, "xz": XZ_ENCODING, "zst": ZSTD_ENCODING}
+CONTENT_ENCODINGS = {"gzip": GZIP_ENCODING, "x-gzip": GZIP_ENCODING, "deflate": DEFLATE_ENCODING,
+                     "bzip2": BZIP2_ENCODING, "x-bzip2": BZIP2_ENCODING, "xz": XZ_ENCODING, "zstd": ZSTD_ENCODING}
+IDENTITY_ENCODING = "identity"
+# the max size of a decompressed piece, a small compressed chunk never expands to a large block in memory
+MAX_DECOMPRESSED_PIECE_SIZE = 1048576
+
+
+class ZlibDecompressor:
+    # a zlib decompressor with the interface of the bz2 and lzma decompressors
+
+    def __init__(self, wbits: int):
+        self.decompressor = zlib.decompressobj(wbits=wbits)
+        self.unconsumed_data = b""
+
+    @property
+    def eof(self) -> bool:
+        return self.decompressor.eof
+
+    @property
+    def unused_data(self) -> bytes:
+        return self.decompressor.unused_data
+
+    @property
+    def needs_input(self) -> bool:
+        return not self.unconsumed_data
+
+    def decompress(self, data: bytes, max_length: int) -> bytes:
+        decompressed_data = self.decompressor.decompress(self.unconsumed_data + data, max_length)
+        self.unconsumed_data = self.decompressor.unconsumed_tail
+        return decompressed_data
+
+    def flush(self) -> bytes:
+        return self.decompressor.flush()
+
+
+class ZstdInputBuffer:
+    # the source of a zstd stream reader, it holds the compressed data that was received and not read yet.
+    # it never returns an empty read in the middle of a stream (the reader would treat it as the end of its input),
+    # it raises BlockingIOError until more data is received
+
+    def __init__(self):
+        self.data = b""
+        self.offset = 0
+
+    def append(self, data: bytes):
+        self.data, self.offset = self.data[self.offset:] + data, 0
+
+    def read(self, size: int = -1) -> bytes:
+        if self.offset >= len(self.data):
+            raise BlockingIOError("no compressed data was received yet")
+        if size < 0:
+            size = len(self.data) - self.offset
+        data = self.data[self.offset:self.offset + size]
+        self.offset += len(data)
+        return data
+
+
+class ZstdDecompressor:
+    # a zstd decompressor with the interface of the bz2 and lzma decompressors. a bounded stream reader decompresses
+    # the received data, so a small compressed chunk never expands to more than max_length bytes at once
+
+    def __init__(self):
+        self.input_buffer = ZstdInputBuffer()
+        self.reader = zstandard.ZstdDecompressor().stream_reader(self.input_buffer, read_across_frames=True)
+        # the concatenated frames are decompressed by the same reader
+        self.eof = False
+        self.unused_data = b""
+        self.needs_input = True
+
+    def decompress(self, data: bytes, max_length: int) -> bytes:
+        if data:
+            self.input_buffer.append(data)
+        try:
+            # read1 reads from the input buffer only when it has no decompressed data to return
+            decompressed_data = self.reader.read1(max_length)
+        except BlockingIOError:
+            decompressed_data = b""
+        self.needs_input = not decompressed_data
+        return decompressed_data
+
+    @staticmethod
+    def flush() -> bytes:
+        return b""
+
+
+def create_decompressor(encoding: str):
+    if encoding == GZIP_ENCODING:
+        return ZlibDecompressor(wbits=zlib.MAX_WBITS | 16)
+    if encoding == DEFLATE_ENCODING:
+        return ZlibDecompressor(wbits=zlib.MAX_WBITS)
+    if encoding == BZIP2_ENCODING:
+        return bz2.BZ2Decompressor()
+    if encoding == XZ_ENCODING:
+        return lzma.LZMADecompressor()
+    return ZstdDecompressor()
+
+
+def verify_encoding(encoding: str):
+    if encoding == ZSTD_ENCODING and zstandard is None:
+        raise ValueError("zstd compressed inputs are not supported, zstandard is not installed")
+
+
+def get_content_encoding(content_encoding: str or None) -> str or None:
+    # returns the encoding of a Content-Encoding header, or None when the content is not compressed
+    encodings = [encoding.strip().lower() for encoding in (content_encoding or "").split(",")]
+    encodings = [encoding for encoding in encodings if encoding and encoding != IDENTITY_ENCODING]
+    if not encodings:
+        return None
+    if len(encodings) > 1 or encodings[0] not in CONTENT_ENCODINGS:
+        raise ValueError(f"Unsupported Content-Encoding: {content_encoding}")
+    encoding = CONTENT_ENCODINGS[encodings[0]]
+    verify_encoding(encoding)
+    return encoding
+
+
+class StreamDecompressor:
+    # decompresses a stream that arrives in chunks, concatenated compressed members (eg: of a multi member gzip)
+    # are decompressed one after another
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        self.decompressor = create_decompressor(encoding)
+
+    def decompress(self, data: bytes):
+        # yields the decompressed pieces of the data
+        while True:
+            if self.decompressor.eof:
+                data = self.decompressor.unused_data + data
+                if not data:
+                    return
+                self.decompressor = create_decompressor(self.encoding)
+            elif not data and self.decompressor.needs_input:
+                return
+            decompressed_data = self.decompressor.decompress(data, MAX_DECOMPRESSED_PIECE_SIZE)
+            data = b""
+            if decompressed_data:
+                yield decompressed_data
+
+    def flush(self) -> bytes:
+        # returns the data that is left in the decompressor once the whole stream was decompressed
+        return getattr(self.decompressor, "flush", bytes)()
+
+
+def split_compressed_file_extension(file_path: str) -> (str, str or None):
+    # returns the extension of the file content and the compression encoding (eg: words.txt.gz -> txt, gzip)
+    extensions = os.path.basename(file_path).lower().split(".")
+    if len(extensions) > 2 and extensions[-1] in FILE_EXTENSIONS_ENCODINGS:
+        return extensions[-2], FILE_EXTENSIONS_ENCODINGS[extensions[-1]]
+    return extensions[-1], None
+
+
+def open_compressed_file(file_path: str, encoding: str):
+    # returns a binary file object of the decompressed content, it is decompressed while it is read
+    verify_encoding(encoding)
+    if encoding == GZIP_ENCODING:
+        return gzip.open(file_path, "rb")
+    if encoding == BZIP2_ENCODING:
+        return bz2.open(file_path, "rb")
+    if encoding == XZ_ENCODING:
+        return lzma.open(file_path, "rb")
+    return zstandard.ZstdDecompressor().stream_reader(open(file_path, "rb"), closefd=True)
@@ -0,0 +1,30 @@
+from collections import Counter
+import time
+
+from service.mmap_file_reader import iter_file_range
+from service.words_tokenizer import count_words
+
+# the tasks below are executed by the execution backend workers (threads or processes),
+# hence they are module level functions that receive only picklable arguments and return their own partial Counter
+
+
+def count_text_file_range(file_path: str, start: int, end: int, read_size: int) -> Counter:
+    partial_counter = Counter()
+    for view in iter_file_range(file_path, start, end, read_size):
+        # decoding straight from the memoryview, the mapped range is never copied into bytes
+        partial_counter.update(count_words(str(view, "utf-8", "ignore")))
+    return partial_counter
+
+
+def count_texts(texts: list) -> Counter:
+    # a batch of texts (eg: csv rows or docx paragraphs) is counted in a single pass,
+    # joining them with a new line keeps the words of different texts apart
+    return count_words("\n".join(texts))
+
+
+def run_measured_task(task, *args) -> (Counter, float):
+    # returns the partial Counter of the task and its duration. the duration is measured by the worker, so it does
+    # not include the time the task waited for a free worker
+    start_time = time.perf_counter()
+    partial_counter = task(*args)
+    return partial_counter, time.perf_counter() - start_time
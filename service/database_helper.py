@@ -1,17 +1,22 @@
 import mysql.connector
 from mysql.connector import CMySQLConnection
+from mysql.connector.pooling import MySQLConnectionPool, PooledMySQLConnection
 
+from contextlib import contextmanager
 import configparser
+import threading
 
-from configurations.words_counter_configurations import WordsCounterConfigurations
+from service.storage_backend import StorageBackend
 
 
-class DatabaseHelper(WordsCounterConfigurations):
+class DatabaseHelper(StorageBackend):
 
     def __init__(self):
         super().__init__()
-        self.conn = None
-        self.cursor = None
+        self.pool = None
+        self.pool_semaphore = None
+        self.connections_in_use = 0
+        self.connections_lock = threading.Lock()
 
     def create_connection_to_mysql_server(self) -> (CMySQLConnection, str, str, str):
         db_config = configparser.ConfigParser()
@@ -59,25 +64,185 @@ class DatabaseHelper(WordsCounterConfigurations):
         query = f"SHOW TABLES LIKE '{table_name}'"
         cursor.execute(query)
         if not cursor.fetchone():
-            # create new table
+            # create new table, the top words are read in the order of the count index
             create_table_query = f"""CREATE TABLE {table_name} (
             word VARCHAR(255) NOT NULL PRIMARY KEY,
-            count INT NOT NULL)"""
+            count INT NOT NULL,
+            INDEX count_index (count DESC, word))"""
             cursor.execute(create_table_query)
             db_conn.commit()
-        self.conn = db_conn
-        self.cursor = cursor
+        else:
+            # tables that were created before the count index was added
+            cursor.execute(f"SHOW INDEX FROM {table_name} WHERE Key_name = 'count_index'")
+            if not cursor.fetchall():
+                cursor.execute(f"CREATE INDEX count_index ON {table_name} (count DESC, word)")
+                db_conn.commit()
+        cursor.close()
+
+    def create_connection_pool(self, host: str, user_name: str, password: str):
+        pool_size = self.config["database_helper"]["pool_size"]
+        self.pool = MySQLConnectionPool(
+            pool_name=self.config["database_helper"]["pool_name"],
+            pool_size=pool_size,
+            pool_reset_session=True,
+            host=host,
+            user=user_name,
+            password=password,
+            database=self.config["database_helper"]["database_name"]
+        )
+        # the pool raises an error when all of its connections are in use, callers wait for a free connection instead
+        self.pool_semaphore = threading.BoundedSemaphore(pool_size)
+
+    def setup_database(self):
+        server_conn, host, user_name, password = self.create_connection_to_mysql_server()
+        self.verify_database(server_conn)
+        server_conn.close()
+        db_conn = self.create_connection_to_database(host, user_name, password)
+        self.verify_table(db_conn)
+        db_conn.close()
+        self.create_connection_pool(host, user_name, password)
+
+    @contextmanager
+    def get_connection(self) -> PooledMySQLConnection:
+        # every operation takes its own connection from the pool (and its own cursor),
+        # so concurrent reads and writes never share a connection
+        pool_timeout = self.config["database_helper"]["pool_timeout_seconds"]
+        if not self.pool_semaphore.acquire(timeout=pool_timeout):
+            raise TimeoutError("No free database connection in the pool")
+        with self.connections_lock:
+            self.connections_in_use += 1
+        try:
+            conn = self.pool.get_connection()
+            try:
+                if self.config["database_helper"]["pool_health_check"] and not conn.is_connected():
+                    # the server closed the connection (eg: wait_timeout), a new one is opened in its place
+                    conn.reconnect(attempts=3, delay=1)
+                yield conn
+            finally:
+                # returning the connection to the pool
+                conn.close()
+        finally:
+            with self.connections_lock:
+                self.connections_in_use -= 1
+            self.pool_semaphore.release()
+
+    def get_num_of_connections_in_use(self) -> int:
+        return self.connections_in_use
 
     def update_database(self, words_counter_mapping: dict):
-        update_query = "INSERT INTO words_counter (word, count) VALUES (%s, %s) ON DUPLICATE KEY UPDATE count = count + VALUES(count)"
+        table_name = self.config['database_helper']['table_name']
+        update_query = f"INSERT INTO {table_name} (word, count) VALUES (%s, %s) " \
+                       f"ON DUPLICATE KEY UPDATE count = count + VALUES(count)"
         values = [(word, count) for word, count in words_counter_mapping.items()]
-        self.cursor.executemany(update_query, values)
-        self.conn.commit()
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.executemany(update_query, values)
+                conn.commit()
+            finally:
+                cursor.close()
+
+    def update_database_in_bulk(self, items: list):
+        # multi row upserts of (word, count) items, all of them are committed in a single transaction
+        table_name = self.config['database_helper']['table_name']
+        max_rows_per_statement = self.config['database_helper']['max_rows_per_statement']
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                for i in range(0, len(items), max_rows_per_statement):
+                    rows = items[i:i + max_rows_per_statement]
+                    placeholders = ", ".join(["(%s, %s)"] * len(rows))
+                    update_query = f"INSERT INTO {table_name} (word, count) VALUES {placeholders} " \
+                                   f"ON DUPLICATE KEY UPDATE count = count + VALUES(count)"
+                    cursor.execute(update_query, tuple(value for row in rows for value in row))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
 
     def get_count_from_db(self, word: str) -> int:
-        find_query = "SELECT * FROM words_counter WHERE word = %s"
-        self.cursor.execute(find_query, (word, ))
-        row = self.cursor.fetchone()
+        table_name = self.config['database_helper']['table_name']
+        find_query = f"SELECT count FROM {table_name} WHERE word = %s"
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(find_query, (word, ))
+                row = cursor.fetchone()
+            finally:
+                cursor.close()
         if row:
-            return row[1]
+            return row[0]
         return 0
+
+    def get_counts_from_db(self, words: list) -> dict:
+        # a single query for all the words, words that are not in db are not returned
+        if not words:
+            return {}
+        table_name = self.config['database_helper']['table_name']
+        placeholders = ", ".join(["%s"] * len(words))
+        find_query = f"SELECT word, count FROM {table_name} WHERE word IN ({placeholders})"
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(find_query, tuple(words))
+                rows = cursor.fetchall()
+            finally:
+                cursor.close()
+        return {word.lower(): count for word, count in rows}
+
+    def get_top_words(self, limit: int, offset: int = 0) -> list:
+        table_name = self.config['database_helper']['table_name']
+        find_query = f"SELECT word, count FROM {table_name} ORDER BY count DESC, word LIMIT %s OFFSET %s"
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(find_query, (limit, offset))
+                rows = cursor.fetchall()
+            finally:
+                cursor.close()
+        return [(word.lower(), count) for word, count in rows]
+
+    def get_words_by_prefix(self, prefix: str, limit: int, offset: int = 0) -> list:
+        # a prefix LIKE pattern is a range scan of the primary key
+        table_name = self.config['database_helper']['table_name']
+        find_query = f"SELECT word, count FROM {table_name} WHERE word LIKE %s ORDER BY word LIMIT %s OFFSET %s"
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(find_query, (f"{prefix}%", limit, offset))
+                rows = cursor.fetchall()
+            finally:
+                cursor.close()
+        return [(word.lower(), count) for word, count in rows]
+
+    def get_totals(self) -> tuple:
+        table_name = self.config['database_helper']['table_name']
+        find_query = f"SELECT COUNT(*), COALESCE(SUM(count), 0) FROM {table_name}"
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(find_query)
+                num_of_words, total_count = cursor.fetchone()
+            finally:
+                cursor.close()
+        return int(num_of_words), int(total_count)
+
+    def iter_all_counts(self, batch_size: int):
+        # keyset pagination on the primary key, a connection is taken from the pool only while a batch is read
+        table_name = self.config['database_helper']['table_name']
+        find_query = f"SELECT word, count FROM {table_name} WHERE word > %s ORDER BY word LIMIT %s"
+        last_word = ""
+        while True:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                try:
+                    cursor.execute(find_query, (last_word, batch_size))
+                    rows = cursor.fetchall()
+                finally:
+                    cursor.close()
+            if not rows:
+                return
+            last_word = rows[-1][0]
+            yield [(word.lower(), count) for word, count in rows]
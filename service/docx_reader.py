@@ -0,0 +1,40 @@
+from xml.etree.ElementTree import iterparse
+import zipfile
+
+DOCUMENT_PART_NAME = "word/document.xml"
+WORD_NAMESPACE = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+BODY_TAG = f"{WORD_NAMESPACE}body"
+PARAGRAPH_TAG = f"{WORD_NAMESPACE}p"
+RUN_TAG = f"{WORD_NAMESPACE}r"
+TEXT_TAG = f"{WORD_NAMESPACE}t"
+# the run elements that are translated to characters, as python-docx does
+RUN_CHARACTERS = {f"{WORD_NAMESPACE}tab": "\t", f"{WORD_NAMESPACE}br": "\n", f"{WORD_NAMESPACE}cr": "\n"}
+
+
+def iter_docx_paragraphs(file_path: str):
+    # yields the text of the paragraphs of the document body while the document xml is parsed, the document is never
+    # loaded as a whole. like python-docx Document.paragraphs: only the paragraphs that are direct children of the body
+    # and the runs that are direct children of a paragraph are read (eg: tables and hyperlinks are skipped)
+    with zipfile.ZipFile(file_path) as docx_file:
+        with docx_file.open(DOCUMENT_PART_NAME) as document_xml:
+            elements_stack = []
+            paragraph_text = []
+            for event, element in iterparse(document_xml, events=("start", "end")):
+                if event == "start":
+                    elements_stack.append(element)
+                    continue
+                elements_stack.pop()
+                depth = len(elements_stack)
+                # depth of the element is: document (0), body (1), paragraph (2), run (3), run content (4)
+                if depth == 4 and elements_stack[3].tag == RUN_TAG and elements_stack[2].tag == PARAGRAPH_TAG \
+                        and elements_stack[1].tag == BODY_TAG:
+                    if element.tag == TEXT_TAG:
+                        paragraph_text.append(element.text or "")
+                    elif element.tag in RUN_CHARACTERS:
+                        paragraph_text.append(RUN_CHARACTERS[element.tag])
+                elif depth == 2 and elements_stack[1].tag == BODY_TAG:
+                    if element.tag == PARAGRAPH_TAG:
+                        yield "".join(paragraph_text)
+                    paragraph_text = []
+                    # the parsed body elements are dropped, the memory does not grow with the document size
+                    elements_stack[1].remove(element)
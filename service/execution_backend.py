@@ -0,0 +1,109 @@
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.thread import ThreadPoolExecutor
+from collections import Counter
+import threading
+
+INLINE_BACKEND = "inline"
+THREAD_BACKEND = "thread"
+PROCESS_BACKEND = "process"
+
+
+def merge_counters(counters: list) -> Counter:
+    # merging the partial counters pairwise (tree reduction), the result does not depend on the workers timing
+    counters = list(counters)
+    if not counters:
+        return Counter()
+    while len(counters) > 1:
+        merged_counters = []
+        for i in range(0, len(counters) - 1, 2):
+            counters[i].update(counters[i + 1])
+            merged_counters.append(counters[i])
+        if len(counters) % 2:
+            merged_counters.append(counters[-1])
+        counters = merged_counters
+    return counters[0]
+
+
+class InlineExecutionBackend:
+    # runs every task in the calling thread, mostly useful for debugging and for small inputs
+
+    def __init__(self, num_of_workers: int):
+        self.num_of_workers = num_of_workers
+
+    @staticmethod
+    def submit(function, *args) -> Future:
+        future = Future()
+        try:
+            future.set_result(function(*args))
+        except Exception as ex:
+            future.set_exception(ex)
+        return future
+
+    @staticmethod
+    def get_num_of_pending_tasks() -> int:
+        return 0
+
+    def shutdown(self):
+        pass
+
+
+class PoolExecutionBackend:
+    executor_class = None
+
+    def __init__(self, num_of_workers: int):
+        self.num_of_workers = num_of_workers
+        self.executor = None
+        self.lock = threading.Lock()
+        self.pending_tasks = 0  # the submitted tasks that are not done yet
+        # the done callbacks run in the workers, they never wait for the lock of the executor
+        self.pending_tasks_lock = threading.Lock()
+
+    def get_executor(self):
+        # the pool is created on first use and reused by all the following calls
+        with self.lock:
+            if self.executor is None:
+                self.executor = self.executor_class(max_workers=self.num_of_workers)
+            return self.executor
+
+    def submit(self, function, *args) -> Future:
+        with self.pending_tasks_lock:
+            self.pending_tasks += 1
+        try:
+            future = self.get_executor().submit(function, *args)
+        except Exception:
+            self.task_done(None)
+            raise
+        future.add_done_callback(self.task_done)
+        return future
+
+    def task_done(self, future: Future or None):
+        with self.pending_tasks_lock:
+            self.pending_tasks -= 1
+
+    def get_num_of_pending_tasks(self) -> int:
+        return self.pending_tasks
+
+    def shutdown(self):
+        # the running tasks are waited for without the lock, their done callbacks may need it
+        with self.lock:
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+class ThreadExecutionBackend(PoolExecutionBackend):
+    executor_class = ThreadPoolExecutor
+
+
+class ProcessExecutionBackend(PoolExecutionBackend):
+    # tasks and their arguments must be picklable, each worker returns its own partial Counter
+    executor_class = ProcessPoolExecutor
+
+
+def create_execution_backend(backend_name: str, num_of_workers: int):
+    backends = {INLINE_BACKEND: InlineExecutionBackend,
+                THREAD_BACKEND: ThreadExecutionBackend,
+                PROCESS_BACKEND: ProcessExecutionBackend}
+    if backend_name not in backends:
+        raise ValueError(f"Unsupported execution backend: {backend_name}")
+    return backends[backend_name](num_of_workers)
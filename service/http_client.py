@@ -0,0 +1,45 @@
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+import threading
+
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import requests
+
+# server side errors that are worth another try
+RETRY_STATUS_CODES = [429, 500, 502, 503, 504]
+
+
+def create_http_session(http_client_config: dict) -> requests.Session:
+    # a session keeps its connections alive and reuses them between requests to the same host. failed requests are
+    # retried with an exponential backoff, the last response is returned when all the retries failed
+    retry = Retry(total=http_client_config["max_retries"], backoff_factor=http_client_config["backoff_factor"],
+                  status_forcelist=RETRY_STATUS_CODES, allowed_methods=["GET"], raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=http_client_config["pool_connections"],
+                          pool_maxsize=http_client_config["pool_maxsize"], max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class HostConnectionsLimiter:
+    # limits the number of concurrent downloads from the same host, so a batch of URLs of a single site
+    # does not open more connections than the site (and the connections pool) can serve
+
+    def __init__(self, max_connections_per_host: int):
+        self.max_connections_per_host = max_connections_per_host
+        self.hosts_semaphores = {}
+        self.lock = threading.Lock()
+
+    def get_host_semaphore(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc.lower()
+        with self.lock:
+            if host not in self.hosts_semaphores:
+                self.hosts_semaphores[host] = threading.BoundedSemaphore(self.max_connections_per_host)
+            return self.hosts_semaphores[host]
+
+    @contextmanager
+    def limit(self, url: str):
+        with self.get_host_semaphore(url):
+            yield
@@ -0,0 +1,120 @@
+from collections import Counter, OrderedDict
+from json import dumps, loads
+import hashlib
+import os
+import threading
+
+FILE_READ_SIZE = 1048576
+
+
+class IngestCache:
+    # a bounded LRU cache on disk of the words counts of the inputs that were already ingested, a repeated input is
+    # not read and counted again. each entry is a file: its first line is the entry validators (eg: an ETag of a URL),
+    # and its second line is the words counts. the entries that were used least recently are evicted first
+
+    def __init__(self, directory: str, max_entries: int, max_size_bytes: int):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_size_bytes = max_size_bytes
+        self.lock = threading.Lock()
+        self.entries_sizes = OrderedDict()  # entry file name -> size in bytes, the least recently used first
+        self.size_bytes = 0
+        os.makedirs(directory, exist_ok=True)
+        self.load_entries()
+
+    @staticmethod
+    def get_file_key(file_path: str, use_content_hash: bool) -> str:
+        # a file is identified by its content, or by its path, size and modification time (without reading it)
+        if use_content_hash:
+            content_hash = hashlib.sha256()
+            with open(file_path, "rb") as file:
+                for data in iter(lambda: file.read(FILE_READ_SIZE), b""):
+                    content_hash.update(data)
+            return f"file content:{content_hash.hexdigest()}"
+        file_stat = os.stat(file_path)
+        return f"file:{os.path.abspath(file_path)}:{file_stat.st_size}:{file_stat.st_mtime_ns}"
+
+    @staticmethod
+    def get_url_key(url: str) -> str:
+        return f"url:{url}"
+
+    @staticmethod
+    def get_entry_name(key: str) -> str:
+        return f"{hashlib.sha256(key.encode('utf-8')).hexdigest()}.counts"
+
+    def load_entries(self):
+        # the entries of the previous runs, ordered by their last use
+        entries = []
+        for entry_name in os.listdir(self.directory):
+            if entry_name.endswith(".counts"):
+                entry_stat = os.stat(os.path.join(self.directory, entry_name))
+                entries.append((entry_stat.st_mtime_ns, entry_name, entry_stat.st_size))
+        with self.lock:
+            for _, entry_name, entry_size in sorted(entries):
+                self.entries_sizes[entry_name] = entry_size
+                self.size_bytes += entry_size
+            self.evict_entries()
+
+    def get_validators(self, key: str) -> dict or None:
+        # returns the validators of the entry, or None when the key is not cached
+        entry_path = self.use_entry(key)
+        if not entry_path:
+            return None
+        try:
+            with open(entry_path, "r", encoding="utf-8") as entry_file:
+                return loads(entry_file.readline())
+        except FileNotFoundError:
+            # the entry was evicted by another ingest
+            return None
+
+    def get_counter(self, key: str) -> Counter or None:
+        entry_path = self.use_entry(key)
+        if not entry_path:
+            return None
+        try:
+            with open(entry_path, "r", encoding="utf-8") as entry_file:
+                entry_file.readline()
+                return Counter(loads(entry_file.readline()))
+        except FileNotFoundError:
+            return None
+
+    def use_entry(self, key: str) -> str or None:
+        entry_name = self.get_entry_name(key)
+        with self.lock:
+            if entry_name not in self.entries_sizes:
+                return None
+            self.entries_sizes.move_to_end(entry_name)
+        entry_path = os.path.join(self.directory, entry_name)
+        try:
+            # the modification time keeps the order of use between runs
+            os.utime(entry_path)
+        except FileNotFoundError:
+            return None
+        return entry_path
+
+    def set(self, key: str, counter: Counter, validators: dict = None):
+        entry_name = self.get_entry_name(key)
+        entry_path = os.path.join(self.directory, entry_name)
+        # the entry is written to a temporary file and then renamed, a reader never sees a partial entry
+        temp_entry_path = f"{entry_path}.{threading.get_ident()}.tmp"
+        with open(temp_entry_path, "w", encoding="utf-8") as entry_file:
+            entry_file.write(dumps(validators or {}))
+            entry_file.write("\n")
+            entry_file.write(dumps(counter))
+        entry_size = os.path.getsize(temp_entry_path)
+        os.replace(temp_entry_path, entry_path)
+        with self.lock:
+            self.size_bytes += entry_size - self.entries_sizes.pop(entry_name, 0)
+            self.entries_sizes[entry_name] = entry_size
+            self.evict_entries()
+
+    def evict_entries(self):
+        # the lock must be held by the caller
+        while self.entries_sizes and (len(self.entries_sizes) > self.max_entries or
+                                      self.size_bytes > self.max_size_bytes):
+            entry_name, entry_size = self.entries_sizes.popitem(last=False)
+            self.size_bytes -= entry_size
+            try:
+                os.remove(os.path.join(self.directory, entry_name))
+            except FileNotFoundError:
+                pass
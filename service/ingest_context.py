@@ -0,0 +1,60 @@
+from collections import Counter
+import threading
+
+from monitoring.metrics import COUNTED_WORDS, PROCESSED_BYTES
+
+
+class IngestContext:
+    # the state of a single ingest: its own words counter and its progress.
+    # every ingest gets a new context, so concurrent ingests never mix or clear each other counts
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counter = Counter()
+        self.bytes_processed = 0
+        self.words_counted = 0
+        self.db_chunks_committed = 0
+        self.failed_tasks = 0  # the tasks whose words were not counted
+        # (cache key, counter, validators) of the ingested inputs, they are cached once their counts were recorded
+        self.ingested_cache_entries = []
+
+    def add_processed_bytes(self, num_of_bytes: int):
+        with self.lock:
+            self.bytes_processed += num_of_bytes
+        PROCESSED_BYTES.inc(num_of_bytes)
+
+    def add_counted_words(self, num_of_words: int):
+        with self.lock:
+            self.words_counted += num_of_words
+        COUNTED_WORDS.inc(num_of_words)
+
+    def merge_counter(self, counter: Counter):
+        with self.lock:
+            self.counter.update(counter)
+
+    def merge_context(self, context: "IngestContext"):
+        # adds the counts and the progress of another ingest (eg: of a single input of a batch), the processed bytes
+        # and words metrics were already increased by the other ingest
+        with self.lock:
+            self.counter.update(context.counter)
+            self.bytes_processed += context.bytes_processed
+            self.words_counted += context.words_counted
+            self.failed_tasks += context.failed_tasks
+            self.ingested_cache_entries.extend(context.ingested_cache_entries)
+
+    def add_failed_task(self):
+        with self.lock:
+            self.failed_tasks += 1
+
+    def add_ingested_cache_entry(self, cache_key: str, counter: Counter, validators: dict or None):
+        with self.lock:
+            self.ingested_cache_entries.append((cache_key, counter, validators))
+
+    def add_committed_db_chunk(self):
+        with self.lock:
+            self.db_chunks_committed += 1
+
+    def get_progress(self) -> dict:
+        with self.lock:
+            return {"bytes_processed": self.bytes_processed, "words_counted": self.words_counted,
+                    "db_chunks_committed": self.db_chunks_committed}
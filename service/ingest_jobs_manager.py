@@ -0,0 +1,106 @@
+from fastapi import HTTPException
+
+from collections import OrderedDict
+import queue
+import threading
+import uuid
+
+from logging import Logger
+from configurations.words_counter_configurations import WordsCounterConfigurations
+from service.ingest_context import IngestContext
+
+QUEUED_STATE = "queued"
+RUNNING_STATE = "running"
+DONE_STATE = "done"
+FAILED_STATE = "failed"
+
+
+class IngestJob:
+
+    def __init__(self, received_input: str):
+        self.job_id = uuid.uuid4().hex
+        self.received_input = received_input
+        self.context = IngestContext()
+        self.state = QUEUED_STATE
+        self.status = None
+        self.error = None
+
+    def to_dict(self) -> dict:
+        job_details = {"job_id": self.job_id, "state": self.state, "status": self.status, "error": self.error}
+        job_details.update(self.context.get_progress())
+        return job_details
+
+
+class IngestJobsManager(WordsCounterConfigurations):
+    # ingests that are submitted as jobs wait in a bounded queue and are processed by a pool of worker threads
+
+    def __init__(self, logger: Logger, ingest_function):
+        super().__init__()
+        self.logger = logger
+        self.ingest_function = ingest_function
+        self.jobs_queue = queue.Queue(maxsize=self.config["ingest_jobs"]["max_queued_jobs"])
+        self.jobs = OrderedDict()
+        self.jobs_lock = threading.Lock()
+        self.workers = []
+
+    def start(self):
+        for _ in range(self.config["ingest_jobs"]["num_of_workers"]):
+            worker = threading.Thread(target=self.run_jobs, daemon=True)
+            worker.start()
+            self.workers.append(worker)
+
+    def stop(self):
+        for _ in self.workers:
+            self.jobs_queue.put(None)
+        for worker in self.workers:
+            worker.join()
+        self.workers = []
+
+    def submit(self, received_input: str) -> IngestJob:
+        # raises queue.Full when there are too many jobs waiting
+        job = IngestJob(received_input)
+        with self.jobs_lock:
+            self.forget_finished_jobs()
+            self.jobs[job.job_id] = job
+        try:
+            self.jobs_queue.put_nowait(job)
+        except queue.Full:
+            with self.jobs_lock:
+                del self.jobs[job.job_id]
+            raise
+        return job
+
+    def get_job(self, job_id: str) -> IngestJob or None:
+        with self.jobs_lock:
+            return self.jobs.get(job_id)
+
+    def forget_finished_jobs(self):
+        # only the latest finished jobs are kept, the oldest ones are removed first
+        max_finished_jobs = self.config["ingest_jobs"]["max_finished_jobs"]
+        finished_jobs_ids = [job_id for job_id, job in self.jobs.items() if job.state in [DONE_STATE, FAILED_STATE]]
+        for job_id in finished_jobs_ids[:max(len(finished_jobs_ids) - max_finished_jobs, 0)]:
+            del self.jobs[job_id]
+
+    def run_jobs(self):
+        while True:
+            job = self.jobs_queue.get()
+            if job is None:
+                break
+            job.state = RUNNING_STATE
+            try:
+                job.status = self.ingest_function(job.received_input, job.context)
+                job.state = DONE_STATE
+            except HTTPException as ex:
+                job.error = ex.detail
+                job.state = FAILED_STATE
+            except Exception as ex:
+                extra_msg = f"job id is: {job.job_id}, the exception is: {str(ex)}, " \
+                            f"the exception_type is: {type(ex).__name__}"
+                self.logger.critical("an unexpected error occurred while trying to run an ingest job",
+                                     extra={"extra": extra_msg})
+                job.error = extra_msg
+                job.state = FAILED_STATE
+            finally:
+                # the input is not needed anymore, it may be a large text
+                job.received_input = None
+                self.jobs_queue.task_done()
@@ -0,0 +1,51 @@
+import heapq
+import threading
+
+from service.storage_backend import StorageBackend
+
+
+class MemoryDatabaseHelper(StorageBackend):
+    # a non durable store in the process memory, the counts are lost when the service stops
+
+    def __init__(self):
+        super().__init__()
+        self.words_counts = {}
+        self.lock = threading.Lock()
+
+    def setup_database(self):
+        pass
+
+    def update_database(self, words_counter_mapping: dict):
+        self.update_database_in_bulk(list(words_counter_mapping.items()))
+
+    def update_database_in_bulk(self, items: list):
+        with self.lock:
+            for word, count in items:
+                self.words_counts[word] = self.words_counts.get(word, 0) + count
+
+    def get_count_from_db(self, word: str) -> int:
+        return self.words_counts.get(word, 0)
+
+    def get_counts_from_db(self, words: list) -> dict:
+        return {word: self.words_counts[word] for word in words if word in self.words_counts}
+
+    def get_top_words(self, limit: int, offset: int = 0) -> list:
+        with self.lock:
+            top_items = heapq.nsmallest(offset + limit, self.words_counts.items(),
+                                        key=lambda item: (-item[1], item[0]))
+        return top_items[offset:]
+
+    def get_words_by_prefix(self, prefix: str, limit: int, offset: int = 0) -> list:
+        with self.lock:
+            matching_items = sorted(item for item in self.words_counts.items() if item[0].startswith(prefix))
+        return matching_items[offset:offset + limit]
+
+    def get_totals(self) -> tuple:
+        with self.lock:
+            return len(self.words_counts), sum(self.words_counts.values())
+
+    def iter_all_counts(self, batch_size: int):
+        with self.lock:
+            items = list(self.words_counts.items())
+        for i in range(0, len(items), batch_size):
+            yield items[i:i + batch_size]
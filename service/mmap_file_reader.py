@@ -0,0 +1,88 @@
+from contextlib import contextmanager
+import mmap
+import os
+import re
+
+# chunks are split only on single byte whitespaces, in utf-8 these bytes are never a part of a multi byte character,
+# so a boundary never cuts a word or a character in half
+WHITESPACE_BYTE_PATTERN = re.compile(rb'[ \t\n\r\x0b\x0c\x1c-\x1f]')
+WHITESPACE_SEARCH_WINDOW_SIZE = 4096
+RELEASE_ALIGNMENT = 2 * 1024 * 1024
+
+
+@contextmanager
+def map_file(file_path: str):
+    with open(file_path, "rb") as file:
+        mapped_file = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield file.fileno(), mapped_file
+        finally:
+            mapped_file.close()
+
+
+def find_next_whitespace(file_descriptor: int, position: int, end: int) -> int:
+    # the boundaries are searched with small reads and not through the mapping,
+    # touching the mapping would map all the pages around the boundaries into the process memory
+    while position < end:
+        window = os.pread(file_descriptor, min(WHITESPACE_SEARCH_WINDOW_SIZE, end - position), position)
+        if not window:
+            break
+        whitespace_match = WHITESPACE_BYTE_PATTERN.search(window)
+        if whitespace_match:
+            return position + whitespace_match.start()
+        position += len(window)
+    return end
+
+
+def find_chunks_boundaries(file_descriptor: int, start: int, end: int, chunk_size: int) -> list:
+    # splitting [start, end) into chunks of about chunk_size bytes, each boundary is moved to the next whitespace
+    chunk_size = max(chunk_size, 1)
+    boundaries = []
+    chunk_start = start
+    while chunk_start < end:
+        chunk_end = chunk_start + chunk_size
+        if chunk_end >= end:
+            chunk_end = end
+        else:
+            chunk_end = find_next_whitespace(file_descriptor, chunk_end, end)
+        boundaries.append((chunk_start, chunk_end))
+        chunk_start = chunk_end
+    return boundaries
+
+
+def split_file_to_chunks(file_path: str, chunk_size: int) -> list:
+    with open(file_path, "rb") as file:
+        return find_chunks_boundaries(file.fileno(), 0, os.fstat(file.fileno()).st_size, chunk_size)
+
+
+def release_pages(mapped_file, start: int, end: int) -> int:
+    # the pages that were already processed are dropped from the process memory (they are still cached by the OS).
+    # the released range is aligned to huge pages, the kernel may map file pages in huge pages and would keep
+    # a partially released huge page mapped. returns the offset the range was released up to
+    if not hasattr(mmap, "MADV_DONTNEED"):
+        return start
+    aligned_start = start - start % mmap.PAGESIZE
+    aligned_end = end if end == len(mapped_file) else end - end % RELEASE_ALIGNMENT
+    if aligned_end <= aligned_start:
+        return start
+    mapped_file.madvise(mmap.MADV_DONTNEED, aligned_start, aligned_end - aligned_start)
+    return aligned_end
+
+
+def iter_file_range(file_path: str, start: int, end: int, read_size: int):
+    # yields zero copy memoryviews of the file range, every view ends on a whitespace
+    with map_file(file_path) as (file_descriptor, mapped_file):
+        if hasattr(mmap, "MADV_SEQUENTIAL"):
+            mapped_file.madvise(mmap.MADV_SEQUENTIAL)
+        file_view = memoryview(mapped_file)
+        released_until = start
+        try:
+            for view_start, view_end in find_chunks_boundaries(file_descriptor, start, end, read_size):
+                view = file_view[view_start:view_end]
+                try:
+                    yield view
+                finally:
+                    view.release()
+                released_until = release_pages(mapped_file, released_until, view_end)
+        finally:
+            file_view.release()
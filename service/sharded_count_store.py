@@ -0,0 +1,156 @@
+from array import array
+import mmap
+import os
+import struct
+import threading
+
+from logging import Logger
+from configurations.words_counter_configurations import WordsCounterConfigurations
+from service.storage_backend import StorageBackend
+from service.words_index import WordsIndex
+
+# snapshot file layout: header, counts (array of unsigned 64 bit), words (utf-8, sorted, separated by new lines)
+SNAPSHOT_MAGIC = b"WCSNAP01"
+SNAPSHOT_HEADER = struct.Struct("<8sQQQ")  # magic, number of words, total count, words size in bytes
+
+
+class ShardedCountStore(WordsCounterConfigurations):
+    # all the stored words counts in the process memory, the reads never go to db.
+    # words are spread between shards by their hash, each shard has its own lock so writers of different shards never
+    # wait for each other. db stays the durable store, this store is loaded from db (or from a snapshot) on startup
+
+    def __init__(self, logger: Logger, database_helper: StorageBackend):
+        super().__init__()
+        self.logger = logger
+        self.database_helper = database_helper
+        self.num_of_shards = self.config["count_store"]["num_of_shards"]
+        self.shards = [{} for _ in range(self.num_of_shards)]
+        self.shards_locks = [threading.Lock() for _ in range(self.num_of_shards)]
+        self.words_index = WordsIndex(self.config["words_index"]["top_words_capacity"],
+                                      self.config["words_index"]["prefix_merge_threshold"])
+        self.stop_event = threading.Event()
+        self.snapshot_thread = None
+
+    def get_shard_index(self, word: str) -> int:
+        return hash(word) % self.num_of_shards
+
+    def add_counts(self, words_counter_mapping: dict):
+        updated_items, new_words = self.add_counts_to_shards(words_counter_mapping)
+        # the index is updated with the total counts of the words, after the shards locks are released
+        self.words_index.update(updated_items, new_words)
+
+    def add_counts_to_shards(self, words_counter_mapping: dict) -> (list, list):
+        # returns the total counts of the updated words and the words that were not stored before
+        words_by_shard = {}
+        for word, count in words_counter_mapping.items():
+            words_by_shard.setdefault(self.get_shard_index(word), []).append((word, count))
+        updated_items, new_words = [], []
+        for shard_index, items in words_by_shard.items():
+            shard = self.shards[shard_index]
+            with self.shards_locks[shard_index]:
+                for word, count in items:
+                    stored_count = shard.get(word)
+                    if stored_count is None:
+                        new_words.append(word)
+                        stored_count = 0
+                    shard[word] = stored_count + count
+                    updated_items.append((word, stored_count + count))
+        return updated_items, new_words
+
+    def get_count(self, word: str) -> int:
+        return self.shards[self.get_shard_index(word)].get(word, 0)
+
+    def get_counts(self, words: list) -> dict:
+        return {word: self.get_count(word) for word in words}
+
+    def get_num_of_words(self) -> int:
+        return sum(len(shard) for shard in self.shards)
+
+    def copy_shards(self) -> list:
+        shards_copies = []
+        for shard, shard_lock in zip(self.shards, self.shards_locks):
+            with shard_lock:
+                shards_copies.append(shard.copy())
+        return shards_copies
+
+    def get_top_words(self, limit: int, offset: int) -> list or None:
+        return self.words_index.get_top_words(limit, offset)
+
+    def get_words_by_prefix(self, prefix: str, limit: int, offset: int) -> list:
+        return [(word, self.get_count(word)) for word in self.words_index.get_words_by_prefix(prefix, limit, offset)]
+
+    def load(self):
+        self.load_counts()
+        # the index is built once all the counts were loaded
+        self.words_index.build([item for shard in self.copy_shards() for item in shard.items()])
+
+    def load_counts(self):
+        # the snapshot is used only when it matches db: the counts only grow, so any update that was recorded
+        # in db after the snapshot was taken changes the total count
+        num_of_words, total_count = self.database_helper.get_totals()
+        snapshot_path = self.config["count_store"]["snapshot_path"]
+        if os.path.isfile(snapshot_path) and self.load_snapshot(snapshot_path, num_of_words, total_count):
+            extra_msg = f"snapshot path is: {snapshot_path}, number of words is: {num_of_words}"
+            self.logger.info("the count store was loaded from a snapshot", extra={"extra": extra_msg})
+            return
+        load_batch_size = self.config["count_store"]["load_batch_size"]
+        for items in self.database_helper.iter_all_counts(load_batch_size):
+            self.add_counts_to_shards(dict(items))
+        extra_msg = f"number of words is: {self.get_num_of_words()}"
+        self.logger.info("the count store was loaded from db", extra={"extra": extra_msg})
+
+    def load_snapshot(self, snapshot_path: str, num_of_words: int, total_count: int) -> bool:
+        with open(snapshot_path, "rb") as snapshot_file:
+            with mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_snapshot:
+                if len(mapped_snapshot) < SNAPSHOT_HEADER.size:
+                    return False
+                magic, snapshot_num_of_words, snapshot_total_count, words_size = \
+                    SNAPSHOT_HEADER.unpack_from(mapped_snapshot)
+                if magic != SNAPSHOT_MAGIC or (snapshot_num_of_words, snapshot_total_count) != (num_of_words,
+                                                                                                total_count):
+                    return False
+                counts_start = SNAPSHOT_HEADER.size
+                words_start = counts_start + num_of_words * 8
+                counts = array("Q", mapped_snapshot[counts_start:words_start])
+                words = mapped_snapshot[words_start:words_start + words_size].decode("utf-8").split("\n") \
+                    if num_of_words else []
+        self.add_counts_to_shards(dict(zip(words, counts)))
+        return True
+
+    def save_snapshot(self):
+        # a compact snapshot: the sorted words and their counts, written to a temporary file and then renamed,
+        # so a crash while writing never leaves a broken snapshot
+        snapshot_path = self.config["count_store"]["snapshot_path"]
+        items = sorted(item for shard in self.copy_shards() for item in shard.items())
+        words_blob = "\n".join(word for word, _ in items).encode("utf-8")
+        counts = array("Q", (count for _, count in items))
+        temp_snapshot_path = f"{snapshot_path}.tmp"
+        with open(temp_snapshot_path, "wb") as snapshot_file:
+            snapshot_file.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, len(items), sum(counts), len(words_blob)))
+            counts.tofile(snapshot_file)
+            snapshot_file.write(words_blob)
+            snapshot_file.flush()
+            os.fsync(snapshot_file.fileno())
+        os.replace(temp_snapshot_path, snapshot_path)
+
+    def start(self):
+        self.snapshot_thread = threading.Thread(target=self.run_periodic_snapshot, daemon=True)
+        self.snapshot_thread.start()
+
+    def stop(self):
+        # the last snapshot is taken after all the counts were recorded in db, so it matches db on the next startup
+        self.stop_event.set()
+        if self.snapshot_thread:
+            self.snapshot_thread.join()
+            self.snapshot_thread = None
+        self.save_snapshot()
+
+    def run_periodic_snapshot(self):
+        snapshot_interval = self.config["count_store"]["snapshot_interval_seconds"]
+        while not self.stop_event.wait(snapshot_interval):
+            try:
+                self.save_snapshot()
+            except Exception as ex:
+                extra_msg = f"the exception is: {str(ex)}, the exception_type is: {type(ex).__name__}"
+                self.logger.error("an error occurred while trying to save a count store snapshot",
+                                  extra={"extra": extra_msg})
@@ -0,0 +1,105 @@
+from contextlib import contextmanager
+import sqlite3
+import threading
+
+from service.storage_backend import StorageBackend
+
+# sqlite limits the number of variables in a single statement
+MAX_VARIABLES_PER_STATEMENT = 900
+
+
+class SQLiteDatabaseHelper(StorageBackend):
+    # an embedded store in a local file, in WAL mode readers are never blocked by the writer.
+    # every thread uses its own connection, the writes are serialized by a lock
+
+    def __init__(self):
+        super().__init__()
+        self.local = threading.local()
+        self.write_lock = threading.Lock()
+
+    def get_connection(self) -> sqlite3.Connection:
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.config["database_helper"]["sqlite_path"],
+                                   timeout=self.config["database_helper"]["pool_timeout_seconds"])
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    @contextmanager
+    def write_transaction(self):
+        with self.write_lock:
+            conn = self.get_connection()
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+    def setup_database(self):
+        table_name = self.config['database_helper']['table_name']
+        conn = self.get_connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"""CREATE TABLE IF NOT EXISTS {table_name} (
+            word TEXT NOT NULL PRIMARY KEY COLLATE NOCASE,
+            count INTEGER NOT NULL) WITHOUT ROWID""")
+        # the top words are read in the order of this index
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {table_name}_count_index ON {table_name} (count DESC, word)")
+        conn.commit()
+
+    def update_database(self, words_counter_mapping: dict):
+        self.update_database_in_bulk(list(words_counter_mapping.items()))
+
+    def update_database_in_bulk(self, items: list):
+        table_name = self.config['database_helper']['table_name']
+        update_query = f"INSERT INTO {table_name} (word, count) VALUES (?, ?) " \
+                       f"ON CONFLICT(word) DO UPDATE SET count = count + excluded.count"
+        with self.write_transaction() as conn:
+            conn.executemany(update_query, items)
+
+    def get_count_from_db(self, word: str) -> int:
+        table_name = self.config['database_helper']['table_name']
+        row = self.get_connection().execute(f"SELECT count FROM {table_name} WHERE word = ?", (word, )).fetchone()
+        if row:
+            return row[0]
+        return 0
+
+    def get_counts_from_db(self, words: list) -> dict:
+        table_name = self.config['database_helper']['table_name']
+        conn = self.get_connection()
+        words_counts = {}
+        for i in range(0, len(words), MAX_VARIABLES_PER_STATEMENT):
+            chunk = words[i:i + MAX_VARIABLES_PER_STATEMENT]
+            placeholders = ", ".join(["?"] * len(chunk))
+            find_query = f"SELECT word, count FROM {table_name} WHERE word IN ({placeholders})"
+            words_counts.update((word.lower(), count) for word, count in conn.execute(find_query, chunk))
+        return words_counts
+
+    def get_top_words(self, limit: int, offset: int = 0) -> list:
+        table_name = self.config['database_helper']['table_name']
+        find_query = f"SELECT word, count FROM {table_name} ORDER BY count DESC, word LIMIT ? OFFSET ?"
+        return self.get_connection().execute(find_query, (limit, offset)).fetchall()
+
+    def get_words_by_prefix(self, prefix: str, limit: int, offset: int = 0) -> list:
+        # the word column is case insensitive, so LIKE uses its primary key index
+        table_name = self.config['database_helper']['table_name']
+        find_query = f"SELECT word, count FROM {table_name} WHERE word LIKE ? ORDER BY word LIMIT ? OFFSET ?"
+        return self.get_connection().execute(find_query, (f"{prefix}%", limit, offset)).fetchall()
+
+    def get_totals(self) -> tuple:
+        table_name = self.config['database_helper']['table_name']
+        find_query = f"SELECT COUNT(*), COALESCE(SUM(count), 0) FROM {table_name}"
+        return tuple(self.get_connection().execute(find_query).fetchone())
+
+    def iter_all_counts(self, batch_size: int):
+        table_name = self.config['database_helper']['table_name']
+        cursor = self.get_connection().execute(f"SELECT word, count FROM {table_name}")
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                yield rows
+        finally:
+            cursor.close()
@@ -0,0 +1,72 @@
+from abc import ABC, abstractmethod
+
+from configurations.words_counter_configurations import WordsCounterConfigurations
+
+MYSQL_BACKEND = "mysql"
+SQLITE_BACKEND = "sqlite"
+MEMORY_BACKEND = "memory"
+
+
+class StorageBackend(WordsCounterConfigurations, ABC):
+    # the store of the words counts. words are stored in lower case, all the counts updates are increments
+
+    @abstractmethod
+    def setup_database(self):
+        pass
+
+    @abstractmethod
+    def update_database(self, words_counter_mapping: dict):
+        pass
+
+    @abstractmethod
+    def update_database_in_bulk(self, items: list):
+        # items is a list of (word, count), all of them are committed together
+        pass
+
+    @abstractmethod
+    def get_count_from_db(self, word: str) -> int:
+        pass
+
+    @abstractmethod
+    def get_counts_from_db(self, words: list) -> dict:
+        # words that are not stored are not returned
+        pass
+
+    @abstractmethod
+    def get_top_words(self, limit: int, offset: int = 0) -> list:
+        # returns a list of (word, count) of the most common words, sorted by count (descending) and word
+        pass
+
+    @abstractmethod
+    def get_words_by_prefix(self, prefix: str, limit: int, offset: int = 0) -> list:
+        # returns a list of (word, count) of the words that start with prefix, sorted by word
+        pass
+
+    @abstractmethod
+    def get_totals(self) -> tuple:
+        # returns (number of words, total count)
+        pass
+
+    @abstractmethod
+    def iter_all_counts(self, batch_size: int):
+        # yields lists of (word, count) of up to batch_size items, until all the stored words were returned
+        pass
+
+    def get_num_of_connections_in_use(self) -> int:
+        # backends without a connections pool never wait for a connection
+        return 0
+
+
+def create_database_helper(config: dict) -> StorageBackend:
+    backend_name = config["database_helper"]["backend"]
+    # each backend is imported only when it is used, so its driver is needed only if it is configured
+    if backend_name == MYSQL_BACKEND:
+        from service.database_helper import DatabaseHelper
+        return DatabaseHelper()
+    if backend_name == SQLITE_BACKEND:
+        from service.sqlite_database_helper import SQLiteDatabaseHelper
+        return SQLiteDatabaseHelper()
+    if backend_name == MEMORY_BACKEND:
+        from service.memory_database_helper import MemoryDatabaseHelper
+        return MemoryDatabaseHelper()
+    raise ValueError(f"Unsupported storage backend: {backend_name}")
@@ -0,0 +1,83 @@
+from collections import Counter
+from html.parser import HTMLParser
+import codecs
+
+from service.words_tokenizer import count_words
+
+# tags that only format the text inside a line, the text around them belongs to the same word
+INLINE_TAGS = {"a", "abbr", "b", "bdi", "bdo", "cite", "code", "data", "dfn", "em", "font", "i", "kbd", "mark", "q",
+               "s", "samp", "small", "span", "strong", "sub", "sup", "time", "u", "var"}
+# tags whose content is not a part of the page text
+IGNORED_CONTENT_TAGS = {"script", "style", "template", "noscript"}
+
+
+def split_unfinished_word(text: str) -> (str, str):
+    # returns the text up to its last whitespace, and the word that may continue in the next piece of the text
+    last_word_start = len(text)
+    while last_word_start and not text[last_word_start - 1].isspace():
+        last_word_start -= 1
+    return text[:last_word_start], text[last_word_start:]
+
+
+def iter_complete_texts(chunks, encoding: str = "utf-8"):
+    # decodes chunks of bytes and yields texts that end between words, so every text can be counted on its own
+    decoder = codecs.getincrementaldecoder(encoding)(errors="ignore")
+    unfinished_word = ""
+    for chunk in chunks:
+        text, unfinished_word = split_unfinished_word(unfinished_word + decoder.decode(chunk))
+        if text:
+            yield text
+    unfinished_word += decoder.decode(b"", final=True)
+    if unfinished_word:
+        yield unfinished_word
+
+
+class StreamingWordsCounter:
+    # counts the words of a text that arrives in pieces, a word that is cut at the end of a piece is kept
+    # until the next piece arrives, so only the last (unfinished) word is held in memory
+
+    def __init__(self):
+        self.counter = Counter()
+        self.remainder = ""
+
+    def feed(self, text: str):
+        if not text:
+            return
+        text, self.remainder = split_unfinished_word(self.remainder + text)
+        self.counter.update(count_words(text))
+
+    def close(self) -> Counter:
+        self.counter.update(count_words(self.remainder))
+        self.remainder = ""
+        return self.counter
+
+
+class HtmlTextExtractor(HTMLParser):
+    # an incremental html parser, it can be fed with any piece of the page (even in the middle of a tag)
+    # and collects only the text of the page, html tags, attributes, scripts and styles are ignored
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.text_pieces = []
+        self.ignored_content_depth = 0
+
+    def handle_starttag(self, tag: str, attrs: list):
+        if tag in IGNORED_CONTENT_TAGS:
+            self.ignored_content_depth += 1
+        if tag not in INLINE_TAGS:
+            self.text_pieces.append(" ")
+
+    def handle_endtag(self, tag: str):
+        if tag in IGNORED_CONTENT_TAGS and self.ignored_content_depth:
+            self.ignored_content_depth -= 1
+        if tag not in INLINE_TAGS:
+            self.text_pieces.append(" ")
+
+    def handle_data(self, data: str):
+        if not self.ignored_content_depth:
+            self.text_pieces.append(data)
+
+    def pop_text(self) -> str:
+        text = "".join(self.text_pieces)
+        self.text_pieces = []
+        return text
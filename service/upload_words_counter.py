@@ -0,0 +1,131 @@
+from collections import Counter
+from email.message import Message
+import codecs
+
+from service.compressed_stream import get_content_encoding, StreamDecompressor
+from service.streaming_words_counter import StreamingWordsCounter
+
+try:
+    from multipart.multipart import MultipartParser
+except ImportError:  # python-multipart is needed only for multipart uploads
+    MultipartParser = None
+
+TEXT_CONTENT_TYPES = {"text/plain", "application/octet-stream"}
+MULTIPART_CONTENT_TYPE = "multipart/form-data"
+DEFAULT_ENCODING = "utf-8"
+
+
+def get_encoding(charset: str or None) -> str:
+    if charset:
+        try:
+            return codecs.lookup(charset).name
+        except LookupError:
+            pass
+    return DEFAULT_ENCODING
+
+
+class TextUploadWordsCounter:
+    # counts the words of a text that arrives in chunks of bytes, the bytes of a character that is cut between
+    # chunks are completed by the next chunk
+
+    def __init__(self, encoding: str = DEFAULT_ENCODING):
+        self.decoder = codecs.getincrementaldecoder(encoding)(errors="ignore")
+        self.streaming_words_counter = StreamingWordsCounter()
+
+    def feed(self, data: bytes):
+        self.streaming_words_counter.feed(self.decoder.decode(data))
+
+    def close(self) -> Counter:
+        self.streaming_words_counter.feed(self.decoder.decode(b"", final=True))
+        return self.streaming_words_counter.close()
+
+
+class MultipartUploadWordsCounter:
+    # counts the words of all the parts of a multipart body (uploaded files and form fields) while it is parsed,
+    # every part is counted separately and decoded by the charset of its own Content-Type
+
+    def __init__(self, boundary: str):
+        self.counter = Counter()
+        self.part_words_counter = None
+        self.part_headers = {}
+        self.header_field, self.header_value = b"", b""
+        self.parser = MultipartParser(boundary, callbacks={
+            "on_part_begin": self.on_part_begin, "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value, "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished, "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end})
+
+    def on_part_begin(self):
+        self.part_headers = {}
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self.header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self.header_value += data[start:end]
+
+    def on_header_end(self):
+        self.part_headers[self.header_field.decode("latin-1").lower()] = self.header_value.decode("latin-1")
+        self.header_field, self.header_value = b"", b""
+
+    def on_headers_finished(self):
+        message = Message()
+        message["Content-Type"] = self.part_headers.get("content-type", "text/plain")
+        self.part_words_counter = TextUploadWordsCounter(get_encoding(message.get_param("charset")))
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        self.part_words_counter.feed(data[start:end])
+
+    def on_part_end(self):
+        self.counter.update(self.part_words_counter.close())
+        self.part_words_counter = None
+
+    def feed(self, data: bytes):
+        self.parser.write(data)
+
+    def close(self) -> Counter:
+        self.parser.finalize()
+        return self.counter
+
+
+class CompressedUploadWordsCounter:
+    # decompresses the body while it is received, the decompressed pieces are counted by the counter of its content type
+
+    def __init__(self, upload_words_counter, encoding: str):
+        self.upload_words_counter = upload_words_counter
+        self.stream_decompressor = StreamDecompressor(encoding)
+
+    def feed(self, data: bytes):
+        for decompressed_data in self.stream_decompressor.decompress(data):
+            self.upload_words_counter.feed(decompressed_data)
+
+    def close(self) -> Counter:
+        self.upload_words_counter.feed(self.stream_decompressor.flush())
+        return self.upload_words_counter.close()
+
+
+def create_upload_words_counter(content_type: str or None, content_encoding: str or None = None):
+    # raises ValueError when the body of this content type (or content encoding) cannot be counted
+    encoding = get_content_encoding(content_encoding)
+    upload_words_counter = create_content_type_words_counter(content_type)
+    if encoding:
+        return CompressedUploadWordsCounter(upload_words_counter, encoding)
+    return upload_words_counter
+
+
+def create_content_type_words_counter(content_type: str or None):
+    if not content_type:
+        raise ValueError("No Content-Type provided.")
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    message = Message()
+    message["Content-Type"] = content_type
+    if media_type in TEXT_CONTENT_TYPES:
+        return TextUploadWordsCounter(get_encoding(message.get_param("charset")))
+    if media_type == MULTIPART_CONTENT_TYPE:
+        if MultipartParser is None:
+            raise ValueError("Multipart uploads are not supported, python-multipart is not installed.")
+        boundary = message.get_param("boundary")
+        if not boundary:
+            raise ValueError("The multipart Content-Type has no boundary.")
+        return MultipartUploadWordsCounter(boundary)
+    raise ValueError("Content-Type not supported.")
@@ -0,0 +1,74 @@
+from collections import OrderedDict
+import threading
+import time
+
+
+class WordsCountCache:
+    # a bounded LRU cache of the words counts that are stored in db, entries may also expire after ttl_seconds
+    # (0 means the entries never expire). the cache is kept exact by applying the db updates to the cached entries
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict()  # word -> (count, expiration time)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        # changed on every db update, a count that was read from db before an update must not be cached
+        self.generation = 0
+        # the db updates that were started and not applied yet, a count that is read from db while an update is in
+        # progress may already include its deltas, so it is not cached
+        self.updates_in_progress = 0
+
+    def get(self, word: str) -> (bool, int, int):
+        # returns (found, count, generation), the generation must be passed to set when a missing count is stored
+        with self.lock:
+            entry = self.entries.get(word)
+            if entry and (not self.ttl_seconds or entry[1] > time.monotonic()):
+                self.entries.move_to_end(word)
+                self.hits += 1
+                return True, entry[0], self.generation
+            if entry:
+                del self.entries[word]
+            self.misses += 1
+            return False, 0, self.generation
+
+    def set(self, word: str, count: int, generation: int):
+        with self.lock:
+            if generation != self.generation or self.updates_in_progress:
+                # db was updated while the count was read, the count may already be stale
+                return
+            self.entries[word] = (count, time.monotonic() + self.ttl_seconds)
+            self.entries.move_to_end(word)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def begin_update(self):
+        # called before the counts are written to db, end_update must be called once they were applied or invalidated
+        with self.lock:
+            self.generation += 1
+            self.updates_in_progress += 1
+
+    def end_update(self):
+        with self.lock:
+            self.generation += 1
+            self.updates_in_progress -= 1
+
+    def apply_deltas(self, words_counter_mapping: dict):
+        # called after the counts were committed to db, only words that are already cached are updated
+        with self.lock:
+            self.generation += 1
+            for word, count in words_counter_mapping.items():
+                entry = self.entries.get(word)
+                if entry:
+                    self.entries[word] = (entry[0] + count, entry[1])
+
+    def invalidate(self, words):
+        with self.lock:
+            self.generation += 1
+            for word in words:
+                self.entries.pop(word, None)
+
+    def get_statistics(self) -> dict:
+        with self.lock:
+            return {"size": len(self.entries), "max_size": self.max_size, "hits": self.hits, "misses": self.misses}
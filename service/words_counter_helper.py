@@ -1,46 +1,147 @@
-from docx import Document
-import html2text
 from fastapi import HTTPException
 import requests
 
-from concurrent.futures.thread import ThreadPoolExecutor
+from collections import Counter, deque
+from concurrent.futures import as_completed
+import codecs
+import glob
+import io
+import itertools
 import os
 import re
 import csv
+import time
 
 from logging import Logger
+from monitoring.metrics import CACHE_REQUESTS, DB_FLUSH_DURATION_SECONDS, DB_QUERY_DURATION_SECONDS, \
+    INGEST_DURATION_SECONDS, MERGE_DURATION_SECONDS, PARSE_DURATION_SECONDS, POOL_IN_USE, QUEUE_SIZE, \
+    TOKENIZE_DURATION_SECONDS
 from configurations.words_counter_configurations import WordsCounterConfigurations
-from service.database_helper import DatabaseHelper
+from service.compressed_stream import get_content_encoding, open_compressed_file, split_compressed_file_extension, \
+    StreamDecompressor
+from service.counting_tasks import count_text_file_range, count_texts, run_measured_task
+from service.docx_reader import iter_docx_paragraphs
+from service.execution_backend import create_execution_backend, merge_counters, THREAD_BACKEND
+from service.http_client import create_http_session, HostConnectionsLimiter
+from service.ingest_cache import IngestCache
+from service.ingest_context import IngestContext
+from service.mmap_file_reader import split_file_to_chunks
+from service.sharded_count_store import ShardedCountStore
+from service.storage_backend import StorageBackend, create_database_helper
+from service.streaming_words_counter import StreamingWordsCounter, HtmlTextExtractor, iter_complete_texts
+from service.words_count_cache import WordsCountCache
+from service.words_tokenizer import count_words
+from service.write_behind_buffer import WriteBehindBuffer
 from type.response_status import ResponseStatus
 
+LETTER_PATTERN = re.compile(r'[a-zA-Z]')
+STATISTICS_DISALLOWED_CHARACTERS_PATTERN = re.compile(r'[^a-zA-Z,-]+')
+
 
 class WordsCounterHelper(WordsCounterConfigurations):
 
-    def __init__(self, logger: Logger):
+    def __init__(self, logger: Logger, database_helper: StorageBackend = None):
         super().__init__()
         self.logger = logger
-        self.database_helper = DatabaseHelper()
-        self.words_counter_mapping = {}
+        # the database helper (and its connections) is shared with the other components of the service
+        self.database_helper = database_helper or create_database_helper(self.config)
+        self.words_count_cache = self.create_words_count_cache()
+        self.count_store = self.create_count_store()
+        self.write_behind_buffer = self.create_write_behind_buffer()
+        self.ingest_cache = self.create_ingest_cache()
+        self.execution_backend = create_execution_backend(self.config["words_counter_helper"]["execution_backend"],
+                                                          self.config["words_counter_helper"]["num_of_workers"])
+        # the inputs of a batch run on their own workers, they wait for the chunks they submit to the execution backend
+        self.batch_execution_backend = create_execution_backend(THREAD_BACKEND,
+                                                                self.config["batch_ingest"]["num_of_workers"])
+        # a single session for all the URL downloads, its connections are kept alive and reused
+        self.http_session = create_http_session(self.config["http_client"])
+        self.host_connections_limiter = HostConnectionsLimiter(self.config["batch_ingest"]["max_connections_per_host"])
         self.cleaned_words = []
         self.txt_extension = "txt"
         self.csv_extension = "csv"
         self.json_extension = "json"
         self.docx_extension = "docx"
-        self.file_path_pattern = r'^[A-Za-z]:/(?:[^<>:"/\\|?*]+/)*[^<>:"/\\|?*]+\.[A-Za-z]+$'
+        self.file_path_pattern = r'^[A-Za-z]:/(?:[^<>:"/\\|?*]+/)*[^<>:"/\\|?*]+\.[A-Za-z0-9]+$'
         self.url_pattern = r'^(https?|ftp)://[^\s/$.?#].[^\s]*$'
+        # an absolute path of a directory, or a file path pattern whose names may have the glob wildcards
+        # (eg: C:/corpus/**/*.txt or /corpus/**/*.txt)
+        self.files_glob_pattern = r'^(?:[A-Za-z]:)?/(?:[^<>:"/\\|]+/)*[^<>:"/\\|]*$'
+        self.register_metrics()
+
+    def create_words_count_cache(self) -> WordsCountCache or None:
+        cache_config = self.config["words_count_cache"]
+        if not cache_config["enabled"]:
+            return None
+        return WordsCountCache(cache_config["max_size"], cache_config["ttl_seconds"])
+
+    def create_write_behind_buffer(self) -> WriteBehindBuffer or None:
+        if not self.config["write_behind"]["enabled"]:
+            return None
+        return WriteBehindBuffer(self.logger, self.database_helper, self.words_count_cache, self.count_store)
+
+    def create_count_store(self) -> ShardedCountStore or None:
+        if not self.config["count_store"]["enabled"]:
+            return None
+        return ShardedCountStore(self.logger, self.database_helper)
+
+    def create_ingest_cache(self) -> IngestCache or None:
+        cache_config = self.config["ingest_cache"]
+        if not cache_config["enabled"]:
+            return None
+        return IngestCache(cache_config["directory"], cache_config["max_entries"], cache_config["max_size_bytes"])
+
+    def register_metrics(self):
+        # the values of these metrics are read when the metrics are collected, not on every change
+        if self.words_count_cache:
+            CACHE_REQUESTS.set_function(lambda: self.words_count_cache.hits, "words_count", "hit")
+            CACHE_REQUESTS.set_function(lambda: self.words_count_cache.misses, "words_count", "miss")
+        if self.write_behind_buffer:
+            QUEUE_SIZE.set_function(lambda: len(self.write_behind_buffer.pending_counter), "write_behind_words")
+        POOL_IN_USE.set_function(self.execution_backend.get_num_of_pending_tasks, "execution_backend")
+        POOL_IN_USE.set_function(self.batch_execution_backend.get_num_of_pending_tasks, "batch_ingest")
+        POOL_IN_USE.set_function(self.database_helper.get_num_of_connections_in_use, "db_connections")
 
     @staticmethod
     def prepare_word_for_statistics(word: str) -> str:
         # cleaning up all characters from word except letters dashes and commas
         return re.sub(r'[^a-zA-Z,-]', '', word)
 
+    @staticmethod
+    def prepare_words_for_statistics(words: list) -> (dict, list):
+        # returns the requested words grouped by their cleaned (lower case) word, and the words that have no letters
+        requested_words_by_cleaned_word = {}
+        invalid_words = []
+        for word in words:
+            if not LETTER_PATTERN.search(word):
+                invalid_words.append(word)
+                continue
+            cleaned_word = STATISTICS_DISALLOWED_CHARACTERS_PATTERN.sub('', word).lower()
+            requested_words_by_cleaned_word.setdefault(cleaned_word, []).append(word)
+        return requested_words_by_cleaned_word, invalid_words
+
     def setup_system(self):
-        server_conn, host, user_name, password = self.database_helper.create_connection_to_mysql_server()
-        self.database_helper.verify_database(server_conn)
-        db_conn = self.database_helper.create_connection_to_database(host, user_name, password)
-        self.database_helper.verify_table(db_conn)
+        self.database_helper.setup_database()
+        if self.count_store:
+            self.count_store.load()
+
+    def start(self):
+        if self.count_store:
+            self.count_store.start()
+        if self.write_behind_buffer:
+            self.write_behind_buffer.start()
 
-    def extract_text_from_input(self, input_string: str):
+    def stop(self):
+        if self.write_behind_buffer:
+            self.write_behind_buffer.stop()
+        if self.count_store:
+            # stopped after the buffer, so its last snapshot has all the flushed counts
+            self.count_store.stop()
+        self.batch_execution_backend.shutdown()
+        self.execution_backend.shutdown()
+        self.http_session.close()
+
+    def extract_text_from_input(self, input_string: str, context: IngestContext):
         # checking if input_string has file path pattern
         file_path_match = re.match(self.file_path_pattern, input_string)
         if file_path_match:
@@ -49,7 +150,8 @@ class WordsCounterHelper(WordsCounterConfigurations):
                 # this file path is a path of an exiting file
                 extra_msg = f"file path is: {input_string}"
                 self.logger.info("the received input is a valid path to a file", extra={"extra": extra_msg})
-                self.process_file_content(input_string)
+                with INGEST_DURATION_SECONDS.labels("file").time():
+                    self.process_cached_file_content(input_string, context)
                 return None
             extra_msg = "The request contains a path to a file that does not exist"
             self.logger.warning("file does not exist", extra={"extra": extra_msg})
@@ -61,103 +163,218 @@ class WordsCounterHelper(WordsCounterConfigurations):
             # this input is a URL address
             extra_msg = f"url is: {input_string}"
             self.logger.info("the received input has URL pattern", extra={"extra": extra_msg})
-            self.process_url_content(input_string)
+            with INGEST_DURATION_SECONDS.labels("url").time():
+                self.process_url_content(input_string, context)
             return None
 
         # the input is a simple string
-        extra_msg = f"string is: {input_string}"
+        # a simple string may be the whole submitted text, only its beginning is logged
+        max_payload_length = self.config["logger"]["max_payload_length"]
+        extra_msg = f"string length is: {len(input_string)}, string is: {input_string[:max_payload_length]}"
         self.logger.info("the received input is a simple string", extra={"extra": extra_msg})
-        self.update_words_counter_mapping(input_string.split())
-
-    def process_text_file(self, file, chunk: (int, int), chunk_size: int):
-        file.seek(chunk[0])
-        chunk_size_iteration = chunk_size // 100  # each worker will process 100KB of data on each iteration
-        while file.tell() < chunk[1]:
-            chunk_content = file.read(chunk_size_iteration)
-            if not chunk_content:
-                break
-            self.update_words_counter_mapping(chunk_content.split())
-
-    def read_text_from_file(self, file, chunk_size: int):
-        file_size = file.seek(0, 2)
-        num_of_workers = file_size // chunk_size
-        if not num_of_workers:
-            num_of_workers = 1
-        chunks = [(i, i + chunk_size) for i in range(0, file_size, chunk_size)]
-        with ThreadPoolExecutor(max_workers=num_of_workers) as executor:
-            for chunk in chunks:
-                try:
-                    executor.submit(self.process_text_file, file, chunk, chunk_size)
-                except Exception as ex:
-                    extra_msg = f"chunk_size is: {chunk_size}, the exception is: {str(ex)}, " \
-                                f"the exception_type is: {type(ex).__name__}"
-                    self.logger.error("an error occurred while trying to extract text from a text file",
-                                      extra={"extra": extra_msg})
-
-    def process_csv_file(self, line: str):
-        line_words = []
-        for phrase in line:
-            line_words.extend(phrase.split())
-        self.update_words_counter_mapping(line_words)
-
-    def read_csv_file(self, file, num_of_workers: int):
-        # reading CSV file
+        with INGEST_DURATION_SECONDS.labels("string").time():
+            self.update_words_counter_mapping(input_string, context)
+
+    def merge_partial_counters(self, tasks, context: IngestContext, error_message: str, extra_msg: str = ""):
+        # each task returns its own partial Counter, the counters are merged once all the tasks are done.
+        # tasks is an iterable of (future, number of bytes the task processes), the progress is updated per finished
+        # task. the partial counters are merged every max_pending_tasks tasks, so their number stays bounded.
+        # every task is a run_measured_task, its duration is the tokenize stage of its chunk
+        max_pending_tasks = self.config["words_counter_helper"]["max_pending_tasks"]
+        partial_counters = []
+        for future, num_of_bytes in tasks:
+            if len(partial_counters) >= max_pending_tasks:
+                with MERGE_DURATION_SECONDS.time():
+                    partial_counters = [merge_counters(partial_counters)]
+            try:
+                partial_counter, task_seconds = future.result()
+            except Exception as ex:
+                exception_msg = f"the exception is: {str(ex)}, the exception_type is: {type(ex).__name__}"
+                self.logger.error(error_message, extra={"extra": f"{extra_msg}{exception_msg}"})
+                context.add_failed_task()
+                continue
+            TOKENIZE_DURATION_SECONDS.observe(task_seconds)
+            partial_counters.append(partial_counter)
+            context.add_processed_bytes(num_of_bytes)
+            context.add_counted_words(sum(partial_counter.values()))
+        with MERGE_DURATION_SECONDS.time():
+            context.merge_counter(merge_counters(partial_counters))
+
+    def read_text_from_file(self, file_path: str, chunk_size: int, context: IngestContext):
+        # each worker maps the file and reads its own range, the ranges boundaries are snapped to whitespaces
+        read_size = max(chunk_size // 100, 1)  # each worker will process 100KB of data on each iteration
+        tasks = [(self.execution_backend.submit(run_measured_task, count_text_file_range, file_path, start, end,
+                                                read_size), end - start)
+                 for start, end in split_file_to_chunks(file_path, chunk_size)]
+        self.merge_partial_counters(tasks, context, "an error occurred while trying to extract text from a text file",
+                                    f"chunk_size is: {chunk_size}, ")
+
+    def iter_texts_batches(self, texts):
+        # yields lists of texts of about batch_size characters, with the number of characters in each of them.
+        # the time of reading the texts of a batch (eg: parsing csv rows) is the parse stage of the batch
+        batch_size = self.config["words_counter_helper"]["texts_batch_size"]
+        batch, batch_length = [], 0
+        start_time = time.perf_counter()
+        for text in texts:
+            batch.append(text)
+            batch_length += len(text)
+            if batch_length >= batch_size:
+                PARSE_DURATION_SECONDS.observe(time.perf_counter() - start_time)
+                yield batch, batch_length
+                batch, batch_length = [], 0
+                start_time = time.perf_counter()
+        if batch:
+            PARSE_DURATION_SECONDS.observe(time.perf_counter() - start_time)
+            yield batch, batch_length
+
+    def submit_texts_batches(self, texts):
+        # a task counts a whole batch of texts, the queue overhead of a task per text is larger than its counting.
+        # at most max_pending_tasks tasks are submitted ahead, so the input is read while the batches are counted
+        # but it is never held in memory as a whole
+        max_pending_tasks = self.config["words_counter_helper"]["max_pending_tasks"]
+        pending_tasks = deque()
+        for batch, batch_length in self.iter_texts_batches(texts):
+            pending_tasks.append((self.execution_backend.submit(run_measured_task, count_texts, batch), batch_length))
+            if len(pending_tasks) >= max_pending_tasks:
+                yield pending_tasks.popleft()
+        while pending_tasks:
+            yield pending_tasks.popleft()
+
+    def read_csv_file(self, file, context: IngestContext):
+        # reading CSV file, each phrase is split separately, joining them with a space keeps them apart
         reader = csv.reader(file)
-        with ThreadPoolExecutor(max_workers=num_of_workers) as executor:
-            for line in reader:
-                try:
-                    executor.submit(self.process_csv_file, line)
-                except Exception as ex:
-                    extra_msg = f"the exception is: {str(ex)}, the exception_type is: {type(ex).__name__}"
-                    self.logger.error("an error occurred while trying to process csv file",
-                                      extra={"extra": extra_msg})
-
-    def read_docx_file(self, file_path: str, num_of_workers: int):
-        # reading docx file
-        document = Document(file_path)
-        with ThreadPoolExecutor(max_workers=num_of_workers) as executor:
-            for paragraph in document.paragraphs:
-                try:
-                    executor.submit(self.update_words_counter_mapping, paragraph.text.split())
-                except Exception as ex:
-                    extra_msg = f"the exception is: {str(ex)}, the exception_type is: {type(ex).__name__}"
-                    self.logger.error("an error occurred while trying to process docx file",
-                                      extra={"extra": extra_msg})
-
-    def process_file_content(self, file_path: str):
+        tasks = self.submit_texts_batches(" ".join(line) for line in reader)
+        self.merge_partial_counters(tasks, context, "an error occurred while trying to process csv file")
+
+    def read_docx_file(self, file_path: str, context: IngestContext):
+        # reading docx file, the paragraphs are read while the document is parsed
+        tasks = self.submit_texts_batches(iter_docx_paragraphs(file_path))
+        self.merge_partial_counters(tasks, context, "an error occurred while trying to process docx file")
+
+    def read_compressed_file(self, file_path: str, file_extension: str, encoding: str, context: IngestContext):
+        # the file is decompressed while it is read, the decompressed content is never written to disk
+        with open_compressed_file(file_path, encoding) as file:
+            if file_extension == self.csv_extension:
+                self.read_csv_file(io.TextIOWrapper(file), context)
+                return
+            read_size = self.config["words_counter_helper"]["texts_batch_size"]
+            texts = iter_complete_texts(iter(lambda: file.read(read_size), b""))
+            self.merge_partial_counters(self.submit_texts_batches(texts), context,
+                                        "an error occurred while trying to process a compressed file")
+
+    def is_supported_file_type(self, file_path: str) -> bool:
         supported_file_extensions = [self.txt_extension, self.csv_extension, self.json_extension, self.docx_extension]
-        file_extension = file_path.split(".")[-1].lower()
-        if file_extension not in supported_file_extensions:
+        # a compressed file (eg: words.txt.gz) is read by the extension of its content
+        file_extension, encoding = split_compressed_file_extension(file_path)
+        # a docx file is already a zip archive, it is not supported when it is compressed again
+        return file_extension in supported_file_extensions and not (encoding and file_extension == self.docx_extension)
+
+    def process_file_content(self, file_path: str, context: IngestContext):
+        file_extension, encoding = split_compressed_file_extension(file_path)
+        if not self.is_supported_file_type(file_path):
             # handling unsupported file type
             extra_msg = f"file path is {file_path}"
             self.logger.error("cannot read file content from unsupported file type", extra={"extra": extra_msg})
             raise ValueError("Unsupported file type")
 
+        if encoding:
+            self.read_compressed_file(file_path, file_extension, encoding, context)
+            return
+
         chunk_size = self.config["words_counter_helper"]["files_chunk_size"]  # 10MB chunk size
-        num_of_workers = self.config["words_counter_helper"]["num_of_workers"]
-        file = open(file_path, "r")
-        file_extension = file_path.split(".")[-1].lower()
 
         if file_extension in [self.txt_extension, self.json_extension]:
-            self.read_text_from_file(file, chunk_size)
+            self.read_text_from_file(file_path, chunk_size, context)
 
         elif file_extension == self.csv_extension:
-            self.read_csv_file(file, num_of_workers)
+            with open(file_path, "r") as file:
+                self.read_csv_file(file, context)
 
         elif file_extension == self.docx_extension:
-            self.read_docx_file(file_path, num_of_workers)
+            self.read_docx_file(file_path, context)
 
-        file.close()
+    def apply_cached_counter(self, cached_counter: Counter, context: IngestContext, extra_msg: str):
+        if self.config["ingest_cache"]["idempotent"]:
+            # the counts of this input were already recorded, the whole ingest is skipped
+            self.logger.info("the input was already ingested, it is skipped", extra={"extra": extra_msg})
+            return
+        self.logger.info("the input was already ingested, its cached counts are used", extra={"extra": extra_msg})
+        context.add_counted_words(sum(cached_counter.values()))
+        context.merge_counter(cached_counter)
 
-    def read_url_content(self, chunk: bytes, converter, decode_method: str):
-        text = converter.handle(chunk.decode(decode_method))
-        # extracting words from text without html tags
-        chunk_content = re.findall(r'\b\w+\b', text)
-        self.update_words_counter_mapping(chunk_content)
+    def cache_ingested_counter(self, cache_key: str, context: IngestContext, counter_before: Counter,
+                               failed_tasks_before: int, validators: dict = None):
+        # an input that was not counted completely is not cached, the others are cached once their counts were
+        # recorded, so an input whose counts failed to be recorded is not skipped by the next ingest
+        if context.failed_tasks == failed_tasks_before:
+            context.add_ingested_cache_entry(cache_key, context.counter - counter_before, validators)
+
+    def cache_ingested_counters(self, context: IngestContext):
+        for cache_key, counter, validators in context.ingested_cache_entries:
+            self.ingest_cache.set(cache_key, counter, validators)
+        context.ingested_cache_entries.clear()
+
+    def process_cached_file_content(self, file_path: str, context: IngestContext):
+        if not self.ingest_cache:
+            self.process_file_content(file_path, context)
+            return
+        cache_key = IngestCache.get_file_key(file_path, self.config["ingest_cache"]["use_content_hash"])
+        cached_counter = self.ingest_cache.get_counter(cache_key)
+        if cached_counter is not None:
+            CACHE_REQUESTS.labels("ingest", "hit").inc()
+            self.apply_cached_counter(cached_counter, context, f"file path is: {file_path}")
+            return
+        CACHE_REQUESTS.labels("ingest", "miss").inc()
+        counter_before, failed_tasks_before = context.counter.copy(), context.failed_tasks
+        self.process_file_content(file_path, context)
+        self.cache_ingested_counter(cache_key, context, counter_before, failed_tasks_before)
+
+    @staticmethod
+    def get_conditional_request_headers(validators: dict or None) -> dict:
+        headers = {}
+        if validators and validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators and validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+        return headers
 
-    def process_url_content(self, url: str):
+    def process_url_content(self, url: str, context: IngestContext):
+        # the downloads from the same host are limited, the connections pool has a bounded number of connections
+        with self.host_connections_limiter.limit(url):
+            self.process_limited_url_content(url, context)
+
+    def process_limited_url_content(self, url: str, context: IngestContext):
+        cache_key = IngestCache.get_url_key(url) if self.ingest_cache else None
+        validators = self.ingest_cache.get_validators(cache_key) if cache_key else None
+        response = self.request_url(url, self.get_conditional_request_headers(validators))
+        if response.status_code == 304 and validators:
+            # the content was not modified since its counts were cached
+            response.close()
+            cached_counter = self.ingest_cache.get_counter(cache_key)
+            if cached_counter is not None:
+                CACHE_REQUESTS.labels("ingest", "hit").inc()
+                self.apply_cached_counter(cached_counter, context, f"url is: {url}")
+                return
+            # the entry was evicted after its validators were read
+            response = self.request_url(url, {})
+        if cache_key:
+            CACHE_REQUESTS.labels("ingest", "miss").inc()
+
+        counter_before, failed_tasks_before = context.counter.copy(), context.failed_tasks
+        with response:
+            self.read_url_content(response, context)
+        validators = {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+        # only a content that can be validated by a conditional request is cached
+        if cache_key and any(validators.values()):
+            self.cache_ingested_counter(cache_key, context, counter_before, failed_tasks_before, validators)
+
+    def request_url(self, url: str, headers: dict) -> requests.Response:
         try:
-            response = requests.get(url, stream=True)
+            response = self.http_session.get(url, stream=True, headers=headers, timeout=self.get_http_timeout())
+        except requests.Timeout as ex:
+            extra_msg = f"the exception is: {str(ex)}, the exception_type is: {type(ex).__name__}"
+            self.logger.error(f"Timed out while trying to retrieve data from URL", extra={"extra": extra_msg})
+            raise HTTPException(status_code=504, detail="Gateway Timeout")
         except Exception as ex:
             extra_msg = f"the exception is: {str(ex)}, the exception_type is: {type(ex).__name__}"
             self.logger.error(f"Failed to retrieve data from URL", extra={"extra": extra_msg})
@@ -170,37 +387,136 @@ class WordsCounterHelper(WordsCounterConfigurations):
                         f"the exception_type is: {type(ex).__name__}"
             self.logger.error(f"The response has wrong status code", extra={"extra": extra_msg})
             raise HTTPException(status_code=response.status_code, detail=response.reason)
+        return response
 
-        num_workers = self.config["words_counter_helper"]["num_of_workers"]
-        chunk_size = len(response.content) // num_workers
-        if not chunk_size:
-            chunk_size = 1
-        converter = html2text.HTML2Text()
-        converter.ignore_links = True
-        converter.ignore_images = True
-        with ThreadPoolExecutor(max_workers=num_workers) as executor:
-            for chunk in response.iter_content(chunk_size=chunk_size):
-                try:
-                    executor.submit(self.read_url_content, chunk, converter, response.encoding)
-                except Exception as ex:
-                    extra_msg = f"the exception is: {str(ex)}, the exception_type is: {type(ex).__name__}"
-                    self.logger.error("an error occurred while trying to read url content", extra={"extra": extra_msg})
-
-    def update_words_counter_mapping(self, words: list):
-        for word in words:
-            # verify if word contains letters
-            if not bool(re.search(r'[a-zA-Z]', word)):
-                continue
-            # cleaning up all characters from word except letters dashes and commas
-            word = re.sub(r'[^a-zA-Z,-]', '', word).lower()
+    def get_http_timeout(self) -> (float, float):
+        # the read timeout is the max time between two received chunks, not the time of the whole download
+        http_client_config = self.config["http_client"]
+        return http_client_config["connect_timeout_seconds"], http_client_config["read_timeout_seconds"]
+
+    def read_url_content(self, response: requests.Response, context: IngestContext):
+        # the body is processed while it is downloaded, only the current chunk and the unfinished word or tag are
+        # held in memory. characters and tags that are cut between chunks are completed by the next chunk
+        chunk_size = self.config["words_counter_helper"]["url_chunk_size"]
+        max_body_size = self.config["words_counter_helper"]["url_max_body_size"]
+        content_length = response.headers.get("Content-Length")
+        if content_length and content_length.isdigit() and int(content_length) > max_body_size:
+            self.reject_url_body_size(int(content_length), max_body_size)
+
+        decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="ignore")
+        html_text_extractor = HtmlTextExtractor()
+        streaming_words_counter = StreamingWordsCounter()
+        stream_decompressor = self.create_url_stream_decompressor(response)
+        chunks = response.raw.stream(chunk_size, decode_content=False) if stream_decompressor else \
+            response.iter_content(chunk_size=chunk_size)
+        body_size = 0
+        for chunk in chunks:
+            body_size += len(chunk)
+            context.add_processed_bytes(len(chunk))
+            if body_size > max_body_size:
+                self.reject_url_body_size(body_size, max_body_size)
+            for data in stream_decompressor.decompress(chunk) if stream_decompressor else [chunk]:
+                start_time = time.perf_counter()
+                html_text_extractor.feed(decoder.decode(data))
+                # extracting words from text without html tags, every non word character separates between words
+                text = re.sub(r'\W+', ' ', html_text_extractor.pop_text())
+                parse_end_time = time.perf_counter()
+                streaming_words_counter.feed(text)
+                PARSE_DURATION_SECONDS.observe(parse_end_time - start_time)
+                TOKENIZE_DURATION_SECONDS.observe(time.perf_counter() - parse_end_time)
+
+        if stream_decompressor:
+            html_text_extractor.feed(decoder.decode(stream_decompressor.flush()))
+        html_text_extractor.feed(decoder.decode(b"", final=True))
+        html_text_extractor.close()
+        streaming_words_counter.feed(re.sub(r'\W+', ' ', html_text_extractor.pop_text()))
+        url_counter = streaming_words_counter.close()
+        context.add_counted_words(sum(url_counter.values()))
+        with MERGE_DURATION_SECONDS.time():
+            context.merge_counter(url_counter)
+
+    @staticmethod
+    def create_url_stream_decompressor(response: requests.Response) -> StreamDecompressor or None:
+        # the body is decompressed here (and its size is limited by its compressed size), encodings that are not
+        # supported here are left to the http client
+        try:
+            encoding = get_content_encoding(response.headers.get("Content-Encoding"))
+        except ValueError:
+            return None
+        return StreamDecompressor(encoding) if encoding else None
+
+    def reject_url_body_size(self, body_size: int, max_body_size: int):
+        extra_msg = f"body size is: {body_size}, max body size is: {max_body_size}"
+        self.logger.error("the URL content is larger than the max body size", extra={"extra": extra_msg})
+        raise HTTPException(status_code=413, detail="URL content is too large")
+
+    def list_batch_files(self, files_pattern: str, max_files: int) -> list:
+        # a directory is expanded to its files, and a glob pattern (eg: C:/corpus/**/*.txt) to the files it matches.
+        # only the files of a supported type are returned. the paths are enumerated lazily, a pattern that matches
+        # more than max_files paths is rejected without listing the rest of them
+        if os.path.isdir(files_pattern):
+            files_pattern = os.path.join(files_pattern, "*")
+        matched_paths = list(itertools.islice(glob.iglob(files_pattern, recursive=True), max_files + 1))
+        if len(matched_paths) > max_files:
+            raise ValueError(f"The files pattern matches more than {max_files} paths")
+        return sorted(file_path for file_path in matched_paths
+                      if os.path.isfile(file_path) and self.is_supported_file_type(file_path))
 
-            if word in self.words_counter_mapping:
-                self.words_counter_mapping[word] += 1
+    def ingest_batch_input(self, input_string: str, is_url: bool) -> IngestContext:
+        # every input is counted in its own context, a failed input never leaves partial counts in the batch
+        context = IngestContext()
+        with INGEST_DURATION_SECONDS.labels("url" if is_url else "file").time():
+            if is_url:
+                self.process_url_content(input_string, context)
             else:
-                self.words_counter_mapping[word] = 1
+                self.process_cached_file_content(input_string, context)
+        return context
 
-    def update_database(self) -> ResponseStatus:
-        items = list(self.words_counter_mapping.items())
+    def ingest_batch(self, urls: list, file_paths: list, context: IngestContext) -> list:
+        # the URLs are downloaded and the files are read concurrently, the counts of all the inputs are merged into
+        # the batch context, so they are recorded in db by a single update. returns the inputs that failed
+        futures = {self.batch_execution_backend.submit(self.ingest_batch_input, url, True): url for url in urls}
+        futures.update({self.batch_execution_backend.submit(self.ingest_batch_input, file_path, False): file_path
+                        for file_path in file_paths})
+        failed_inputs = []
+        for future in as_completed(futures):
+            try:
+                context.merge_context(future.result())
+            except Exception as ex:
+                error = ex.detail if isinstance(ex, HTTPException) else str(ex)
+                extra_msg = f"input is: {futures[future]}, the exception is: {str(ex)}, " \
+                            f"the exception_type is: {type(ex).__name__}"
+                self.logger.error("an error occurred while trying to ingest a batch input", extra={"extra": extra_msg})
+                failed_inputs.append({"input": futures[future], "error": error})
+        return failed_inputs
+
+    def update_words_counter_mapping(self, text: str, context: IngestContext):
+        # splitting, cleaning and counting the words of the whole text in a single pass
+        with TOKENIZE_DURATION_SECONDS.time():
+            counter = count_words(text)
+        context.add_processed_bytes(len(text))
+        context.add_counted_words(sum(counter.values()))
+        with MERGE_DURATION_SECONDS.time():
+            context.merge_counter(counter)
+
+    def update_database(self, context: IngestContext) -> ResponseStatus:
+        if not context.counter:
+            # nothing to record, eg: an input that was already ingested, or an input without words
+            update_status = ResponseStatus.Ok
+        elif self.write_behind_buffer:
+            # the counts are written to db by the next flush of the buffer, together with the counts of other ingests
+            self.write_behind_buffer.add(context.counter)
+            context.counter.clear()
+            update_status = ResponseStatus.Ok
+        else:
+            with DB_FLUSH_DURATION_SECONDS.time():
+                update_status = self.record_counts_in_db(context)
+        if update_status == ResponseStatus.Ok:
+            self.cache_ingested_counters(context)
+        return update_status
+
+    def record_counts_in_db(self, context: IngestContext) -> ResponseStatus:
+        items = list(context.counter.items())
         num_of_chunks = self.config["words_counter_helper"]["num_of_chunks"]
         items_length = len(items)
         chunk_size = items_length // num_of_chunks
@@ -208,15 +524,29 @@ class WordsCounterHelper(WordsCounterConfigurations):
             chunk_size = items_length
         chunk_update_successfully, chunk_update_failed = False, False
         for i in range(0, len(items), chunk_size):
+            chunk = dict(items[i:i + chunk_size])
+            if self.words_count_cache:
+                self.words_count_cache.begin_update()
             try:
-                chunk = dict(items[i:i + chunk_size])
-                self.database_helper.update_database(chunk)
+                with DB_QUERY_DURATION_SECONDS.labels("update_database").time():
+                    self.database_helper.update_database(chunk)
                 chunk_update_successfully = True
+                context.add_committed_db_chunk()
+                if self.words_count_cache:
+                    self.words_count_cache.apply_deltas(chunk)
+                if self.count_store:
+                    self.count_store.add_counts(chunk)
             except Exception as ex:
+                if self.words_count_cache:
+                    # it is unknown whether the chunk was recorded, its words are read again from db
+                    self.words_count_cache.invalidate(chunk)
                 extra_msg = f"chunk_size is: {chunk_size}, the exception is: {str(ex)}, " \
                             f"the exception_type is: {type(ex).__name__}"
                 self.logger.error("an error occurred while trying to update database", extra={"extra": extra_msg})
                 chunk_update_failed = True
+            finally:
+                if self.words_count_cache:
+                    self.words_count_cache.end_update()
 
         if chunk_update_successfully and chunk_update_failed:
             update_status = ResponseStatus.Partial
@@ -224,9 +554,83 @@ class WordsCounterHelper(WordsCounterConfigurations):
             update_status = ResponseStatus.Ok
         else:  # all chunks were failed to be updated in DB
             update_status = ResponseStatus.Error
-        self.words_counter_mapping.clear()  # clearing words_counter_mapping for the next api call
+        context.counter.clear()  # the counts were recorded in db, the context does not need them anymore
 
         return update_status
 
+    def get_words_counts(self, words: list) -> dict:
+        # words must be cleaned and in lower case
+        if self.write_behind_buffer:
+            return self.write_behind_buffer.add_buffered_counts(words, self.get_stored_words_counts)
+        return self.get_stored_words_counts(words)
+
+    def get_stored_words_counts(self, words: list) -> dict:
+        if self.count_store:
+            # the count store has all the stored counts, db is not read at all
+            return self.count_store.get_counts(words)
+        # the cached counts are used and only the missing ones are read from db
+        if not self.words_count_cache:
+            missing_words_generations = {word: None for word in words}
+            words_counts = {}
+        else:
+            missing_words_generations, words_counts = {}, {}
+            for word in words:
+                found, count, generation = self.words_count_cache.get(word)
+                if found:
+                    words_counts[word] = count
+                else:
+                    missing_words_generations[word] = generation
+        with DB_QUERY_DURATION_SECONDS.labels("get_counts_from_db").time():
+            db_counts = self.database_helper.get_counts_from_db(list(missing_words_generations))
+        for word, generation in missing_words_generations.items():
+            words_counts[word] = db_counts.get(word, 0)
+            if self.words_count_cache:
+                self.words_count_cache.set(word, words_counts[word], generation)
+        return words_counts
+
+    def iter_words_counts(self, words: list):
+        # yields the counts of the words chunk by chunk, each chunk is read from db with a single query
+        chunk_size = self.config["words_statistics"]["batch_query_chunk_size"]
+        for i in range(0, len(words), chunk_size):
+            yield self.get_words_counts(words[i:i + chunk_size])
+
     def get_word_count(self, word: str) -> int:
-        return self.database_helper.get_count_from_db(word)
+        # words are stored in lower case and compared case insensitively in db
+        word = word.lower()
+        if self.write_behind_buffer:
+            return self.write_behind_buffer.add_buffered_counts(
+                [word], lambda words: {word: self.get_stored_word_count(word)})[word]
+        return self.get_stored_word_count(word)
+
+    def get_top_words(self, limit: int, offset: int) -> list:
+        # the words that are still waiting in the write behind buffer are not ranked until they are flushed
+        if self.count_store:
+            top_words = self.count_store.get_top_words(limit, offset)
+            if top_words is not None:
+                return top_words
+        # the page is beyond the top words the count store keeps, it is read from the count index of db
+        with DB_QUERY_DURATION_SECONDS.labels("get_top_words").time():
+            return self.database_helper.get_top_words(limit, offset)
+
+    def get_words_by_prefix(self, prefix: str, limit: int, offset: int) -> list:
+        # prefix must be cleaned and in lower case
+        if self.count_store:
+            return self.count_store.get_words_by_prefix(prefix, limit, offset)
+        with DB_QUERY_DURATION_SECONDS.labels("get_words_by_prefix").time():
+            return self.database_helper.get_words_by_prefix(prefix, limit, offset)
+
+    def get_stored_word_count(self, word: str) -> int:
+        if self.count_store:
+            return self.count_store.get_count(word)
+        if not self.words_count_cache:
+            return self.get_count_from_db(word)
+        found, count, generation = self.words_count_cache.get(word)
+        if found:
+            return count
+        count = self.get_count_from_db(word)
+        self.words_count_cache.set(word, count, generation)
+        return count
+
+    def get_count_from_db(self, word: str) -> int:
+        with DB_QUERY_DURATION_SECONDS.labels("get_count_from_db").time():
+            return self.database_helper.get_count_from_db(word)
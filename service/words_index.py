@@ -0,0 +1,131 @@
+from itertools import islice
+import bisect
+import heapq
+import threading
+
+# every stored word is lower case ascii, so no word that starts with a prefix is greater than this upper bound
+PREFIX_UPPER_BOUND_CHARACTER = "\U0010ffff"
+
+
+class LowestRankedWord:
+    # a heap entry of the top words index, the lowest ranked word is at the top of the heap:
+    # the lowest count, and between words with the same count the greatest word
+    __slots__ = ("count", "word")
+
+    def __init__(self, count: int, word: str):
+        self.count = count
+        self.word = word
+
+    def __lt__(self, other) -> bool:
+        if self.count != other.count:
+            return self.count < other.count
+        return self.word > other.word
+
+
+class TopWordsIndex:
+    # the words with the highest counts, up to capacity words. the counts only grow, so once the index is full
+    # a word that is not in it is never ranked higher than the lowest ranked word in it
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.words_counts = {}
+        self.heap = []  # entries of words whose count was changed since they were pushed are skipped when popped
+        self.sorted_items = None
+        self.lock = threading.Lock()
+
+    def update(self, items: list):
+        # items is a list of (word, total count)
+        with self.lock:
+            for word, count in items:
+                if word in self.words_counts:
+                    # the updates of concurrent writers may arrive out of order, the count never decreases
+                    count = max(count, self.words_counts[word])
+                elif len(self.words_counts) >= self.capacity:
+                    lowest_ranked_word = self.get_lowest_ranked_word()
+                    if not lowest_ranked_word < LowestRankedWord(count, word):
+                        continue
+                    heapq.heappop(self.heap)
+                    del self.words_counts[lowest_ranked_word.word]
+                self.words_counts[word] = count
+                heapq.heappush(self.heap, LowestRankedWord(count, word))
+                self.sorted_items = None
+            if len(self.heap) > 4 * self.capacity:
+                self.heap = [LowestRankedWord(count, word) for word, count in self.words_counts.items()]
+                heapq.heapify(self.heap)
+
+    def get_lowest_ranked_word(self) -> LowestRankedWord:
+        while self.words_counts.get(self.heap[0].word) != self.heap[0].count:
+            heapq.heappop(self.heap)
+        return self.heap[0]
+
+    def get_top_words(self, limit: int, offset: int) -> list or None:
+        # returns None when the requested page is beyond the words the index holds
+        with self.lock:
+            if len(self.words_counts) >= self.capacity and offset + limit > self.capacity:
+                return None
+            if self.sorted_items is None:
+                self.sorted_items = sorted(self.words_counts.items(), key=lambda item: (-item[1], item[0]))
+            return self.sorted_items[offset:offset + limit]
+
+
+class PrefixIndex:
+    # all the words in sorted arrays: a large array and a small array of the recently added words.
+    # the small array is merged into the large one once it reaches the merge threshold
+
+    def __init__(self, merge_threshold: int):
+        self.merge_threshold = merge_threshold
+        self.words = []
+        self.recent_words = []
+        self.lock = threading.Lock()
+
+    def add_words(self, words: list):
+        # words must be new words, that were not added before
+        with self.lock:
+            self.recent_words.extend(words)
+            self.recent_words.sort()
+            if len(self.recent_words) >= self.merge_threshold:
+                # both arrays are sorted, sorting their concatenation merges them in linear time
+                self.words.extend(self.recent_words)
+                self.words.sort()
+                self.recent_words = []
+
+    def build(self, words: list):
+        with self.lock:
+            self.words = sorted(words)
+            self.recent_words = []
+
+    def get_words(self, prefix: str, limit: int, offset: int) -> list:
+        upper_bound = prefix + PREFIX_UPPER_BOUND_CHARACTER
+        with self.lock:
+            words_ranges = [(words, bisect.bisect_left(words, prefix), bisect.bisect_left(words, upper_bound))
+                            for words in (self.words, self.recent_words)]
+            # only the words up to the requested page are iterated
+            matching_words = heapq.merge(*[map(words.__getitem__, range(start, end))
+                                           for words, start, end in words_ranges])
+            return list(islice(matching_words, offset, offset + limit))
+
+
+class WordsIndex:
+    # the indexes of the words in the count store, both are updated with the total counts after every update
+
+    def __init__(self, top_words_capacity: int, prefix_merge_threshold: int):
+        self.top_words_index = TopWordsIndex(top_words_capacity)
+        self.prefix_index = PrefixIndex(prefix_merge_threshold)
+
+    def build(self, items: list):
+        # builds the indexes of all the words at once, it is much faster than updating them word by word
+        self.prefix_index.build([word for word, _ in items])
+        top_words_capacity = self.top_words_index.capacity
+        self.top_words_index.update(heapq.nlargest(top_words_capacity, items,
+                                                     key=lambda item: LowestRankedWord(item[1], item[0])))
+
+    def update(self, items: list, new_words: list):
+        self.top_words_index.update(items)
+        if new_words:
+            self.prefix_index.add_words(new_words)
+
+    def get_top_words(self, limit: int, offset: int) -> list or None:
+        return self.top_words_index.get_top_words(limit, offset)
+
+    def get_words_by_prefix(self, prefix: str, limit: int, offset: int) -> list:
+        return self.prefix_index.get_words(prefix, limit, offset)
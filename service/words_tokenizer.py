@@ -0,0 +1,19 @@
+from collections import Counter
+import re
+
+# every character that is not a letter, a dash, a comma or a whitespace is cleaned up from the words.
+# whitespaces are kept so the text is split into the exact same words as str.split() would split it
+DISALLOWED_CHARACTERS_PATTERN = re.compile(r'[^a-zA-Z,\-\s]+')
+# after cleaning up, a word is a run of letters, dashes and commas that contains at least one letter
+CLEANED_WORD_PATTERN = re.compile(r'[,\-]*[a-z][a-z,\-]*')
+
+
+def tokenize(text: str) -> list:
+    # a single pass over the whole chunk: cleaning, lowercasing, splitting and verifying that words contain letters.
+    # lowercasing must happen after cleaning up, some non ascii characters are lowercased into ascii letters
+    cleaned_text = DISALLOWED_CHARACTERS_PATTERN.sub('', text).lower()
+    return CLEANED_WORD_PATTERN.findall(cleaned_text)
+
+
+def count_words(text: str) -> Counter:
+    return Counter(tokenize(text))
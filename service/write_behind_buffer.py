@@ -0,0 +1,128 @@
+from collections import Counter
+import threading
+
+from logging import Logger
+from configurations.words_counter_configurations import WordsCounterConfigurations
+from monitoring.metrics import DB_FLUSH_DURATION_SECONDS, DB_QUERY_DURATION_SECONDS
+from service.sharded_count_store import ShardedCountStore
+from service.storage_backend import StorageBackend
+from service.words_count_cache import WordsCountCache
+
+
+class WriteBehindBuffer(WordsCounterConfigurations):
+    # the counts of all the ingests are merged in memory and written to db together, on a size or a time threshold.
+    # a flush writes all the buffered words (sorted) in a single transaction.
+    # reads add the buffered counts to the stored counts, so they stay exact while the counts wait in the buffer
+
+    def __init__(self, logger: Logger, database_helper: StorageBackend, words_count_cache: WordsCountCache = None,
+                 count_store: ShardedCountStore = None):
+        super().__init__()
+        self.logger = logger
+        self.database_helper = database_helper
+        self.words_count_cache = words_count_cache
+        self.count_store = count_store
+        self.pending_counter = Counter()
+        self.flushed_counter = Counter()  # the counts that are being written by the current flush
+        self.condition = threading.Condition()
+        # odd while a committed flush is applied to the cache and the count store, a read that overlaps a commit
+        # cannot tell if the stored counts already have the flushed counts, so it is repeated
+        self.version = 0
+        self.flush_lock = threading.Lock()
+        self.flush_event = threading.Event()
+        self.stop_event = threading.Event()
+        self.flush_thread = None
+
+    def start(self):
+        self.flush_thread = threading.Thread(target=self.run_periodic_flush, daemon=True)
+        self.flush_thread.start()
+
+    def stop(self):
+        # the remaining counts are flushed on a graceful shutdown
+        self.stop_event.set()
+        self.flush_event.set()
+        if self.flush_thread:
+            self.flush_thread.join()
+            self.flush_thread = None
+        self.flush()
+
+    def run_periodic_flush(self):
+        flush_interval = self.config["write_behind"]["flush_interval_seconds"]
+        while not self.stop_event.is_set():
+            self.flush_event.wait(flush_interval)
+            self.flush_event.clear()
+            if not self.stop_event.is_set():
+                self.flush()
+
+    def add(self, words_counter_mapping: dict):
+        with self.condition:
+            self.pending_counter.update(words_counter_mapping)
+            pending_words = len(self.pending_counter)
+        if pending_words >= self.config["write_behind"]["max_pending_words"]:
+            self.flush_event.set()
+
+    def flush(self) -> bool:
+        with self.flush_lock:
+            with self.condition:
+                if not self.pending_counter:
+                    return True
+                flushed_counter, self.pending_counter = self.pending_counter, Counter()
+                self.flushed_counter = flushed_counter
+            # rows are written in the same order by every flush, concurrent writers lock them in the same order
+            items = sorted(flushed_counter.items())
+            if self.words_count_cache:
+                self.words_count_cache.begin_update()
+            try:
+                with DB_FLUSH_DURATION_SECONDS.time(), \
+                        DB_QUERY_DURATION_SECONDS.labels("update_database_in_bulk").time():
+                    self.database_helper.update_database_in_bulk(items)
+                flushed = True
+            except Exception as ex:
+                extra_msg = f"number of words is: {len(items)}, the exception is: {str(ex)}, " \
+                            f"the exception_type is: {type(ex).__name__}"
+                self.logger.error("an error occurred while trying to flush the write behind buffer",
+                                  extra={"extra": extra_msg})
+                flushed = False
+            if flushed:
+                self.apply_committed_counts(flushed_counter)
+            else:
+                with self.condition:
+                    # the counts are kept for the next flush
+                    self.pending_counter.update(flushed_counter)
+                    self.flushed_counter = Counter()
+                if self.words_count_cache:
+                    self.words_count_cache.invalidate(flushed_counter)
+            if self.words_count_cache:
+                self.words_count_cache.end_update()
+            return flushed
+
+    def apply_committed_counts(self, flushed_counter: Counter):
+        # the flushed counts stay buffered until the cache and the count store have them as well, reads only wait
+        # for these in memory updates, never for the db write
+        with self.condition:
+            self.version += 1
+        try:
+            if self.words_count_cache:
+                self.words_count_cache.apply_deltas(flushed_counter)
+            if self.count_store:
+                self.count_store.add_counts(flushed_counter)
+        finally:
+            with self.condition:
+                self.flushed_counter = Counter()
+                self.version += 1
+                self.condition.notify_all()
+
+    def add_buffered_counts(self, words: list, read_stored_counts) -> dict:
+        # read_stored_counts(words) returns the stored counts of the words, the buffered counts are added to them.
+        # the counts of a flush that was not committed yet are still buffered, so reads do not wait for the db write,
+        # a read is repeated only when a flush was committed while the stored counts were read
+        while True:
+            with self.condition:
+                while self.version % 2:
+                    self.condition.wait()
+                version = self.version
+                buffered_counts = {word: self.pending_counter.get(word, 0) + self.flushed_counter.get(word, 0)
+                                   for word in words}
+            stored_counts = read_stored_counts(words)
+            with self.condition:
+                if version == self.version:
+                    return {word: stored_counts.get(word, 0) + buffered_counts[word] for word in words}
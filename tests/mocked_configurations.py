@@ -0,0 +1,28 @@
+from copy import deepcopy
+
+# a small configuration of the service for the tests, the backends run in memory and inline
+MOCKED_CONFIGURATIONS = {"database_helper": {"backend": "memory"},
+                         "words_counter_helper": {"execution_backend": "inline", "num_of_workers": 1,
+                                                  "num_of_chunks": 1, "files_chunk_size": 1, "texts_batch_size": 8,
+                                                  "max_pending_tasks": 2, "url_chunk_size": 1024,
+                                                  "url_max_body_size": 1024, "max_concurrent_ingests": 1,
+                                                  "upload_chunk_size": 4, "upload_max_body_size": 32},
+                         "words_count_cache": {"enabled": True, "max_size": 2, "ttl_seconds": 0},
+                         "write_behind": {"enabled": False},
+                         "count_store": {"enabled": False},
+                         "logger": {"max_payload_length": 10},
+                         "batch_ingest": {"num_of_workers": 2, "max_inputs": 3, "max_connections_per_host": 1},
+                         "http_client": {"pool_connections": 1, "pool_maxsize": 1, "connect_timeout_seconds": 1,
+                                         "read_timeout_seconds": 2, "max_retries": 3, "backoff_factor": 0.5},
+                         "ingest_cache": {"enabled": False},
+                         "ingest_jobs": {"num_of_workers": 1, "max_queued_jobs": 1, "max_finished_jobs": 1},
+                         "words_statistics": {"batch_query_chunk_size": 2, "max_page_size": 10}}
+
+
+def get_mocked_configurations(**sections) -> dict:
+    # every test gets its own copy, the given sections override only their own keys
+    # (eg: words_count_cache={"enabled": False})
+    configurations = deepcopy(MOCKED_CONFIGURATIONS)
+    for section_name, section in sections.items():
+        configurations.setdefault(section_name, {}).update(section)
+    return configurations
@@ -0,0 +1,65 @@
+from unittest import TestCase, skipIf
+import bz2
+import gzip
+import lzma
+import zlib
+
+from service.compressed_stream import get_content_encoding, split_compressed_file_extension, StreamDecompressor, \
+    zstandard, BZIP2_ENCODING, DEFLATE_ENCODING, GZIP_ENCODING, XZ_ENCODING, ZSTD_ENCODING, \
+    MAX_DECOMPRESSED_PIECE_SIZE
+
+
+class TestCompressedStream(TestCase):
+
+    @staticmethod
+    def decompress_in_chunks(encoding: str, data: bytes, chunk_size: int) -> list:
+        stream_decompressor = StreamDecompressor(encoding)
+        pieces = [piece for i in range(0, len(data), chunk_size)
+                  for piece in stream_decompressor.decompress(data[i:i + chunk_size])]
+        return pieces + [stream_decompressor.flush()]
+
+    def test_decompress_in_chunks(self):
+        text = b"what is what, well-known " * 1000
+        compressed_texts = {GZIP_ENCODING: gzip.compress(text), DEFLATE_ENCODING: zlib.compress(text),
+                            BZIP2_ENCODING: bz2.compress(text), XZ_ENCODING: lzma.compress(text)}
+        for encoding, compressed_text in compressed_texts.items():
+            self.assertEqual(b"".join(self.decompress_in_chunks(encoding, compressed_text, 7)), text, encoding)
+
+    def test_multi_member_gzip(self):
+        compressed_text = gzip.compress(b"what is ") + gzip.compress(b"what")
+        self.assertEqual(b"".join(self.decompress_in_chunks(GZIP_ENCODING, compressed_text, 5)), b"what is what")
+
+    def test_decompressed_pieces_are_bounded(self):
+        compressed_text = bz2.compress(b" " * (3 * MAX_DECOMPRESSED_PIECE_SIZE))
+        pieces = self.decompress_in_chunks(BZIP2_ENCODING, compressed_text, len(compressed_text))
+        self.assertTrue(all(len(piece) <= MAX_DECOMPRESSED_PIECE_SIZE for piece in pieces))
+        self.assertEqual(sum(len(piece) for piece in pieces), 3 * MAX_DECOMPRESSED_PIECE_SIZE)
+
+    @skipIf(zstandard is None, "zstandard is not installed")
+    def test_zstd_decompress_in_chunks(self):
+        compressor = zstandard.ZstdCompressor()
+        # concatenated frames are decompressed one after another
+        compressed_text = compressor.compress(b"what is what, well-known " * 1000) + compressor.compress(b"what")
+        self.assertEqual(b"".join(self.decompress_in_chunks(ZSTD_ENCODING, compressed_text, 7)),
+                         b"what is what, well-known " * 1000 + b"what")
+
+    @skipIf(zstandard is None, "zstandard is not installed")
+    def test_zstd_decompressed_pieces_are_bounded(self):
+        compressed_text = zstandard.ZstdCompressor().compress(b" " * (3 * MAX_DECOMPRESSED_PIECE_SIZE))
+        pieces = self.decompress_in_chunks(ZSTD_ENCODING, compressed_text, len(compressed_text))
+        self.assertTrue(all(len(piece) <= MAX_DECOMPRESSED_PIECE_SIZE for piece in pieces))
+        self.assertEqual(sum(len(piece) for piece in pieces), 3 * MAX_DECOMPRESSED_PIECE_SIZE)
+
+    def test_get_content_encoding(self):
+        self.assertIsNone(get_content_encoding(None))
+        self.assertIsNone(get_content_encoding("identity"))
+        self.assertEqual(get_content_encoding("x-gzip"), GZIP_ENCODING)
+        for content_encoding in ["br", "gzip, xz"]:
+            with self.assertRaises(ValueError):
+                get_content_encoding(content_encoding)
+
+    def test_split_compressed_file_extension(self):
+        self.assertEqual(split_compressed_file_extension("C:/words.v2/words.txt.gz"), ("txt", GZIP_ENCODING))
+        self.assertEqual(split_compressed_file_extension("C:/words/words.CSV.bz2"), ("csv", BZIP2_ENCODING))
+        self.assertEqual(split_compressed_file_extension("C:/words/words.txt"), ("txt", None))
+        self.assertEqual(split_compressed_file_extension("C:/words/words.gz"), ("gz", None))
@@ -0,0 +1,63 @@
+from unittest import TestCase, mock
+import threading
+
+from service.database_helper import DatabaseHelper
+
+
+class TestDatabaseHelper(TestCase):
+
+    @mock.patch("configurations.words_counter_configurations.get_configurations")
+    def setUp(self, mocked_config) -> None:
+        mocked_config.return_value = {"database_helper": {"table_name": "words_counter", "pool_timeout_seconds": 0,
+                                                          "pool_health_check": True}}
+        self.database_helper = DatabaseHelper()
+        self.database_helper.pool = mock.Mock()
+        self.database_helper.pool_semaphore = threading.BoundedSemaphore(1)
+        self.conn = self.database_helper.pool.get_connection.return_value
+        self.conn.is_connected.return_value = True
+        self.cursor = self.conn.cursor.return_value
+
+    def test_get_count_from_db_uses_its_own_cursor(self):
+        self.cursor.fetchone.return_value = (3, )
+        self.assertEqual(self.database_helper.get_count_from_db("what"), 3)
+        self.cursor.execute.assert_called_once_with("SELECT count FROM words_counter WHERE word = %s", ("what", ))
+        self.cursor.close.assert_called_once()
+        self.conn.close.assert_called_once()
+
+    def test_get_count_of_unknown_word(self):
+        self.cursor.fetchone.return_value = None
+        self.assertEqual(self.database_helper.get_count_from_db("what"), 0)
+
+    def test_update_database_returns_connection_on_error(self):
+        self.cursor.executemany.side_effect = Exception("lost connection")
+        with self.assertRaises(Exception):
+            self.database_helper.update_database({"what": 2})
+        self.conn.commit.assert_not_called()
+        self.conn.close.assert_called_once()
+        self.assertTrue(self.database_helper.pool_semaphore.acquire(blocking=False))
+
+    def test_disconnected_connection_is_reconnected(self):
+        self.conn.is_connected.return_value = False
+        self.database_helper.update_database({"what": 2})
+        self.conn.reconnect.assert_called_once()
+        self.conn.commit.assert_called_once()
+
+    def test_no_free_connection(self):
+        self.database_helper.pool_semaphore.acquire()
+        with self.assertRaises(TimeoutError):
+            self.database_helper.get_count_from_db("what")
+
+    def test_get_counts_from_db_with_a_single_query(self):
+        self.cursor.fetchall.return_value = [("what", 3)]
+        self.assertEqual(self.database_helper.get_counts_from_db(["what", "is"]), {"what": 3})
+        self.cursor.execute.assert_called_once_with("SELECT word, count FROM words_counter WHERE word IN (%s, %s)",
+                                                    ("what", "is"))
+
+    def test_update_database_in_bulk_commits_once(self):
+        self.database_helper.config["database_helper"]["max_rows_per_statement"] = 2
+        self.database_helper.update_database_in_bulk([("is", 1), ("it", 2), ("what", 3)])
+        self.assertEqual(self.cursor.execute.call_count, 2)
+        self.assertEqual(self.cursor.execute.call_args_list[1],
+                         mock.call("INSERT INTO words_counter (word, count) VALUES (%s, %s) "
+                                   "ON DUPLICATE KEY UPDATE count = count + VALUES(count)", ("what", 3)))
+        self.conn.commit.assert_called_once()
@@ -0,0 +1,30 @@
+from unittest import TestCase
+import os
+import tempfile
+import zipfile
+
+from service.docx_reader import iter_docx_paragraphs
+
+DOCUMENT_XML = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>
+<w:p><w:r><w:t>what is</w:t></w:r><w:r><w:t xml:space="preserve"> it</w:t><w:tab/><w:t>well</w:t><w:br/>
+<w:t>known</w:t></w:r></w:p>
+<w:tbl><w:tr><w:tc><w:p><w:r><w:t>table</w:t></w:r></w:p></w:tc></w:tr></w:tbl>
+<w:p><w:hyperlink><w:r><w:t>link</w:t></w:r></w:hyperlink><w:r><w:t>what</w:t></w:r></w:p>
+<w:p/>
+<w:sectPr/></w:body></w:document>"""
+
+
+class TestDocxReader(TestCase):
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.temp_dir.name, "words.docx")
+        with zipfile.ZipFile(self.file_path, "w") as docx_file:
+            docx_file.writestr("word/document.xml", DOCUMENT_XML)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_body_paragraphs_are_read_like_python_docx(self):
+        self.assertEqual(list(iter_docx_paragraphs(self.file_path)), ["what is it\twell\nknown", "what", ""])
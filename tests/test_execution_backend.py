@@ -0,0 +1,58 @@
+from unittest import TestCase
+from collections import Counter
+import threading
+import time
+
+from service.execution_backend import create_execution_backend, merge_counters, INLINE_BACKEND, THREAD_BACKEND, \
+    PROCESS_BACKEND
+from service.words_tokenizer import count_words
+
+
+class TestExecutionBackend(TestCase):
+
+    def test_merge_counters(self):
+        counters = [Counter({"what": i, "word": 1}) for i in range(1, 8)]
+        self.assertEqual(merge_counters(counters), Counter({"what": 28, "word": 7}))
+
+    def test_merge_no_counters(self):
+        self.assertEqual(merge_counters([]), Counter())
+
+    def test_backends_return_same_counts(self):
+        texts = [f"what is {i} what, is-it" for i in range(50)]
+        expected_counter = count_words(" ".join(texts))
+        for backend_name in [INLINE_BACKEND, THREAD_BACKEND, PROCESS_BACKEND]:
+            backend = create_execution_backend(backend_name, num_of_workers=2)
+            futures = [backend.submit(count_words, text) for text in texts]
+            self.assertEqual(merge_counters(future.result() for future in futures), expected_counter)
+            backend.shutdown()
+
+    def test_inline_backend_keeps_exception_in_future(self):
+        backend = create_execution_backend(INLINE_BACKEND, num_of_workers=1)
+        future = backend.submit(count_words, None)
+        self.assertEqual(type(future.exception()), TypeError)
+
+    def test_thread_backend_pending_tasks(self):
+        backend = create_execution_backend(THREAD_BACKEND, num_of_workers=1)
+        task_event = threading.Event()
+        futures = [backend.submit(task_event.wait) for _ in range(2)]
+        self.assertEqual(backend.get_num_of_pending_tasks(), 2)
+        task_event.set()
+        for future in futures:
+            future.result()
+        backend.shutdown()
+        self.assertEqual(backend.get_num_of_pending_tasks(), 0)
+
+    def test_shutdown_with_a_running_task(self):
+        for backend_name in [THREAD_BACKEND, PROCESS_BACKEND]:
+            backend = create_execution_backend(backend_name, num_of_workers=1)
+            future = backend.submit(time.sleep, 0.2)
+            shutdown_thread = threading.Thread(target=backend.shutdown)
+            shutdown_thread.start()
+            shutdown_thread.join(timeout=10)
+            self.assertFalse(shutdown_thread.is_alive())
+            self.assertTrue(future.done())
+            self.assertEqual(backend.get_num_of_pending_tasks(), 0)
+
+    def test_unsupported_backend(self):
+        with self.assertRaises(ValueError):
+            create_execution_backend("gpu", num_of_workers=1)
@@ -0,0 +1,28 @@
+from unittest import TestCase
+
+from service.http_client import create_http_session, HostConnectionsLimiter
+
+
+class TestHttpClient(TestCase):
+
+    def test_create_http_session(self):
+        session = create_http_session({"pool_connections": 2, "pool_maxsize": 5, "max_retries": 3,
+                                       "backoff_factor": 0.5})
+        adapter = session.get_adapter("https://words.com")
+        self.assertIs(adapter, session.get_adapter("http://words.com"))
+        self.assertEqual(adapter._pool_maxsize, 5)
+        self.assertEqual(adapter.max_retries.total, 3)
+        self.assertEqual(adapter.max_retries.backoff_factor, 0.5)
+        self.assertIn(503, adapter.max_retries.status_forcelist)
+        session.close()
+
+    def test_host_connections_limiter(self):
+        limiter = HostConnectionsLimiter(max_connections_per_host=1)
+        self.assertIs(limiter.get_host_semaphore("https://Words.com/a"),
+                      limiter.get_host_semaphore("http://words.com/b"))
+        with limiter.limit("https://words.com/a"):
+            self.assertFalse(limiter.get_host_semaphore("https://words.com/b").acquire(blocking=False))
+            other_host_semaphore = limiter.get_host_semaphore("https://other.com")
+            self.assertTrue(other_host_semaphore.acquire(blocking=False))
+            other_host_semaphore.release()
+        self.assertTrue(limiter.get_host_semaphore("https://words.com/b").acquire(blocking=False))
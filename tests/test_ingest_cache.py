@@ -0,0 +1,51 @@
+from collections import Counter
+from unittest import TestCase
+import os
+import tempfile
+
+from service.ingest_cache import IngestCache
+
+
+class TestIngestCache(TestCase):
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache = IngestCache(self.temp_dir.name, max_entries=2, max_size_bytes=1024)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_set_and_get(self):
+        self.cache.set("url:https://words.com", Counter({"what": 2}), {"etag": '"v1"'})
+        self.assertEqual(self.cache.get_validators("url:https://words.com"), {"etag": '"v1"'})
+        self.assertEqual(self.cache.get_counter("url:https://words.com"), {"what": 2})
+        self.assertIsNone(self.cache.get_counter("url:https://other.com"))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        for key in ["what", "is"]:
+            self.cache.set(key, Counter({key: 1}))
+        self.cache.get_counter("what")
+        self.cache.set("it", Counter({"it": 1}))
+        self.assertIsNone(self.cache.get_counter("is"))
+        self.assertEqual(len(os.listdir(self.temp_dir.name)), 2)
+
+    def test_entries_are_bounded_by_size(self):
+        cache = IngestCache(self.temp_dir.name, max_entries=10, max_size_bytes=60)
+        cache.set("what", Counter({"what": 1}))
+        cache.set("is", Counter({f"is{i}": 1 for i in range(5)}))
+        self.assertIsNone(cache.get_counter("what"))
+
+    def test_entries_are_loaded_from_disk(self):
+        self.cache.set("what", Counter({"what": 1}))
+        cache = IngestCache(self.temp_dir.name, max_entries=2, max_size_bytes=1024)
+        self.assertEqual(cache.get_counter("what"), {"what": 1})
+
+    def test_file_key_changes_with_the_file(self):
+        file_path = os.path.join(self.temp_dir.name, "words.txt")
+        with open(file_path, "w") as file:
+            file.write("what")
+        key, content_key = IngestCache.get_file_key(file_path, False), IngestCache.get_file_key(file_path, True)
+        with open(file_path, "a") as file:
+            file.write(" is")
+        self.assertNotEqual(IngestCache.get_file_key(file_path, False), key)
+        self.assertNotEqual(IngestCache.get_file_key(file_path, True), content_key)
@@ -0,0 +1,56 @@
+from fastapi import HTTPException
+
+from unittest import TestCase, mock
+import queue
+
+from service.ingest_jobs_manager import IngestJobsManager, DONE_STATE, FAILED_STATE, QUEUED_STATE
+from type.response_status import ResponseStatus
+
+
+class TestIngestJobsManager(TestCase):
+
+    @mock.patch("configurations.words_counter_configurations.get_configurations")
+    def setUp(self, mocked_config) -> None:
+        mocked_config.return_value = {"ingest_jobs": {"num_of_workers": 1, "max_queued_jobs": 1,
+                                                      "max_finished_jobs": 1}}
+        self.ingest_function = mock.Mock(return_value=ResponseStatus.Ok)
+        self.jobs_manager = IngestJobsManager(logger=mock.Mock(), ingest_function=self.ingest_function)
+
+    def test_job_is_processed_by_a_worker(self):
+        self.jobs_manager.start()
+        job = self.jobs_manager.submit("what is")
+        self.jobs_manager.jobs_queue.join()
+        self.jobs_manager.stop()
+        self.ingest_function.assert_called_once_with("what is", job.context)
+        job_details = self.jobs_manager.get_job(job.job_id).to_dict()
+        self.assertEqual(job_details["state"], DONE_STATE)
+        self.assertEqual(job_details["status"], ResponseStatus.Ok)
+        self.assertIsNone(job.received_input)
+
+    def test_failed_job_keeps_the_error(self):
+        self.ingest_function.side_effect = HTTPException(status_code=400, detail="Unsupported file type")
+        self.jobs_manager.start()
+        job = self.jobs_manager.submit("C:/file.exe")
+        self.jobs_manager.jobs_queue.join()
+        self.jobs_manager.stop()
+        self.assertEqual(job.state, FAILED_STATE)
+        self.assertEqual(job.error, "Unsupported file type")
+
+    def test_full_queue_rejects_new_jobs(self):
+        job = self.jobs_manager.submit("what")
+        with self.assertRaises(queue.Full):
+            self.jobs_manager.submit("is")
+        self.assertEqual(list(self.jobs_manager.jobs), [job.job_id])
+        self.assertEqual(job.state, QUEUED_STATE)
+
+    def test_old_finished_jobs_are_forgotten(self):
+        self.jobs_manager.start()
+        first_job = self.jobs_manager.submit("what")
+        self.jobs_manager.jobs_queue.join()
+        second_job = self.jobs_manager.submit("is")
+        self.jobs_manager.jobs_queue.join()
+        third_job = self.jobs_manager.submit("it")
+        self.jobs_manager.stop()
+        self.assertIsNone(self.jobs_manager.get_job(first_job.job_id))
+        self.assertIsNotNone(self.jobs_manager.get_job(second_job.job_id))
+        self.assertIsNotNone(self.jobs_manager.get_job(third_job.job_id))
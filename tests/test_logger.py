@@ -0,0 +1,61 @@
+from unittest import TestCase, mock
+from json import loads
+import logging
+import os
+import queue
+import tempfile
+
+from monitoring.logger import JsonFormatter, LevelSamplingFilter, Logger, NonBlockingQueueHandler
+
+
+class TestLogger(TestCase):
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.log_file_path = os.path.join(self.temp_dir.name, "words_counter.log")
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    @staticmethod
+    def create_record(level: int, message: str, extra: str = None) -> logging.LogRecord:
+        record = logging.LogRecord("words_counter", level, __file__, 1, message, None, None)
+        if extra is not None:
+            record.extra = extra
+        return record
+
+    @mock.patch("configurations.words_counter_configurations.get_configurations")
+    def test_records_are_written_by_the_listener(self, mocked_config):
+        mocked_config.return_value = {"logger": {"file_path": self.log_file_path, "level": "INFO", "format": "json",
+                                                 "queue_size": 10, "max_payload_length": 5,
+                                                 "sampling_rates": {"DEBUG": 1, "INFO": 1}}}
+        logger = Logger()
+        logger.logger.debug("not logged")
+        logger.logger.info("the received input is a simple string", extra={"extra": "string is: what is what"})
+        logger.stop()
+        with open(self.log_file_path, "r") as log_file:
+            records = [loads(line) for line in log_file]
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]["level"], "INFO")
+        self.assertEqual(records[0]["message"], "the r...[truncated] (length is: 37)")
+        self.assertEqual(records[0]["extra"], "strin...[truncated] (length is: 23)")
+
+    def test_json_formatter(self):
+        record = self.create_record(logging.ERROR, "failed to record any words in db", "the exception is: x")
+        json_record = loads(JsonFormatter().format(record))
+        self.assertEqual((json_record["level"], json_record["message"], json_record["extra"]),
+                         ("ERROR", "failed to record any words in db", "the exception is: x"))
+
+    def test_level_sampling(self):
+        sampling_filter = LevelSamplingFilter({"INFO": 0, "ERROR": 1})
+        self.assertFalse(sampling_filter.filter(self.create_record(logging.INFO, "sampled out")))
+        self.assertTrue(sampling_filter.filter(self.create_record(logging.ERROR, "kept")))
+        self.assertTrue(sampling_filter.filter(self.create_record(logging.WARNING, "not sampled")))
+
+    def test_record_is_dropped_when_the_queue_is_full(self):
+        records_queue = queue.Queue(maxsize=1)
+        handler = NonBlockingQueueHandler(records_queue, max_payload_length=100)
+        handler.handle(self.create_record(logging.INFO, "first"))
+        handler.handle(self.create_record(logging.INFO, "second"))
+        self.assertEqual(records_queue.qsize(), 1)
+        self.assertEqual(records_queue.get().getMessage(), "first")
@@ -0,0 +1,49 @@
+from unittest import TestCase
+
+from monitoring.metrics import Counter, Gauge, Histogram, MetricsRegistry
+
+
+class TestMetrics(TestCase):
+
+    def setUp(self) -> None:
+        self.registry = MetricsRegistry()
+
+    def test_counter(self):
+        counter = self.registry.register(Counter("words", "The counted words.", ("input_type",)))
+        counter.labels("url").inc(3)
+        counter.labels("url").inc()
+        counter.set_function(lambda: 7, "file")
+        self.assertEqual(self.registry.render(), '# HELP words The counted words.\n# TYPE words counter\n'
+                                                 'words_total{input_type="url"} 4\n'
+                                                 'words_total{input_type="file"} 7\n')
+        with self.assertRaises(ValueError):
+            counter.labels("url").inc(-1)
+
+    def test_gauge(self):
+        gauge = self.registry.register(Gauge("queue_size", "The waiting items."))
+        gauge.set(5)
+        gauge.labels().dec(2)
+        self.assertIn("queue_size 3\n", self.registry.render())
+
+    def test_histogram(self):
+        histogram = self.registry.register(Histogram("duration_seconds", "The duration.", ("stage",),
+                                                     buckets=(0.1, 1)))
+        for value in [0.05, 0.1, 0.5, 2]:
+            histogram.labels('a "quoted"\nstage').observe(value)
+        self.assertEqual(self.registry.render().splitlines()[2:], [
+            'duration_seconds_bucket{stage="a \\"quoted\\"\\nstage",le="0.1"} 2',
+            'duration_seconds_bucket{stage="a \\"quoted\\"\\nstage",le="1"} 3',
+            'duration_seconds_bucket{stage="a \\"quoted\\"\\nstage",le="+Inf"} 4',
+            'duration_seconds_sum{stage="a \\"quoted\\"\\nstage"} 2.65',
+            'duration_seconds_count{stage="a \\"quoted\\"\\nstage"} 4'])
+
+    def test_metric_is_registered_once(self):
+        self.registry.register(Gauge("queue_size", "The waiting items."))
+        with self.assertRaises(ValueError):
+            self.registry.register(Gauge("queue_size", "The waiting items."))
+
+    def test_failing_function_is_skipped(self):
+        gauge = self.registry.register(Gauge("pool_in_use", "The used connections.", ("pool",)))
+        gauge.set_function(lambda: 1 / 0, "db")
+        gauge.set_function(lambda: 2, "workers")
+        self.assertEqual(self.registry.render().splitlines()[2:], ['pool_in_use{pool="workers"} 2'])
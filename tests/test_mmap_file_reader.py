@@ -0,0 +1,42 @@
+from unittest import TestCase
+import os
+import tempfile
+
+from service.counting_tasks import count_text_file_range
+from service.mmap_file_reader import split_file_to_chunks
+from service.words_tokenizer import count_words
+
+
+class TestMmapFileReader(TestCase):
+
+    def setUp(self) -> None:
+        self.text = " ".join(f"what{'-' * (i % 7)}is  élan\tcafé,\nwell-known{i % 3}" for i in range(500))
+        file_descriptor, self.file_path = tempfile.mkstemp(suffix=".txt")
+        with os.fdopen(file_descriptor, "w", encoding="utf-8") as file:
+            file.write(self.text)
+
+    def tearDown(self) -> None:
+        os.remove(self.file_path)
+
+    def test_chunks_boundaries_are_snapped_to_whitespaces(self):
+        with open(self.file_path, "rb") as file:
+            content = file.read()
+        chunks = split_file_to_chunks(self.file_path, chunk_size=37)
+        self.assertEqual(chunks[0][0], 0)
+        self.assertEqual(chunks[-1][1], len(content))
+        for (_, end), (next_start, _) in zip(chunks, chunks[1:]):
+            self.assertEqual(end, next_start)
+            self.assertTrue(content[end:end + 1].isspace())
+
+    def test_words_are_not_split_or_counted_twice(self):
+        counter = count_words(self.text)
+        for chunk_size, read_size in [(1, 1), (37, 5), (1000, 100), (10 ** 6, 10 ** 4)]:
+            partial_counter = count_words("")
+            for start, end in split_file_to_chunks(self.file_path, chunk_size):
+                partial_counter.update(count_text_file_range(self.file_path, start, end, read_size))
+            self.assertEqual(partial_counter, counter)
+
+    def test_empty_file_has_no_chunks(self):
+        with open(self.file_path, "w"):
+            pass
+        self.assertEqual(split_file_to_chunks(self.file_path, chunk_size=10), [])
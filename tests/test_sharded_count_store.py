@@ -0,0 +1,71 @@
+from unittest import TestCase, mock
+import os
+import tempfile
+
+from service.memory_database_helper import MemoryDatabaseHelper
+from service.sharded_count_store import ShardedCountStore
+
+
+class TestShardedCountStore(TestCase):
+
+    @mock.patch("configurations.words_counter_configurations.get_configurations")
+    def setUp(self, mocked_config) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        mocked_config.return_value = {"count_store": {"num_of_shards": 4, "load_batch_size": 2,
+                                                      "snapshot_interval_seconds": 60,
+                                                      "snapshot_path": os.path.join(self.temp_dir.name, "snapshot")},
+                                      "words_index": {"top_words_capacity": 2, "prefix_merge_threshold": 2}}
+        self.database_helper = MemoryDatabaseHelper()
+        self.database_helper.update_database({"what": 2, "is": 1, "well-known": 5})
+        self.count_store = ShardedCountStore(mock.Mock(), self.database_helper)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def create_count_store(self) -> ShardedCountStore:
+        with mock.patch("configurations.words_counter_configurations.get_configurations",
+                        return_value=self.count_store.config):
+            return ShardedCountStore(mock.Mock(), self.database_helper)
+
+    def test_add_and_get_counts(self):
+        self.count_store.add_counts({"what": 2, "is": 1})
+        self.count_store.add_counts({"what": 1})
+        self.assertEqual(self.count_store.get_count("what"), 3)
+        self.assertEqual(self.count_store.get_counts(["is", "it"]), {"is": 1, "it": 0})
+
+    def test_load_from_db(self):
+        self.count_store.load()
+        self.assertEqual(self.count_store.get_counts(["what", "is", "well-known"]), {"what": 2, "is": 1,
+                                                                                    "well-known": 5})
+
+    def test_load_from_matching_snapshot(self):
+        self.count_store.load()
+        self.count_store.save_snapshot()
+        self.database_helper.iter_all_counts = mock.Mock()
+        count_store = self.create_count_store()
+        count_store.load()
+        self.database_helper.iter_all_counts.assert_not_called()
+        self.assertEqual(count_store.get_counts(["what", "well-known"]), {"what": 2, "well-known": 5})
+
+    def test_stale_snapshot_is_ignored(self):
+        self.count_store.load()
+        self.count_store.save_snapshot()
+        self.database_helper.update_database({"what": 1})
+        count_store = self.create_count_store()
+        count_store.load()
+        self.assertEqual(count_store.get_count("what"), 3)
+
+    def test_empty_snapshot(self):
+        self.database_helper.words_counts.clear()
+        self.count_store.save_snapshot()
+        count_store = self.create_count_store()
+        count_store.load()
+        self.assertEqual(count_store.get_num_of_words(), 0)
+
+    def test_words_index_is_built_on_load_and_updated(self):
+        self.count_store.load()
+        self.assertEqual(self.count_store.get_top_words(2, 0), [("well-known", 5), ("what", 2)])
+        self.count_store.add_counts({"is": 6, "it": 1})
+        self.assertEqual(self.count_store.get_top_words(1, 1), [("well-known", 5)])
+        self.assertIsNone(self.count_store.get_top_words(2, 1))
+        self.assertEqual(self.count_store.get_words_by_prefix("i", 10, 0), [("is", 7), ("it", 1)])
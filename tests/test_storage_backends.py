@@ -0,0 +1,83 @@
+from unittest import TestCase, mock
+import os
+import tempfile
+
+from service.memory_database_helper import MemoryDatabaseHelper
+from service.sqlite_database_helper import SQLiteDatabaseHelper
+from service.storage_backend import create_database_helper
+
+
+class StorageBackendContract:
+
+    def create_database_helper(self):
+        raise NotImplementedError
+
+    @mock.patch("configurations.words_counter_configurations.get_configurations")
+    def setUp(self, mocked_config) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        mocked_config.return_value = {"database_helper": {"table_name": "words_counter", "pool_timeout_seconds": 1,
+                                                          "sqlite_path": os.path.join(self.temp_dir.name, "words.db")}}
+        self.database_helper = self.create_database_helper()
+        self.database_helper.setup_database()
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_counts_are_incremented(self):
+        self.database_helper.update_database({"what": 2, "is": 1})
+        self.database_helper.update_database_in_bulk([("is", 1), ("what", 1)])
+        self.assertEqual(self.database_helper.get_count_from_db("what"), 3)
+        self.assertEqual(self.database_helper.get_count_from_db("it"), 0)
+
+    def test_get_counts_returns_only_stored_words(self):
+        self.database_helper.update_database({"what": 2, "is": 1})
+        self.assertEqual(self.database_helper.get_counts_from_db(["what", "it"]), {"what": 2})
+
+    def test_top_words(self):
+        self.database_helper.update_database({"what": 2, "is": 2, "it": 1, "well-known": 5})
+        self.assertEqual(self.database_helper.get_top_words(3), [("well-known", 5), ("is", 2), ("what", 2)])
+
+    def test_top_words_pages(self):
+        self.database_helper.update_database({"what": 2, "is": 2, "it": 1, "well-known": 5})
+        self.assertEqual(self.database_helper.get_top_words(2, 2), [("what", 2), ("it", 1)])
+
+    def test_words_by_prefix(self):
+        self.database_helper.update_database({"what": 2, "where": 1, "when": 3, "is": 1})
+        self.assertEqual(self.database_helper.get_words_by_prefix("wh", 2), [("what", 2), ("when", 3)])
+        self.assertEqual(self.database_helper.get_words_by_prefix("wh", 2, 2), [("where", 1)])
+        self.assertEqual(self.database_helper.get_words_by_prefix("x", 2), [])
+
+    def test_totals_and_all_counts(self):
+        self.assertEqual(self.database_helper.get_totals(), (0, 0))
+        self.database_helper.update_database({"what": 2, "is": 1, "it": 4})
+        self.assertEqual(self.database_helper.get_totals(), (3, 7))
+        batches = list(self.database_helper.iter_all_counts(2))
+        self.assertEqual([len(batch) for batch in batches], [2, 1])
+        self.assertEqual(dict(item for batch in batches for item in batch), {"what": 2, "is": 1, "it": 4})
+
+
+class TestSQLiteDatabaseHelper(StorageBackendContract, TestCase):
+
+    def create_database_helper(self):
+        return SQLiteDatabaseHelper()
+
+    def test_database_is_in_wal_mode(self):
+        journal_mode = self.database_helper.get_connection().execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(journal_mode, "wal")
+
+
+class TestMemoryDatabaseHelper(StorageBackendContract, TestCase):
+
+    def create_database_helper(self):
+        return MemoryDatabaseHelper()
+
+
+class TestCreateDatabaseHelper(TestCase):
+
+    @mock.patch("configurations.words_counter_configurations.get_configurations")
+    def test_backend_is_selected_by_config(self, mocked_config):
+        mocked_config.return_value = {}
+        self.assertEqual(type(create_database_helper({"database_helper": {"backend": "memory"}})),
+                         MemoryDatabaseHelper)
+        with self.assertRaises(ValueError):
+            create_database_helper({"database_helper": {"backend": "oracle"}})
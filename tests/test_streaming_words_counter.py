@@ -0,0 +1,35 @@
+from unittest import TestCase
+
+from service.streaming_words_counter import StreamingWordsCounter, HtmlTextExtractor
+from service.words_tokenizer import count_words
+
+
+class TestStreamingWordsCounter(TestCase):
+
+    def test_words_cut_between_pieces_are_counted_once(self):
+        text = "what is well-known, what\tis\nit "
+        streaming_words_counter = StreamingWordsCounter()
+        for i in range(0, len(text), 3):
+            streaming_words_counter.feed(text[i:i + 3])
+        self.assertEqual(streaming_words_counter.close(), count_words(text))
+
+    def test_last_word_is_counted_on_close(self):
+        streaming_words_counter = StreamingWordsCounter()
+        streaming_words_counter.feed("what wh")
+        streaming_words_counter.feed("at")
+        self.assertEqual(streaming_words_counter.close(), {"what": 2})
+
+
+class TestHtmlTextExtractor(TestCase):
+
+    def test_extracts_text_from_html_fed_in_pieces(self):
+        page = "<html><head><style>p {color: red}</style><script>var what = 1;</script></head>" \
+               "<body><p>What <b>is</b> caf&eacute;</p><p>w<span>or</span>d</p><img alt='image'/></body></html>"
+        html_text_extractor = HtmlTextExtractor()
+        streaming_words_counter = StreamingWordsCounter()
+        for character in page:
+            html_text_extractor.feed(character)
+            streaming_words_counter.feed(html_text_extractor.pop_text())
+        html_text_extractor.close()
+        streaming_words_counter.feed(html_text_extractor.pop_text())
+        self.assertEqual(streaming_words_counter.close(), {"what": 1, "is": 1, "caf": 1, "word": 1})
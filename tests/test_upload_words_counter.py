@@ -0,0 +1,40 @@
+from unittest import TestCase
+import gzip
+
+from service.upload_words_counter import create_upload_words_counter, MultipartUploadWordsCounter, \
+    TextUploadWordsCounter
+
+MULTIPART_BODY = (b'--words\r\nContent-Disposition: form-data; name="file"; filename="words.txt"\r\n'
+                  b'Content-Type: text/plain; charset=latin-1\r\n\r\nwhat is caf\xe9\r\n'
+                  b'--words\r\nContent-Disposition: form-data; name="field"\r\n\r\nwhat\r\n--words--\r\n')
+
+
+class TestUploadWordsCounter(TestCase):
+
+    def test_text_upload_in_chunks(self):
+        upload_words_counter = create_upload_words_counter("text/plain")
+        self.assertEqual(type(upload_words_counter), TextUploadWordsCounter)
+        for chunk in [b"wh", b"at is wh", b"at"]:
+            upload_words_counter.feed(chunk)
+        self.assertEqual(upload_words_counter.close(), {"what": 2, "is": 1})
+
+    def test_multipart_parts_are_counted_separately(self):
+        upload_words_counter = create_upload_words_counter("multipart/form-data; boundary=words")
+        self.assertEqual(type(upload_words_counter), MultipartUploadWordsCounter)
+        for i in range(0, len(MULTIPART_BODY), 7):
+            upload_words_counter.feed(MULTIPART_BODY[i:i + 7])
+        self.assertEqual(upload_words_counter.close(), {"what": 2, "is": 1, "caf": 1})
+
+    def test_compressed_upload(self):
+        upload_words_counter = create_upload_words_counter("text/plain", "gzip")
+        body = gzip.compress(b"what is what")
+        for i in range(0, len(body), 5):
+            upload_words_counter.feed(body[i:i + 5])
+        self.assertEqual(upload_words_counter.close(), {"what": 2, "is": 1})
+
+    def test_unsupported_content_types(self):
+        for content_type in [None, "application/json", "garbage", "multipart/form-data"]:
+            with self.assertRaises(ValueError):
+                create_upload_words_counter(content_type)
+        with self.assertRaises(ValueError):
+            create_upload_words_counter("text/plain", "br")
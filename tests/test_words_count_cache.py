@@ -0,0 +1,56 @@
+from unittest import TestCase, mock
+
+from service.words_count_cache import WordsCountCache
+
+
+class TestWordsCountCache(TestCase):
+
+    def setUp(self) -> None:
+        self.cache = WordsCountCache(max_size=2, ttl_seconds=0)
+
+    def test_read_through_counts_hits_and_misses(self):
+        found, _, generation = self.cache.get("what")
+        self.assertFalse(found)
+        self.cache.set("what", 3, generation)
+        self.assertEqual(self.cache.get("what")[:2], (True, 3))
+        self.assertEqual(self.cache.get_statistics(), {"size": 1, "max_size": 2, "hits": 1, "misses": 1})
+
+    def test_least_recently_used_word_is_evicted(self):
+        for word in ["what", "is"]:
+            self.cache.set(word, 1, self.cache.generation)
+        self.cache.get("what")
+        self.cache.set("it", 1, self.cache.generation)
+        self.assertEqual(list(self.cache.entries), ["what", "it"])
+
+    def test_deltas_are_applied_to_cached_words(self):
+        self.cache.set("what", 3, self.cache.generation)
+        self.cache.apply_deltas({"what": 2, "is": 1})
+        self.assertEqual(self.cache.get("what")[:2], (True, 5))
+        self.assertFalse(self.cache.get("is")[0])
+
+    def test_count_read_before_an_update_is_not_cached(self):
+        _, _, generation = self.cache.get("what")
+        self.cache.apply_deltas({"what": 2})
+        self.cache.set("what", 3, generation)
+        self.assertFalse(self.cache.get("what")[0])
+
+    def test_count_read_during_an_update_is_not_cached(self):
+        # the count is read from db after the update was committed and before its deltas were applied
+        self.cache.begin_update()
+        _, _, generation = self.cache.get("what")
+        self.cache.set("what", 2, generation)
+        self.cache.apply_deltas({"what": 2})
+        self.cache.end_update()
+        self.assertFalse(self.cache.get("what")[0])
+        _, _, generation = self.cache.get("what")
+        self.cache.set("what", 2, generation)
+        self.assertEqual(self.cache.get("what")[:2], (True, 2))
+
+    @mock.patch("service.words_count_cache.time.monotonic")
+    def test_expired_entry_is_a_miss(self, mocked_monotonic):
+        cache = WordsCountCache(max_size=2, ttl_seconds=10)
+        mocked_monotonic.return_value = 100
+        cache.set("what", 3, cache.generation)
+        mocked_monotonic.return_value = 111
+        self.assertFalse(cache.get("what")[0])
+        self.assertEqual(len(cache.entries), 0)
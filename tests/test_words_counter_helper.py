@@ -1,27 +1,40 @@
+from fastapi import HTTPException
+import requests
+
 from unittest import TestCase, mock
+import bz2
+import gzip
+import lzma
+import os
+import tempfile
 
+from monitoring.metrics import MERGE_DURATION_SECONDS, PARSE_DURATION_SECONDS, TOKENIZE_DURATION_SECONDS
 from service.database_helper import DatabaseHelper
+from service.ingest_cache import IngestCache
+from service.ingest_context import IngestContext
 from service.words_counter_helper import WordsCounterHelper
+from tests.mocked_configurations import get_mocked_configurations
+from type.response_status import ResponseStatus
 
 
 class TestWordsCounterHelper(TestCase):
 
     @mock.patch("configurations.words_counter_configurations.get_configurations")
     def setUp(self, mocked_config) -> None:
-        mocked_config.return_value = {"words_counter_helper": {"num_of_workers": 1, "num_of_chunks": 1,
-                                                               "files_chunk_size": 1}}
+        mocked_config.return_value = get_mocked_configurations()
         self.database_helper = DatabaseHelper()
         self.helper_instance = WordsCounterHelper(logger=mock.Mock())
+        self.context = IngestContext()
 
     def test_extract_text_from_input_string(self):
         input_string = "simple string"
         self.helper_instance.process_file_content = mock.Mock()
         self.helper_instance.process_url_content = mock.Mock()
         self.helper_instance.update_words_counter_mapping = mock.Mock()
-        self.helper_instance.extract_text_from_input(input_string)
+        self.helper_instance.extract_text_from_input(input_string, self.context)
         self.helper_instance.process_file_content.assert_not_called()
         self.helper_instance.process_url_content.assert_not_called()
-        self.helper_instance.update_words_counter_mapping.assert_called_once_with(input_string.split())
+        self.helper_instance.update_words_counter_mapping.assert_called_once_with(input_string, self.context)
 
     def test_extract_text_from_non_exist_file(self):
         input_string = "C:/Path/To/A/file.txt"
@@ -29,7 +42,7 @@ class TestWordsCounterHelper(TestCase):
         self.helper_instance.process_url_content = mock.Mock()
         self.helper_instance.update_words_counter_mapping = mock.Mock()
         try:
-            self.helper_instance.extract_text_from_input(input_string)
+            self.helper_instance.extract_text_from_input(input_string, self.context)
         except ValueError as ex:
             self.assertEqual(type(ex), ValueError)
             self.assertEqual(str(ex), "The request contains a path to a file that does not exist")
@@ -42,7 +55,225 @@ class TestWordsCounterHelper(TestCase):
         self.helper_instance.process_file_content = mock.Mock()
         self.helper_instance.process_url_content = mock.Mock()
         self.helper_instance.update_words_counter_mapping = mock.Mock()
-        self.helper_instance.extract_text_from_input(input_string)
+        self.helper_instance.extract_text_from_input(input_string, self.context)
+        self.helper_instance.process_file_content.assert_not_called()
+        self.helper_instance.process_url_content.assert_called_with(input_string, self.context)
+        self.helper_instance.update_words_counter_mapping.assert_not_called()
+
+    def test_read_csv_file_in_batches(self):
+        self.helper_instance.execution_backend.submit = mock.Mock(wraps=self.helper_instance.execution_backend.submit)
+        rows = ["what,is", "it,what", "well-known,is", "what,it", "is,is"]
+        self.helper_instance.read_csv_file(rows, self.context)
+        self.assertEqual(self.context.counter, {"what": 3, "is": 4, "it": 2, "well-known": 1})
+        self.assertEqual(self.helper_instance.execution_backend.submit.call_count, 3)
+
+    def test_read_csv_file_stages_are_measured_per_batch(self):
+        stages_counts_before = [stage_duration.count for stage_duration in [PARSE_DURATION_SECONDS,
+                                                                             TOKENIZE_DURATION_SECONDS,
+                                                                             MERGE_DURATION_SECONDS]]
+        self.helper_instance.read_csv_file(["what,is", "it,what", "well-known,is", "what,it", "is,is"], self.context)
+        stages_counts = [stage_duration.count for stage_duration in [PARSE_DURATION_SECONDS, TOKENIZE_DURATION_SECONDS,
+                                                                     MERGE_DURATION_SECONDS]]
+        self.assertEqual([count - count_before for count, count_before in zip(stages_counts, stages_counts_before)],
+                         [3, 3, 2])
+
+    def test_read_url_content_in_chunks(self):
+        self.helper_instance.config["words_counter_helper"].update({"url_chunk_size": 1, "url_max_body_size": 1000})
+        body = "<p>Ünïcode wörds, what</p><p>what</p>".encode("utf-8")
+        response = mock.Mock(headers={}, encoding="utf-8")
+        response.iter_content.return_value = [body[i:i + 1] for i in range(len(body))]
+        self.helper_instance.read_url_content(response, self.context)
+        self.assertEqual(self.context.counter, {"ncode": 1, "wrds": 1, "what": 2})
+        self.assertEqual(self.context.get_progress(), {"bytes_processed": len(body), "words_counted": 4,
+                                                       "db_chunks_committed": 0})
+
+    def test_read_compressed_url_content(self):
+        self.helper_instance.config["words_counter_helper"].update({"url_chunk_size": 3, "url_max_body_size": 1000})
+        body = bz2.compress(b"<p>what is</p><p>what</p>")
+        response = mock.Mock(headers={"Content-Encoding": "bzip2"}, encoding="utf-8")
+        response.raw.stream.return_value = [body[i:i + 3] for i in range(0, len(body), 3)]
+        self.helper_instance.read_url_content(response, self.context)
+        self.assertEqual(self.context.counter, {"what": 2, "is": 1})
+        response.iter_content.assert_not_called()
+
+    def test_process_compressed_files(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            text_file_path = os.path.join(temp_dir, "words.txt.gz")
+            with gzip.open(text_file_path, "wb") as file:
+                file.write(b"what is what " * 3)
+            csv_file_path = os.path.join(temp_dir, "words.csv.xz")
+            with lzma.open(csv_file_path, "wt") as file:
+                file.write("what,is\nit,what\n")
+            self.helper_instance.process_file_content(text_file_path, self.context)
+            self.helper_instance.process_file_content(csv_file_path, self.context)
+            with self.assertRaises(ValueError):
+                self.helper_instance.process_file_content(os.path.join(temp_dir, "words.docx.gz"), self.context)
+        self.assertEqual(self.context.counter, {"what": 8, "is": 4, "it": 1})
+
+    def test_read_url_content_larger_than_max_body_size(self):
+        self.helper_instance.config["words_counter_helper"].update({"url_chunk_size": 1, "url_max_body_size": 3})
+        response = mock.Mock(headers={}, encoding="utf-8")
+        response.iter_content.return_value = [b"wh", b"at", b" is"]
+        with self.assertRaises(HTTPException) as context:
+            self.helper_instance.read_url_content(response, self.context)
+        self.assertEqual(context.exception.status_code, 413)
+        self.assertEqual(self.context.counter, {})
+
+    def test_request_url_timeout(self):
+        self.helper_instance.http_session.get = mock.Mock(side_effect=requests.ReadTimeout("read timed out"))
+        with self.assertRaises(HTTPException) as context:
+            self.helper_instance.request_url("https://words.com", {})
+        self.assertEqual(context.exception.status_code, 504)
+        self.helper_instance.http_session.get.assert_called_once_with("https://words.com", stream=True, headers={},
+                                                                      timeout=(1, 2))
+
+    def test_list_batch_files(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            os.makedirs(os.path.join(temp_dir, "inner"))
+            for file_name in ["a.txt", "b.csv.gz", "c.png", "d.docx.gz", os.path.join("inner", "e.json")]:
+                open(os.path.join(temp_dir, file_name), "w").close()
+            self.assertEqual(self.helper_instance.list_batch_files(temp_dir, 5),
+                             [os.path.join(temp_dir, "a.txt"), os.path.join(temp_dir, "b.csv.gz")])
+            self.assertEqual(self.helper_instance.list_batch_files(os.path.join(temp_dir, "**", "*.json"), 5),
+                             [os.path.join(temp_dir, "inner", "e.json")])
+
+    @mock.patch("service.words_counter_helper.glob.iglob")
+    def test_list_batch_files_stops_after_max_files(self, mocked_iglob):
+        listed_paths = []
+
+        def iglob(files_pattern: str, recursive: bool):
+            for i in range(100):
+                listed_paths.append(f"C:/corpus/{i}.txt")
+                yield listed_paths[-1]
+        mocked_iglob.side_effect = iglob
+        with self.assertRaises(ValueError):
+            self.helper_instance.list_batch_files("C:/corpus/*.txt", 3)
+        self.assertEqual(len(listed_paths), 4)
+
+    def test_ingest_batch_merges_the_inputs_counts(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_paths = [os.path.join(temp_dir, "a.txt"), os.path.join(temp_dir, "b.txt")]
+            for file_path, text in zip(file_paths, ["what is", "what it"]):
+                with open(file_path, "w") as file:
+                    file.write(text)
+
+            def process_url_content(url: str, context: IngestContext):
+                if url == "https://missing.com":
+                    raise HTTPException(status_code=404, detail="Not Found")
+                context.merge_counter({"what": 1})
+
+            self.helper_instance.process_url_content = mock.Mock(side_effect=process_url_content)
+            failed_inputs = self.helper_instance.ingest_batch(["https://words.com", "https://missing.com"],
+                                                              file_paths, self.context)
+        self.assertEqual(failed_inputs, [{"input": "https://missing.com", "error": "Not Found"}])
+        self.assertEqual(self.context.counter, {"what": 3, "is": 1, "it": 1})
+        self.assertEqual(self.context.get_progress()["words_counted"], 4)
+
+    def test_concurrent_ingests_use_their_own_counts(self):
+        self.helper_instance.database_helper.update_database = mock.Mock()
+        other_context = IngestContext()
+        self.helper_instance.extract_text_from_input("what is what", self.context)
+        self.helper_instance.extract_text_from_input("is it", other_context)
+        status = self.helper_instance.update_database(self.context)
+        self.assertEqual(status, ResponseStatus.Ok)
+        self.helper_instance.database_helper.update_database.assert_called_once_with({"what": 2, "is": 1})
+        self.assertEqual(self.context.get_progress()["db_chunks_committed"], 1)
+        self.assertEqual(other_context.counter, {"is": 1, "it": 1})
+
+    def test_get_word_count_reads_through_the_cache(self):
+        self.helper_instance.database_helper.get_count_from_db = mock.Mock(return_value=3)
+        self.helper_instance.database_helper.update_database = mock.Mock()
+        self.assertEqual(self.helper_instance.get_word_count("What"), 3)
+        self.helper_instance.extract_text_from_input("what what", self.context)
+        self.helper_instance.update_database(self.context)
+        self.assertEqual(self.helper_instance.get_word_count("what"), 5)
+        self.helper_instance.database_helper.get_count_from_db.assert_called_once_with("what")
+
+    def test_prepare_words_for_statistics(self):
+        requested_words_by_cleaned_word, invalid_words = \
+            self.helper_instance.prepare_words_for_statistics(["What", "what!", "well-known", "42"])
+        self.assertEqual(requested_words_by_cleaned_word, {"what": ["What", "what!"], "well-known": ["well-known"]})
+        self.assertEqual(invalid_words, ["42"])
+
+    def test_iter_words_counts_reads_missing_words_in_chunks(self):
+        self.helper_instance.database_helper.get_count_from_db = mock.Mock(return_value=3)
+        self.helper_instance.database_helper.get_counts_from_db = mock.Mock(return_value={"is": 1})
+        self.helper_instance.get_word_count("what")
+        words_counts = list(self.helper_instance.iter_words_counts(["what", "is", "it"]))
+        self.assertEqual(words_counts, [{"what": 3, "is": 1}, {"it": 0}])
+        self.helper_instance.database_helper.get_counts_from_db.assert_has_calls([mock.call(["is"]),
+                                                                                  mock.call(["it"])])
+
+
+class TestWordsCounterHelperIngestCache(TestCase):
+
+    @mock.patch("configurations.words_counter_configurations.get_configurations")
+    def setUp(self, mocked_config) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        mocked_config.return_value = get_mocked_configurations(
+            words_counter_helper={"files_chunk_size": 1024}, words_count_cache={"enabled": False},
+            ingest_cache={"enabled": True, "max_entries": 2, "max_size_bytes": 1024, "use_content_hash": False,
+                          "idempotent": False, "directory": os.path.join(self.temp_dir.name, "cache")})
+        self.helper_instance = WordsCounterHelper(logger=mock.Mock())
+        self.file_path = os.path.join(self.temp_dir.name, "words.txt")
+        with open(self.file_path, "w") as file:
+            file.write("what is what")
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def ingest_file(self) -> ResponseStatus:
+        context = IngestContext()
+        self.helper_instance.process_cached_file_content(self.file_path, context)
+        return self.helper_instance.update_database(context)
+
+    def test_repeated_file_is_not_read_again(self):
+        self.ingest_file()
+        self.helper_instance.process_file_content = mock.Mock()
+        context = IngestContext()
+        self.helper_instance.process_cached_file_content(self.file_path, context)
         self.helper_instance.process_file_content.assert_not_called()
-        self.helper_instance.process_url_content.assert_called_with(input_string)
-        self.helper_instance.update_words_counter_mapping.assert_not_called()
\ No newline at end of file
+        self.assertEqual(context.counter, {"what": 2, "is": 1})
+
+    def test_idempotent_repeated_file_is_skipped(self):
+        self.helper_instance.config["ingest_cache"]["idempotent"] = True
+        self.ingest_file()
+        context = IngestContext()
+        self.helper_instance.process_cached_file_content(self.file_path, context)
+        self.assertEqual(context.counter, {})
+
+    def test_idempotent_repeated_file_is_recorded_once(self):
+        self.helper_instance.config["ingest_cache"]["idempotent"] = True
+        self.assertEqual(self.ingest_file(), ResponseStatus.Ok)
+        self.assertEqual(self.ingest_file(), ResponseStatus.Ok)
+        self.assertEqual(self.helper_instance.get_words_counts(["what", "is"]), {"what": 2, "is": 1})
+
+    def test_file_is_not_cached_when_its_counts_were_not_recorded(self):
+        self.helper_instance.database_helper.update_database = mock.Mock(side_effect=Exception("db is down"))
+        self.assertEqual(self.ingest_file(), ResponseStatus.Error)
+        self.helper_instance.process_file_content = mock.Mock()
+        self.helper_instance.process_cached_file_content(self.file_path, IngestContext())
+        self.helper_instance.process_file_content.assert_called_once()
+
+    def test_modified_file_is_read_again(self):
+        self.ingest_file()
+        with open(self.file_path, "a") as file:
+            file.write(" it")
+        context = IngestContext()
+        self.helper_instance.process_cached_file_content(self.file_path, context)
+        self.assertEqual(context.counter, {"what": 2, "is": 1, "it": 1})
+
+    def test_not_modified_url_uses_the_cached_counts(self):
+        url = "https://words.com"
+        mocked_get = self.helper_instance.http_session.get = mock.Mock()
+        response = mock.MagicMock(status_code=200, headers={"ETag": '"v1"'}, encoding="utf-8")
+        response.iter_content.return_value = [b"<p>what is what</p>"]
+        mocked_get.return_value = response
+        context = IngestContext()
+        self.helper_instance.process_url_content(url, context)
+        self.helper_instance.update_database(context)
+        mocked_get.return_value = mock.MagicMock(status_code=304)
+        context = IngestContext()
+        self.helper_instance.process_url_content(url, context)
+        mocked_get.assert_called_with(url, stream=True, headers={"If-None-Match": '"v1"'}, timeout=(1, 2))
+        self.assertEqual(context.counter, {"what": 2, "is": 1})
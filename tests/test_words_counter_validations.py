@@ -1,7 +1,13 @@
-from unittest import TestCase, mock
+from fastapi import HTTPException
+
+from unittest import TestCase, IsolatedAsyncioTestCase, mock
+import os
+import tempfile
+import threading
 
 from main import WordsCounter
 from service.words_counter_helper import WordsCounterHelper
+from tests.mocked_configurations import get_mocked_configurations
 from type.response_status import ResponseStatus
 
 
@@ -9,8 +15,7 @@ class TestWordsCounter(TestCase):
 
     @mock.patch("configurations.words_counter_configurations.get_configurations")
     def setUp(self, mocked_config) -> None:
-        mocked_config.return_value = {"words_counter_helper": {"num_of_workers": 1, "num_of_chunks": 1,
-                                                               "files_chunk_size": 1}}
+        mocked_config.return_value = get_mocked_configurations()
         self.word_counter = WordsCounter(logger=mock.Mock())
         self.helper_instance = WordsCounterHelper(logger=mock.Mock())
 
@@ -27,3 +32,106 @@ class TestWordsCounter(TestCase):
         self.assertEqual(type(res[0]), ResponseStatus)
         self.assertEqual(res[0], ResponseStatus.Error)
         self.assertEqual(res[1], "A requested word must contains at least one letter")
+
+    def test_validate_page_request(self):
+        self.assertEqual(self.word_counter.validate_page_request(10, 0), (ResponseStatus.Ok, None))
+        self.assertEqual(self.word_counter.validate_page_request(11, 0)[0], ResponseStatus.Error)
+        self.assertEqual(self.word_counter.validate_page_request(1, -1)[0], ResponseStatus.Error)
+
+    def test_get_words_by_prefix(self):
+        self.word_counter.words_counter_helper.database_helper.update_database({"what": 2, "when": 1, "is": 3})
+        words_page = self.word_counter.get_words_by_prefix("WH!", 1, 1)
+        self.assertEqual(words_page, {"limit": 1, "offset": 1, "words": [{"word": "when", "count": 1}]})
+
+
+class TestWordsCounterIngest(IsolatedAsyncioTestCase):
+
+    @mock.patch("configurations.words_counter_configurations.get_configurations")
+    def setUp(self, mocked_config) -> None:
+        mocked_config.return_value = get_mocked_configurations()
+        self.word_counter = WordsCounter(logger=mock.Mock())
+
+    async def test_set_text_input_runs_blocking_stages_off_the_event_loop(self):
+        stages_threads = []
+        self.word_counter.validate_word_counter_request = mock.AsyncMock(return_value=(ResponseStatus.Ok, "what"))
+        self.word_counter.words_counter_helper.extract_text_from_input = \
+            mock.Mock(side_effect=lambda *_: stages_threads.append(threading.get_ident()))
+        self.word_counter.words_counter_helper.update_database = \
+            mock.Mock(side_effect=lambda _: stages_threads.append(threading.get_ident()) or ResponseStatus.Ok)
+        status = await self.word_counter.set_text_input(mock.Mock())
+        self.assertEqual(status, ResponseStatus.Ok)
+        self.assertEqual(len(stages_threads), 2)
+        self.assertEqual(len(set(stages_threads)), 1)
+        self.assertNotIn(threading.get_ident(), stages_threads)
+
+    @staticmethod
+    def create_upload_request(content_type: str, chunks: list) -> mock.Mock:
+        async def stream():
+            for chunk in chunks:
+                yield chunk
+        return mock.Mock(headers={"Content-Type": content_type}, stream=stream)
+
+    async def test_upload_text_is_counted_while_it_is_received(self):
+        request = self.create_upload_request("text/plain; charset=utf-8", [b"what i", b"s wh", b"at \xc3", b"\xa9"])
+        status = await self.word_counter.upload_text(request)
+        self.assertEqual(status, ResponseStatus.Ok)
+        self.assertEqual(self.word_counter.database_helper.get_counts_from_db(["what", "is"]), {"what": 2, "is": 1})
+
+    async def test_empty_upload(self):
+        for chunks in [[], [b""], [b"123 ... !?"]]:
+            status = await self.word_counter.upload_text(self.create_upload_request("text/plain", chunks))
+            self.assertEqual(status, ResponseStatus.Ok)
+        self.assertEqual(self.word_counter.database_helper.get_counts_from_db(["what"]), {})
+
+    async def test_upload_larger_than_max_body_size(self):
+        request = self.create_upload_request("application/octet-stream", [b"what is what " * 3])
+        with self.assertRaises(HTTPException) as context:
+            await self.word_counter.upload_text(request)
+        self.assertEqual(context.exception.status_code, 413)
+
+    async def test_upload_content_type_not_supported(self):
+        with self.assertRaises(HTTPException) as context:
+            await self.word_counter.upload_text(self.create_upload_request("application/json", [b"{}"]))
+        self.assertEqual(context.exception.status_code, 400)
+
+    @staticmethod
+    def create_json_request(json: dict) -> mock.Mock:
+        return mock.Mock(headers={"Content-Type": "application/json"}, json=mock.AsyncMock(return_value=json))
+
+    async def test_ingest_batch_records_the_inputs_with_a_single_update(self):
+        helper = self.word_counter.words_counter_helper
+        helper.process_url_content = mock.Mock(side_effect=lambda url, context: context.merge_counter({"what": 1}))
+        helper.update_database = mock.Mock(wraps=helper.update_database)
+        result = await self.word_counter.ingest_batch(self.create_json_request(
+            {"urls": ["https://words.com/a", "https://words.com/b"]}))
+        self.assertEqual(result, {"status": ResponseStatus.Ok, "inputs": 2, "failed_inputs": []})
+        helper.update_database.assert_called_once()
+        self.assertEqual(self.word_counter.database_helper.get_count_from_db("what"), 2)
+
+    async def test_ingest_batch_of_a_posix_files_pattern(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for file_name, text in [("a.txt", "what is"), ("b.txt", "what it")]:
+                with open(os.path.join(temp_dir, file_name), "w") as file:
+                    file.write(text)
+            result = await self.word_counter.ingest_batch(self.create_json_request(
+                {"files": os.path.join(os.path.abspath(temp_dir), "*.txt")}))
+        self.assertEqual(result, {"status": ResponseStatus.Ok, "inputs": 2, "failed_inputs": []})
+        self.assertEqual(self.word_counter.database_helper.get_count_from_db("what"), 2)
+
+    async def test_ingest_batch_files_pattern_matches_too_many_files(self):
+        helper = self.word_counter.words_counter_helper
+        helper.list_batch_files = mock.Mock(side_effect=ValueError("The files pattern matches more than 2 paths"))
+        with self.assertRaises(HTTPException) as context:
+            await self.word_counter.ingest_batch(self.create_json_request(
+                {"urls": ["https://words.com/a"], "files": "C:/corpus/**/*.txt"}))
+        self.assertEqual(context.exception.status_code, 400)
+        helper.list_batch_files.assert_called_once_with("C:/corpus/**/*.txt", 2)
+
+    async def test_ingest_batch_validation(self):
+        for json in [{"urls": ["not a url"]}, {"urls": "https://words.com"}, {"other": 1},
+                     {"urls": ["https://words.com/a", "https://words.com/b", "https://words.com/c",
+                               "https://words.com/d"]},
+                     {"files": "relative/**/*.txt"}, {"files": "C:/corpus/<words>.txt"}, {"files": "C:relative/*"}]:
+            with self.assertRaises(HTTPException) as context:
+                await self.word_counter.ingest_batch(self.create_json_request(json))
+            self.assertEqual(context.exception.status_code, 400)
@@ -0,0 +1,42 @@
+from unittest import TestCase
+import random
+
+from service.words_index import PrefixIndex, TopWordsIndex
+
+
+class TestTopWordsIndex(TestCase):
+
+    def test_top_words_match_a_full_sort(self):
+        index = TopWordsIndex(capacity=20)
+        words_counts = {}
+        random_generator = random.Random(7)
+        for _ in range(2000):
+            word = random_generator.choice("abcdefghij") + random_generator.choice("abcdefghij")
+            words_counts[word] = words_counts.get(word, 0) + random_generator.randint(1, 3)
+            index.update([(word, words_counts[word])])
+        expected = sorted(words_counts.items(), key=lambda item: (-item[1], item[0]))
+        self.assertEqual(index.get_top_words(10, 5), expected[5:15])
+
+    def test_page_beyond_capacity(self):
+        index = TopWordsIndex(capacity=2)
+        index.update([("what", 1), ("is", 2), ("it", 3)])
+        self.assertEqual(index.get_top_words(2, 0), [("it", 3), ("is", 2)])
+        self.assertIsNone(index.get_top_words(2, 1))
+
+    def test_ties_are_ranked_by_word(self):
+        index = TopWordsIndex(capacity=2)
+        index.update([("what", 1), ("it", 1), ("is", 1)])
+        self.assertEqual(index.get_top_words(2, 0), [("is", 1), ("it", 1)])
+
+
+class TestPrefixIndex(TestCase):
+
+    def test_words_by_prefix_from_both_arrays(self):
+        index = PrefixIndex(merge_threshold=3)
+        index.build(["whale", "is", "what"])
+        index.add_words(["when", "a"])
+        self.assertEqual(index.get_words("wh", 10, 0), ["whale", "what", "when"])
+        self.assertEqual(index.get_words("wh", 1, 1), ["what"])
+        index.add_words(["where"])
+        self.assertEqual(index.recent_words, [])
+        self.assertEqual(index.get_words("whe", 10, 0), ["when", "where"])
@@ -0,0 +1,27 @@
+from unittest import TestCase
+
+from service.words_tokenizer import count_words
+
+
+class TestWordsTokenizer(TestCase):
+
+    def test_count_words_cleans_and_lowercases(self):
+        counts = count_words("What what! WHAT3 wh4at")
+        self.assertEqual(counts, {"what": 4})
+
+    def test_count_words_keeps_dashes_and_commas(self):
+        counts = count_words("what, what well-known")
+        self.assertEqual(counts, {"what,": 1, "what": 1, "well-known": 1})
+
+    def test_count_words_skips_words_without_letters(self):
+        counts = count_words("1234 -,- %% éé a")
+        self.assertEqual(counts, {"a": 1})
+
+    def test_count_words_splits_on_all_whitespaces(self):
+        counts = count_words("one\ttwo\nthree\u3000one")
+        self.assertEqual(counts, {"one": 2, "two": 1, "three": 1})
+
+    def test_count_words_does_not_lowercase_non_ascii_into_letters(self):
+        # the kelvin sign is lowercased into an ascii k, it must be cleaned up before lowercasing
+        counts = count_words("\u212aa")
+        self.assertEqual(counts, {"a": 1})
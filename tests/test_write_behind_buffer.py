@@ -0,0 +1,121 @@
+from unittest import TestCase, mock
+import threading
+
+from service.words_count_cache import WordsCountCache
+from service.write_behind_buffer import WriteBehindBuffer
+
+
+class TestWriteBehindBuffer(TestCase):
+
+    @mock.patch("configurations.words_counter_configurations.get_configurations")
+    def setUp(self, mocked_config) -> None:
+        mocked_config.return_value = {"write_behind": {"max_pending_words": 3, "flush_interval_seconds": 60}}
+        self.database_helper = mock.Mock()
+        self.words_count_cache = WordsCountCache(max_size=10, ttl_seconds=0)
+        self.buffer = WriteBehindBuffer(mock.Mock(), self.database_helper, self.words_count_cache)
+
+    def test_ingests_are_merged_and_flushed_sorted_in_bulk(self):
+        self.buffer.add({"what": 1, "is": 1})
+        self.buffer.add({"what": 2})
+        self.assertTrue(self.buffer.flush())
+        self.database_helper.update_database_in_bulk.assert_called_once_with([("is", 1), ("what", 3)])
+        self.assertEqual(self.buffer.pending_counter, {})
+
+    def test_size_threshold_triggers_a_flush(self):
+        self.buffer.add({"what": 1, "is": 1})
+        self.assertFalse(self.buffer.flush_event.is_set())
+        self.buffer.add({"it": 1})
+        self.assertTrue(self.buffer.flush_event.is_set())
+
+    def test_failed_flush_keeps_the_counts(self):
+        self.database_helper.update_database_in_bulk.side_effect = Exception("lost connection")
+        self.buffer.add({"what": 1})
+        self.assertFalse(self.buffer.flush())
+        self.buffer.add({"what": 1})
+        self.assertEqual(self.buffer.pending_counter, {"what": 2})
+
+    def test_reads_include_buffered_counts(self):
+        self.buffer.add({"what": 2})
+        counts = self.buffer.add_buffered_counts(["what", "is"], lambda words: {"what": 3})
+        self.assertEqual(counts, {"what": 5, "is": 0})
+
+    def test_read_that_overlaps_a_flush_is_repeated(self):
+        stored_counts = {"what": 3}
+        self.database_helper.update_database_in_bulk.side_effect = \
+            lambda items: stored_counts.update({word: stored_counts.get(word, 0) + count for word, count in items})
+
+        def read_stored_counts(words):
+            # the buffer is flushed while the stored counts are read
+            self.buffer.flush()
+            return dict(stored_counts)
+
+        self.buffer.add({"what": 2})
+        self.assertEqual(self.buffer.add_buffered_counts(["what"], read_stored_counts), {"what": 5})
+
+    def test_read_during_a_flush_does_not_wait_for_it(self):
+        write_started, write_released = threading.Event(), threading.Event()
+
+        def update_database_in_bulk(items):
+            write_started.set()
+            write_released.wait(5)
+        self.database_helper.update_database_in_bulk.side_effect = update_database_in_bulk
+        self.buffer.add({"what": 2})
+        flush_thread = threading.Thread(target=self.buffer.flush)
+        flush_thread.start()
+        try:
+            self.assertTrue(write_started.wait(5))
+            self.buffer.add({"what": 1})
+            # db does not have the flushed counts yet, they are added from the buffer
+            self.assertEqual(self.buffer.add_buffered_counts(["what"], lambda words: {"what": 3}), {"what": 6})
+        finally:
+            write_released.set()
+            flush_thread.join()
+
+    def assert_read_while_the_flushed_counts_are_applied(self, applied_store, method_name: str, read_stored_counts):
+        apply_started, apply_released = threading.Event(), threading.Event()
+        apply_counts = getattr(applied_store, method_name)
+
+        def paused_apply_counts(counter):
+            apply_started.set()
+            apply_released.wait(5)
+            apply_counts(counter)
+        setattr(applied_store, method_name, paused_apply_counts)
+        self.buffer.add({"what": 2})
+        flush_thread = threading.Thread(target=self.buffer.flush)
+        flush_thread.start()
+        try:
+            self.assertTrue(apply_started.wait(5))
+            read_counts = []
+            read_thread = threading.Thread(
+                target=lambda: read_counts.append(self.buffer.add_buffered_counts(["what"], read_stored_counts)))
+            read_thread.start()
+        finally:
+            apply_released.set()
+            flush_thread.join()
+        read_thread.join()
+        self.assertEqual(read_counts, [{"what": 5}])
+
+    def test_read_while_the_cache_is_updated_by_a_flush(self):
+        self.words_count_cache.set("what", 3, self.words_count_cache.generation)
+        self.assert_read_while_the_flushed_counts_are_applied(
+            self.words_count_cache, "apply_deltas", lambda words: {"what": self.words_count_cache.get("what")[1]})
+
+    def test_read_while_the_count_store_is_updated_by_a_flush(self):
+        count_store = mock.Mock(counts={"what": 3})
+        count_store.add_counts.side_effect = lambda counter: count_store.counts.update(
+            {word: count_store.counts.get(word, 0) + count for word, count in counter.items()})
+        self.buffer.count_store = count_store
+        self.assert_read_while_the_flushed_counts_are_applied(count_store, "add_counts",
+                                                              lambda words: dict(count_store.counts))
+
+    def test_flush_applies_deltas_to_cached_counts(self):
+        self.words_count_cache.set("what", 3, self.words_count_cache.generation)
+        self.buffer.add({"what": 2})
+        self.buffer.flush()
+        self.assertEqual(self.words_count_cache.get("what")[:2], (True, 5))
+
+    def test_stop_flushes_remaining_counts(self):
+        self.buffer.start()
+        self.buffer.add({"what": 1})
+        self.buffer.stop()
+        self.database_helper.update_database_in_bulk.assert_called_once_with([("what", 1)])